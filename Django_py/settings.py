@@ -140,6 +140,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.PermissionContextMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'django.middleware.cache.FetchFromCacheMiddleware',
@@ -282,4 +283,11 @@ CAPTCHA_LENGTH = 4
 # برای محیط production (فعلاً کامنت شده):
 # CSRF_COOKIE_SECURE = True
 # SESSION_COOKIE_SECURE = True
-# SECURE_SSL_REDIRECT = True
\ No newline at end of file
+# SECURE_SSL_REDIRECT = True
+
+# شمارنده بازدید پست‌ها: بازدیدها در جدول PendingPostView جمع و با اجرای دوره‌ای
+# python manage.py flush_post_views (یا --loop 30) در دیتابیس ذخیره می‌شوند
+
+# نگه‌داری موقت صندلی تورها به cache.add اتمیک نیاز دارد؛ در production این را به
+# یک کش Redis (مانند پیکربندی کامنت شده‌ی CACHES بالا) اشاره دهید
+# TOUR_SEAT_HOLD_CACHE = 'default'
@@ -19,27 +19,21 @@ from django.contrib import admin
 from django.urls import path , include
 from django.conf import settings
 from django.conf.urls.static import static
-from django.contrib.sitemaps.views import sitemap
-from website.sitemaps import StaticViewSitemap
-from blog.sitemaps import BlogSitemap
+from website.views import serve_rendition, sitemap_index_view, sitemap_shard_view
 
 
-sitemaps = {
-    "static": StaticViewSitemap,
-    'blog': BlogSitemap
-}
-
 urlpatterns = [    # path ('url addree', 'view' , name)
 
     path('admin/', admin.site.urls),
+    path(f'{settings.MEDIA_URL.strip("/")}/renditions/<path:path>', serve_rendition, name='rendition'),
     path('' ,include('website.urls')),
     # path('blog/' ,include('blog.urls'))
     path('blog/', include('blog.urls', namespace='blog')),
     path('accounts/', include('accounts.urls', namespace='accounts')),    
     path('summernote/', include('django_summernote.urls')),
-    path("sitemap.xml",sitemap,
-        {"sitemaps": sitemaps},
+    path("sitemap.xml",sitemap_index_view,
         name="django.contrib.sitemaps.views.sitemap",),
+    path('sitemaps/<str:name>', sitemap_shard_view, name='sitemap_shard'),
     path('tours/', include('tours.urls')),   
     path('', include('blog.urls', namespace='blog_root')),
     path('robots.txt', include('robots.urls')),
@@ -11,8 +11,7 @@ class UserProfileInline(admin.StackedInline):
     
     def get_fieldsets(self, request, obj=None):
         # فیلدهای مختلف بر اساس سطح دسترسی کاربر درخواست کننده
-        if request.user.is_superuser or (hasattr(request.user, 'profile') and 
-                                       request.user.profile.user_level == UserLevel.SUPER_ADMIN):
+        if request.user.is_superuser or request.permissions.has_level(UserLevel.SUPER_ADMIN):
             # سوپر ادمین - تمام فیلدها
             return (
                 ('اطلاعات اصلی', {
@@ -47,8 +46,7 @@ class UserProfileInline(admin.StackedInline):
         readonly_fields = []
         # کاربران معمولی نمی‌توانند user_level را تغییر دهند
         if not (request.user.is_superuser or 
-                (hasattr(request.user, 'profile') and 
-                 request.user.profile.user_level == UserLevel.SUPER_ADMIN)):
+                request.permissions.has_level(UserLevel.SUPER_ADMIN)):
             readonly_fields.append('user_level')
         return readonly_fields
 
@@ -63,13 +61,12 @@ class CustomUserAdmin(UserAdmin):
         qs = super().get_queryset(request)
         # اگر کاربر سوپر ادمین نیست، فقط کاربران با سطح پایین‌تر را نشان بده
         if not (request.user.is_superuser or 
-                (hasattr(request.user, 'profile') and 
-                 request.user.profile.user_level == UserLevel.SUPER_ADMIN)):
+                request.permissions.has_level(UserLevel.SUPER_ADMIN)):
             # ادمین تور می‌تواند نویسندگان و کاربران معمولی را ببیند
-            if hasattr(request.user, 'profile') and request.user.profile.user_level == UserLevel.ADMIN:
+            if request.permissions.has_level(UserLevel.ADMIN):
                 return qs.filter(profile__user_level__in=[UserLevel.NORMAL, UserLevel.WRITER])
             # نویسندگان فقط خودشان را می‌بینند
-            elif hasattr(request.user, 'profile') and request.user.profile.user_level == UserLevel.WRITER:
+            elif request.permissions.has_level(UserLevel.WRITER):
                 return qs.filter(id=request.user.id)
         return qs
     
@@ -78,8 +75,7 @@ class CustomUserAdmin(UserAdmin):
         
         # محدود کردن فیلدها برای کاربران غیر سوپر ادمین
         if not (request.user.is_superuser or 
-                (hasattr(request.user, 'profile') and 
-                 request.user.profile.user_level == UserLevel.SUPER_ADMIN)):
+                request.permissions.has_level(UserLevel.SUPER_ADMIN)):
             # حذف فیلدهای حساس
             if 'Permissions' in [fieldset[0] for fieldset in fieldsets]:
                 fieldsets = [fieldset for fieldset in fieldsets if fieldset[0] != 'Permissions']
@@ -93,8 +89,7 @@ class CustomUserAdmin(UserAdmin):
         
         # کاربران غیر سوپر ادمین نمی‌توانند برخی فیلدها را تغییر دهند
         if not (request.user.is_superuser or 
-                (hasattr(request.user, 'profile') and 
-                 request.user.profile.user_level == UserLevel.SUPER_ADMIN)):
+                request.permissions.has_level(UserLevel.SUPER_ADMIN)):
             readonly_fields.extend(['is_superuser', 'is_staff', 'user_permissions', 'groups', 'last_login', 'date_joined'])
         
         return readonly_fields
@@ -102,14 +97,12 @@ class CustomUserAdmin(UserAdmin):
     def has_add_permission(self, request):
         # فقط سوپر ادمین و ادمین تور می‌توانند کاربر اضافه کنند
         return (request.user.is_superuser or 
-                (hasattr(request.user, 'profile') and 
-                 request.user.profile.user_level in [UserLevel.SUPER_ADMIN, UserLevel.ADMIN]))
+                request.permissions.has_level(UserLevel.SUPER_ADMIN, UserLevel.ADMIN))
     
     def has_delete_permission(self, request, obj=None):
         # فقط سوپر ادمین می‌تواند کاربر حذف کند
         return (request.user.is_superuser or 
-                (hasattr(request.user, 'profile') and 
-                 request.user.profile.user_level == UserLevel.SUPER_ADMIN))
+                request.permissions.has_level(UserLevel.SUPER_ADMIN))
     
     def get_user_level(self, obj):
         if hasattr(obj, 'profile'):
@@ -125,31 +118,47 @@ class CustomUserAdmin(UserAdmin):
 admin.site.unregister(User)
 admin.site.register(User, CustomUserAdmin)
 
+class CompletionFilter(admin.SimpleListFilter):
+    title = 'تکمیل پروفایل'
+    parameter_name = 'completion'
+    
+    def lookups(self, request, model_admin):
+        return [
+            ('complete', 'کامل (۷۰٪ و بیشتر)'),
+            ('incomplete', 'ناقص (کمتر از ۷۰٪)'),
+        ]
+    
+    def queryset(self, request, queryset):
+        if self.value() == 'complete':
+            return queryset.filter(completion_score__gte=70)
+        if self.value() == 'incomplete':
+            return queryset.filter(completion_score__lt=70)
+        return queryset
+
 @admin.register(UserProfile)
 class UserProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'get_full_name', 'user_level', 'job_title', 'get_profile_completion', 'created_date')
-    list_filter = ('user_level', 'education_level', 'created_date')
+    list_filter = ('user_level', CompletionFilter, 'education_level', 'created_date')
     search_fields = ('user__username', 'user__first_name', 'user__last_name', 'bio', 'job_title', 'company')
     readonly_fields = ('created_date', 'updated_date')
+    list_select_related = ('user',)
     ordering = ('-created_date',)
     
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         # فیلتر کردن بر اساس سطح دسترسی کاربر درخواست کننده
         if not (request.user.is_superuser or 
-                (hasattr(request.user, 'profile') and 
-                 request.user.profile.user_level == UserLevel.SUPER_ADMIN)):
-            if hasattr(request.user, 'profile') and request.user.profile.user_level == UserLevel.ADMIN:
+                request.permissions.has_level(UserLevel.SUPER_ADMIN)):
+            if request.permissions.has_level(UserLevel.ADMIN):
                 # ادمین تور می‌تواند نویسندگان و کاربران معمولی را ببیند
                 return qs.filter(user_level__in=[UserLevel.NORMAL, UserLevel.WRITER])
-            elif hasattr(request.user, 'profile') and request.user.profile.user_level == UserLevel.WRITER:
+            elif request.permissions.has_level(UserLevel.WRITER):
                 # نویسندگان فقط پروفایل خودشان را می‌بینند
                 return qs.filter(user=request.user)
         return qs
     
     def get_fieldsets(self, request, obj=None):
-        if request.user.is_superuser or (hasattr(request.user, 'profile') and 
-                                       request.user.profile.user_level == UserLevel.SUPER_ADMIN):
+        if request.user.is_superuser or request.permissions.has_level(UserLevel.SUPER_ADMIN):
             # سوپر ادمین - تمام فیلدها
             return (
                 ('اطلاعات کاربر', {
@@ -172,7 +181,7 @@ class UserProfileAdmin(admin.ModelAdmin):
                     'classes': ('collapse',)
                 }),
             )
-        elif hasattr(request.user, 'profile') and request.user.profile.user_level == UserLevel.ADMIN:
+        elif request.permissions.has_level(UserLevel.ADMIN):
             # ادمین تور - فیلدهای محدود
             return (
                 ('اطلاعات کاربر', {
@@ -203,11 +212,10 @@ class UserProfileAdmin(admin.ModelAdmin):
         readonly_fields = list(super().get_readonly_fields(request, obj))
         
         if not (request.user.is_superuser or 
-                (hasattr(request.user, 'profile') and 
-                 request.user.profile.user_level == UserLevel.SUPER_ADMIN)):
+                request.permissions.has_level(UserLevel.SUPER_ADMIN)):
             if obj and obj.user_level == UserLevel.SUPER_ADMIN:
                 readonly_fields.append('user_level')
-            if hasattr(request.user, 'profile') and request.user.profile.user_level == UserLevel.WRITER:
+            if request.permissions.has_level(UserLevel.WRITER):
                 readonly_fields.extend(['user', 'user_level', 'job_title', 'company', 'education_level', 
                                       'field_of_study', 'website', 'github', 'linkedin', 'twitter', 'instagram'])
         
@@ -216,22 +224,21 @@ class UserProfileAdmin(admin.ModelAdmin):
     def has_add_permission(self, request):
         # فقط سوپر ادمین و ادمین تور می‌توانند پروفایل اضافه کنند
         return (request.user.is_superuser or 
-                (hasattr(request.user, 'profile') and 
-                 request.user.profile.user_level in [UserLevel.SUPER_ADMIN, UserLevel.ADMIN]))
+                request.permissions.has_level(UserLevel.SUPER_ADMIN, UserLevel.ADMIN))
     
     def has_delete_permission(self, request, obj=None):
         # فقط سوپر ادمین می‌تواند پروفایل حذف کند
         return (request.user.is_superuser or 
-                (hasattr(request.user, 'profile') and 
-                 request.user.profile.user_level == UserLevel.SUPER_ADMIN))
+                request.permissions.has_level(UserLevel.SUPER_ADMIN))
     
     def get_full_name(self, obj):
         return obj.get_full_name()
     get_full_name.short_description = 'نام کامل'
     
     def get_profile_completion(self, obj):
-        return f'{obj.get_profile_completion_percentage()}%'
+        return f'{obj.completion_score}%'
     get_profile_completion.short_description = 'تکمیل پروفایل'
+    get_profile_completion.admin_order_field = 'completion_score'
     
     def bio_preview(self, obj):
         return obj.bio[:50] + '...' if obj.bio and len(obj.bio) > 50 else obj.bio
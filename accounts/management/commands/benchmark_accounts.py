@@ -0,0 +1,66 @@
+import time
+
+from django.contrib.auth.models import User, update_last_login
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from accounts import bulk_import
+from accounts.models import UserProfile
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'سنجش هزینه‌ی ورود کاربر و ساخت گروهی کاربران (داده‌ها در پایان برگردانده می‌شوند)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000, help='تعداد کاربر برای آزمون ساخت گروهی')
+        parser.add_argument('--logins', type=int, default=200, help='تعداد ورود برای آزمون ورود')
+
+    def measure(self, label, func):
+        queries = 0
+
+        def count(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            started = time.perf_counter()
+            func()
+            elapsed = time.perf_counter() - started
+        self.stdout.write(f'{label}: {elapsed:.3f} ثانیه، {queries} کوئری')
+        return elapsed, queries
+
+    def handle(self, *args, **options):
+        stamp = int(time.time() * 1000)
+        rows = [{'username': f'bench_{stamp}_{i}', 'email': f'bench_{i}@example.com', 'bio': 'bench'}
+                for i in range(options['users'])]
+        try:
+            with transaction.atomic():
+                user = User.objects.create(username=f'bench_{stamp}')
+
+                def logins():
+                    for _ in range(options['logins']):
+                        update_last_login(None, user)
+
+                self.measure(f'{options["logins"]} ورود (update_last_login)', logins)
+
+                profile = UserProfile.objects.get(user=user)
+                self.measure('ذخیره‌ی پروفایل بدون تغییر', profile.save)
+
+                def one_by_one():
+                    for row in rows:
+                        created = User.objects.create(username=f'{row["username"]}_s', email=row['email'])
+                        created.profile.bio = row['bio']
+                        created.profile.save()
+
+                self.measure(f'ساخت {len(rows)} کاربر تک‌به‌تک (با سیگنال)', one_by_one)
+                self.measure(f'ساخت {len(rows)} کاربر با bulk_import',
+                             lambda: bulk_import.import_users(rows))
+                raise Rollback
+        except Rollback:
+            pass
+        self.stdout.write(self.style.SUCCESS('سنجش کامل شد؛ داده‌های آزمایشی برگردانده شدند'))
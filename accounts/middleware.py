@@ -0,0 +1,20 @@
+# accounts/middleware.py
+from django.utils.functional import SimpleLazyObject
+
+from .permissions import get_permission_context
+
+
+class PermissionContextMiddleware:
+    """
+    افزودن request.permissions - زمینه‌ی دسترسی کاربر جاری
+
+    زمینه به صورت تنبل ساخته می‌شود؛ درخواست‌هایی که از آن استفاده نکنند
+    هیچ کوئری اضافه‌ای ندارند.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.permissions = SimpleLazyObject(lambda: get_permission_context(request.user))
+        return self.get_response(request)
@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:15
+
+import operator
+from functools import reduce
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Q, When
+
+COMPLETION_FIELDS = [
+    'bio', 'profile_image', 'job_title', 'company',
+    'education_level', 'field_of_study', 'phone_number'
+]
+
+
+def populate_completion_score(apps, schema_editor):
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+    filled = reduce(operator.add, [
+        Case(When(Q(**{f'{field}__isnull': True}) | Q(**{field: ''}), then=0),
+             default=1, output_field=models.IntegerField())
+        for field in COMPLETION_FIELDS
+    ])
+    UserProfile.objects.update(completion_score=filled * 100 / len(COMPLETION_FIELDS))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprofile',
+            name='completion_score',
+            field=models.PositiveSmallIntegerField(db_index=True, default=0, editable=False, verbose_name='درصد تکمیل پروفایل'),
+        ),
+        migrations.AddIndex(
+            model_name='userprofile',
+            index=models.Index(fields=['user_level', 'completion_score'], name='accounts_us_user_le_2bb68b_idx'),
+        ),
+        migrations.RunPython(populate_completion_score, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,9 @@ from django.db.models.signals import post_save
 from django.dispatch import receiver
 from django.utils import timezone
 from django.core.exceptions import ValidationError
+from django.db.models import Case, Q, When
+from functools import reduce
+import operator
 import os
 
 
@@ -28,6 +31,51 @@ class EducationLevel(models.TextChoices):
     PHD = 'phd', 'دکتری'
 
 
+# فیلدهای شمارش شده در درصد تکمیل پروفایل
+COMPLETION_FIELDS = [
+    'bio', 'profile_image', 'job_title', 'company',
+    'education_level', 'field_of_study', 'phone_number'
+]
+
+
+def completion_expression():
+    """
+    عبارت دیتابیسی معادل get_profile_completion_percentage
+
+    برای محاسبه‌ی گروهی completion_score (مثلاً پس از update) بدون بارگذاری
+    پروفایل‌ها.
+    """
+    filled = [
+        Case(When(Q(**{f'{field}__isnull': True}) | Q(**{field: ''}), then=0),
+             default=1, output_field=models.IntegerField())
+        for field in COMPLETION_FIELDS
+    ]
+    return reduce(operator.add, filled) * 100 / len(COMPLETION_FIELDS)
+
+
+# مدیر مدل برای مدیریت بهتر در ادمین
+class UserProfileManager(models.Manager):
+    def writers(self):
+        """دریافت تمام نویسندگان"""
+        return self.filter(user_level=UserLevel.WRITER)
+    
+    def admins(self):
+        """دریافت تمام ادمین‌ها"""
+        return self.filter(user_level=UserLevel.ADMIN)
+    
+    def active_users(self):
+        """دریافت کاربران فعال"""
+        return self.filter(user__is_active=True)
+    
+    def get_complete_profiles(self, threshold=70):
+        """دریافت پروفایل‌های با درصد تکمیل بالا (کوئری روی ستون نمایه‌دار completion_score)"""
+        return self.filter(completion_score__gte=threshold).order_by('-completion_score', '-created_date')
+
+    def refresh_completion_scores(self):
+        """محاسبه‌ی دوباره‌ی completion_score همه‌ی پروفایل‌ها با یک UPDATE"""
+        return self.update(completion_score=completion_expression())
+
+
 class UserProfile(models.Model):
     
     # ارتباط با کاربر
@@ -143,6 +191,14 @@ class UserProfile(models.Model):
         help_text='آدرس پروفایل Instagram'
     )
     
+    # درصد تکمیل پروفایل (در save محاسبه می‌شود) برای فیلتر و مرتب‌سازی در دیتابیس
+    completion_score = models.PositiveSmallIntegerField(
+        default=0,
+        db_index=True,
+        editable=False,
+        verbose_name='درصد تکمیل پروفایل'
+    )
+    
     # متادیتا
     created_date = models.DateTimeField(
         auto_now_add=True,
@@ -154,6 +210,9 @@ class UserProfile(models.Model):
         verbose_name='تاریخ بروزرسانی'
     )
     
+    # add_to_class پس از ساخت مدل، مدیر پیش‌فرض را جایگزین نمی‌کرد
+    objects = UserProfileManager()
+    
     class Meta:
         verbose_name = 'پروفایل کاربر'
         verbose_name_plural = 'پروفایل کاربران'
@@ -161,6 +220,7 @@ class UserProfile(models.Model):
         indexes = [
             models.Index(fields=['user_level']),
             models.Index(fields=['created_date']),
+            models.Index(fields=['user_level', 'completion_score']),
         ]
     
     def __str__(self):
@@ -227,10 +287,7 @@ class UserProfile(models.Model):
 
     def get_profile_completion_percentage(self):
         """درصد تکمیل پروفایل"""
-        fields_to_check = [
-            'bio', 'profile_image', 'job_title', 'company',
-            'education_level', 'field_of_study', 'phone_number'
-        ]
+        fields_to_check = COMPLETION_FIELDS
         
         completed = 0
         for field in fields_to_check:
@@ -256,22 +313,84 @@ class UserProfile(models.Model):
         """آیا کاربر ادمین است؟"""
         return self.user_level == UserLevel.ADMIN
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # مقادیر بارگذاری شده برای تشخیص فیلدهای تغییر کرده
+        instance._loaded_values = instance._field_values()
+        return instance
+
+    def refresh_from_db(self, *args, **kwargs):
+        super().refresh_from_db(*args, **kwargs)
+        self._loaded_values = self._field_values()
+
+    def _field_values(self):
+        deferred = self.get_deferred_fields()
+        values = {}
+        for field in self._meta.concrete_fields:
+            if field.attname in deferred:
+                continue
+            value = getattr(self, field.attname)
+            if isinstance(field, models.FileField):
+                value = value.name or None
+            values[field.name] = value
+        return values
+
+    def get_dirty_fields(self):
+        """فیلدهای تغییر کرده از زمان بارگذاری - None یعنی وضعیت قبلی نامعلوم است"""
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None or self._state.adding:
+            return None
+        return {
+            name for name, value in self._field_values().items()
+            if name in loaded and loaded[name] != value
+        }
+
+    def _replaced_image_name(self, dirty):
+        """نام تصویر قبلی در صورت جایگزینی با تصویر جدید"""
+        if dirty is not None:
+            return self._loaded_values['profile_image'] if 'profile_image' in dirty else None
+        if not self.pk:
+            return None
+        # وضعیت قبلی نامعلوم: خواندن ردیف ذخیره شده
+        old_name = UserProfile.objects.filter(pk=self.pk).values_list('profile_image', flat=True).first()
+        return old_name if old_name != (self.profile_image.name or None) else None
+
     def save(self, *args, **kwargs):
-        """ذخیره پروفایل با مدیریت تصویر قدیمی"""
-        # حذف تصویر قدیمی هنگام آپلود تصویر جدید
-        if self.pk:
-            try:
-                old_profile = UserProfile.objects.get(pk=self.pk)
-                if (old_profile.profile_image and 
-                    old_profile.profile_image != self.profile_image and
-                    os.path.isfile(old_profile.profile_image.path)):
-                    old_profile.profile_image.delete(save=False)
-            except (UserProfile.DoesNotExist, ValueError):
-                pass
-        
+        """
+        ذخیره پروفایل با مدیریت تصویر قدیمی
+
+        برای پروفایل بارگذاری شده از دیتابیس فقط فیلدهای تغییر کرده اعتبارسنجی و
+        ذخیره می‌شوند و ذخیره‌ی بدون تغییر کاملاً نادیده گرفته می‌شود.
+        """
+        self.completion_score = self.get_profile_completion_percentage()
+        dirty = self.get_dirty_fields()
+        if dirty is not None and kwargs.get('update_fields') is None:
+            if not dirty:
+                return
+            kwargs['update_fields'] = dirty | {'updated_date'}
+        elif kwargs.get('update_fields') is not None:
+            update_fields = set(kwargs['update_fields'])
+            # امتیاز تکمیل همراه با فیلدهای مؤثر در آن ذخیره شود
+            if update_fields & set(COMPLETION_FIELDS):
+                kwargs['update_fields'] = update_fields | {'completion_score'}
+        replaced_image = self._replaced_image_name(dirty)
+
         # اعتبارسنجی قبل از ذخیره
-        self.full_clean()
+        if dirty is None:
+            self.full_clean()
+        else:
+            self.full_clean(exclude=[
+                field.name for field in self._meta.concrete_fields if field.name not in dirty
+            ])
         super().save(*args, **kwargs)
+        self._loaded_values = self._field_values()
+
+        # حذف تصویر قدیمی هنگام آپلود تصویر جدید
+        if replaced_image:
+            storage = self._meta.get_field('profile_image').storage
+            if storage.exists(replaced_image):
+                storage.delete(replaced_image)
 
     def delete(self, *args, **kwargs):
         """حذف پروفایل با مدیریت فایل تصویر"""
@@ -287,37 +406,3 @@ def create_user_profile(sender, instance, created, **kwargs):
     """ایجاد پروفایل به صورت خودکار هنگام ایجاد کاربر جدید"""
     if created:
         UserProfile.objects.create(user=instance)
-
-
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """ذخیره پروفایل هنگام به‌روزرسانی کاربر"""
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
-
-
-# مدیر مدل برای مدیریت بهتر در ادمین
-class UserProfileManager(models.Manager):
-    def writers(self):
-        """دریافت تمام نویسندگان"""
-        return self.filter(user_level=UserLevel.WRITER)
-    
-    def admins(self):
-        """دریافت تمام ادمین‌ها"""
-        return self.filter(user_level=UserLevel.ADMIN)
-    
-    def active_users(self):
-        """دریافت کاربران فعال"""
-        return self.filter(user__is_active=True)
-    
-    def get_complete_profiles(self, threshold=70):
-        """دریافت پروفایل‌های با درصد تکمیل بالا"""
-        complete_profiles = []
-        for profile in self.all():
-            if profile.get_profile_completion_percentage() >= threshold:
-                complete_profiles.append(profile)
-        return complete_profiles
-
-
-# اضافه کردن مدیر سفارشی به مدل
-UserProfile.add_to_class('objects', UserProfileManager())
\ No newline at end of file
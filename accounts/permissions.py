@@ -2,6 +2,8 @@ from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
 from django.db.models.signals import post_migrate
 from django.dispatch import receiver
+from django.core.exceptions import ObjectDoesNotExist
+from django.utils.functional import cached_property
 
 class CustomPermissions:
     # دسترسی‌های مخصوص Super Admin
@@ -30,31 +32,137 @@ class CustomPermissions:
         ('can_manage_media', 'می‌تواند رسانه‌ها را مدیریت کند'),
     ]
 
+# دسترسی‌های هر سطح کاربری - یک بار هنگام بارگذاری ماژول محاسبه می‌شود
+LEVEL_PERMISSIONS = {
+    'super_admin': tuple(perm[0] for perm in
+                         CustomPermissions.SUPER_ADMIN_PERMISSIONS +
+                         CustomPermissions.TOUR_ADMIN_PERMISSIONS +
+                         CustomPermissions.CONTENT_ADMIN_PERMISSIONS),
+    'admin': tuple(perm[0] for perm in
+                   CustomPermissions.TOUR_ADMIN_PERMISSIONS +
+                   CustomPermissions.CONTENT_ADMIN_PERMISSIONS),
+    'writer': tuple(perm[0] for perm in
+                    CustomPermissions.CONTENT_ADMIN_PERMISSIONS),
+}
+_LEVEL_PERMISSION_SETS = {level: frozenset(perms) for level, perms in LEVEL_PERMISSIONS.items()}
+
+CONTENT_MANAGERS_GROUP = 'Content Managers'
+
+
+class PermissionContext:
+    """
+    دسترسی‌های یک کاربر در طول یک درخواست
+
+    عضویت در گروه‌ها، سطح کاربری و شناسه‌ی پست‌ها/صفحاتی که کاربر ویرایشگر
+    آنهاست فقط یک بار (و در اولین استفاده) خوانده می‌شوند و همه‌ی بررسی‌های
+    بعدی از حافظه پاسخ داده می‌شوند.
+    """
+
+    def __init__(self, user):
+        self.user = user
+        self.is_authenticated = user.is_authenticated
+        self.is_superuser = self.is_authenticated and user.is_superuser
+
+    @cached_property
+    def group_names(self):
+        if not self.is_authenticated:
+            return frozenset()
+        return frozenset(self.user.groups.values_list('name', flat=True))
+
+    @cached_property
+    def is_content_manager(self):
+        return CONTENT_MANAGERS_GROUP in self.group_names
+
+    @cached_property
+    def user_level(self):
+        if not self.is_authenticated:
+            return None
+        try:
+            return self.user.profile.user_level
+        except ObjectDoesNotExist:
+            return None
+
+    @property
+    def permissions(self):
+        return LEVEL_PERMISSIONS.get(self.user_level, ())
+
+    @cached_property
+    def edited_post_ids(self):
+        """پست‌هایی که کاربر در فهرست ویرایشگران آنهاست"""
+        from blog.models import Post
+
+        if not self.is_authenticated:
+            return frozenset()
+        return frozenset(Post.editors.through.objects.filter(user_id=self.user.pk)
+                         .values_list('post_id', flat=True))
+
+    @cached_property
+    def edited_page_ids(self):
+        """صفحاتی که کاربر در فهرست ویرایشگران آنهاست"""
+        from pages.models import Page
+
+        if not self.is_authenticated:
+            return frozenset()
+        return frozenset(Page.editors.through.objects.filter(user_id=self.user.pk)
+                         .values_list('page_id', flat=True))
+
+    def has_permission(self, codename):
+        return codename in _LEVEL_PERMISSION_SETS.get(self.user_level, ())
+
+    def has_level(self, *levels):
+        return self.user_level in levels
+
+    # پست‌ها
+    def can_edit_post(self, post):
+        if not self.is_authenticated:
+            return False
+        return (self.is_superuser or
+                post.author_id == self.user.pk or
+                post.pk in self.edited_post_ids or
+                self.is_content_manager)
+
+    def can_access_post(self, post):
+        return post.status == 'published' or self.can_edit_post(post)
+
+    def can_delete_post(self, post):
+        if not self.is_authenticated:
+            return False
+        return self.is_superuser or post.author_id == self.user.pk
+
+    # صفحات
+    def can_access_page(self, page):
+        if page.access_level == 'public':
+            return True
+        elif page.access_level == 'private':
+            return self.is_authenticated and self.user.is_staff
+        elif page.access_level == 'premium':
+            return self.is_authenticated and (self.user.is_staff or hasattr(self.user, 'premium_subscription'))
+        return False
+
+    def can_edit_page(self, page):
+        if not self.is_authenticated:
+            return False
+        return (self.is_superuser or
+                page.author_id == self.user.pk or
+                page.pk in self.edited_page_ids)
+
+
+def get_permission_context(user):
+    """زمینه‌ی دسترسی کاربر - روی خود شیء کاربر نگهداری می‌شود تا در طول درخواست مشترک باشد"""
+    context = getattr(user, '_permission_context', None)
+    if context is None:
+        context = PermissionContext(user)
+        try:
+            user._permission_context = context
+        except AttributeError:
+            pass
+    return context
+
+
 def get_user_permissions(user):
     """بررسی دسترسی کاربر بر اساس user_level"""
-    if not hasattr(user, 'profile'):
-        return []
-    
-    user_level = user.profile.user_level
-    
-    if user_level == 'super_admin':
-        return [perm[0] for perm in 
-                CustomPermissions.SUPER_ADMIN_PERMISSIONS +
-                CustomPermissions.TOUR_ADMIN_PERMISSIONS +
-                CustomPermissions.CONTENT_ADMIN_PERMISSIONS]
-    
-    elif user_level == 'admin':
-        return [perm[0] for perm in 
-                CustomPermissions.TOUR_ADMIN_PERMISSIONS +
-                CustomPermissions.CONTENT_ADMIN_PERMISSIONS]
-    
-    elif user_level == 'writer':
-        return [perm[0] for perm in 
-                CustomPermissions.CONTENT_ADMIN_PERMISSIONS]
-    
-    return []
+    return list(get_permission_context(user).permissions)
 
 def user_has_permission(user, permission_codename):
     """بررسی آیا کاربر دسترسی خاصی دارد"""
-    user_permissions = get_user_permissions(user)
-    return permission_codename in user_permissions
\ No newline at end of file
+    return get_permission_context(user).has_permission(permission_codename)
@@ -1,3 +1,95 @@
-from django.test import TestCase
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
-# Create your tests here.
+from .bulk_import import import_users
+from .models import UserProfile
+
+
+class ProfileSaveTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='writer')
+        self.profile = UserProfile.objects.get(user=self.user)
+
+    def test_unchanged_save_skips_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.profile.save()
+        self.assertEqual(len(queries), 0)
+
+    def test_dirty_save_writes_changed_fields_only(self):
+        # تغییر هم‌زمان یک فیلد دیگر نباید با مقدار قدیمی بازنویسی شود
+        UserProfile.objects.filter(pk=self.profile.pk).update(company='other')
+        self.profile.bio = 'bio'
+        with CaptureQueriesContext(connection) as queries:
+            self.profile.save()
+
+        self.assertEqual(len(queries), 1)
+        self.profile.refresh_from_db()
+        self.assertEqual(self.profile.bio, 'bio')
+        self.assertEqual(self.profile.company, 'other')
+
+    def test_update_fields_saves_completion_score(self):
+        self.profile.bio = 'bio'
+        self.profile.job_title = 'job'
+        self.profile.save(update_fields=['bio', 'job_title'])
+
+        stored = UserProfile.objects.values_list('completion_score', flat=True).get(pk=self.profile.pk)
+        self.assertEqual(stored, self.profile.get_profile_completion_percentage())
+        self.assertGreater(stored, 0)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ImportUsersTests(TestCase):
+    def test_imports_users_with_profiles(self):
+        result = import_users([
+            {'username': 'a', 'email': 'a@example.com', 'password': 'secret', 'bio': 'bio'},
+            {'username': 'b', 'password_hash': make_password('hashed')},
+            {'username': 'c'},
+        ])
+
+        self.assertEqual(result, (3, [], []))
+        users = {user.username: user for user in User.objects.select_related('profile')}
+        self.assertTrue(users['a'].check_password('secret'))
+        self.assertTrue(users['b'].check_password('hashed'))
+        self.assertFalse(users['c'].has_usable_password())
+        self.assertEqual(users['a'].profile.bio, 'bio')
+        self.assertEqual(users['a'].profile.completion_score, users['a'].profile.get_profile_completion_percentage())
+
+    def test_skips_duplicate_usernames(self):
+        User.objects.create(username='existing')
+        result = import_users([{'username': 'existing'}, {'username': 'new'}, {'username': 'new'}])
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual(sorted(result.skipped), ['existing', 'new'])
+        self.assertEqual(User.objects.filter(username='new').count(), 1)
+
+    def test_reports_invalid_rows(self):
+        result = import_users([
+            {'username': ''},
+            {'username': 'bad-phone', 'phone_number': 'abc'},
+            {'username': 'bad-hash', 'password_hash': 'plain'},
+            {'username': 'ok'},
+        ])
+
+        self.assertEqual(result.created, 1)
+        self.assertEqual([row for row, _error in result.errors], [1, 2, 3])
+        self.assertIn('password_hash', result.errors[2][1].message_dict)
+        self.assertEqual(list(User.objects.values_list('username', flat=True)), ['ok'])
+
+    def test_batch_boundaries(self):
+        rows = [{'username': f'user{i}'} for i in range(5)]
+        # تکراری در دسته‌ی بعدی و ردیف نامعتبر در دسته‌ی آخر
+        rows.insert(2, {'username': 'user0'})
+        rows.append({'username': ''})
+
+        with CaptureQueriesContext(connection) as queries:
+            result = import_users(rows, batch_size=2)
+
+        self.assertEqual(result.created, 5)
+        self.assertEqual(result.skipped, ['user0'])
+        self.assertEqual([row for row, _error in result.errors], [7])
+        self.assertEqual(UserProfile.objects.filter(user__username__startswith='user').count(), 5)
+        # تعداد کوئری به تعداد دسته‌ها وابسته است، نه تعداد ردیف‌ها
+        self.assertLessEqual(len(queries), 4 * 4)
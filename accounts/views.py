@@ -6,7 +6,7 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
 from django.utils.translation import gettext as _
 from django.http import Http404
-from django.db.models import Sum
+from blog import author_stats
 from blog.models import Post
 
 # اضافه کردن import فرم‌ها
@@ -94,20 +94,19 @@ def profile_view(request, username=None):
     is_own_profile = request.user == profile_user
     
     # دریافت پست‌های کاربر
-    user_posts = Post.objects.filter(author=profile_user, status=1).order_by('-published_date')[:5]
-    user_posts_count = Post.objects.filter(author=profile_user, status=1).count()
+    user_posts = Post.objects.filter(author=profile_user, status='published')\
+        .defer(*Post.LISTING_DEFERRED_FIELDS).order_by('-published_date')[:5]
     
-    # محاسبه آمار فقط برای بازدیدها
-    stats = Post.objects.filter(author=profile_user, status=1).aggregate(
-        total_views=Sum('counted_views')
-    )
+    # آمار نویسنده از کش (blog.author_stats)
+    stats = author_stats.get_stats(profile_user)
     
     context = {
         'profile_user': profile_user,
         'is_own_profile': is_own_profile,
         'user_posts': user_posts,
-        'user_posts_count': user_posts_count,
-        'total_views': stats['total_views'] or 0,
+        'author_stats': stats,
+        'user_posts_count': stats['published_posts'],
+        'total_views': stats['total_views'],
     }
     
     return render(request, 'accounts/profile.html', context)
@@ -154,6 +153,9 @@ def profile_list(request):
         profiles = UserProfile.objects.filter(
             user_level__in=['writer', 'admin']
         ).select_related('user')
+        # ?complete=1: فقط پروفایل‌های کامل، به ترتیب درصد تکمیل
+        if request.GET.get('complete'):
+            profiles = profiles.filter(completion_score__gte=70).order_by('-completion_score', '-created_date')
     except:
         # اگر مدل UserProfile وجود ندارد
         profiles = User.objects.filter(is_staff=True)
@@ -14,13 +14,12 @@ class PostAdmin(SummernoteModelAdmin):
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         # نویسندگان فقط پست‌های خودشان را می‌بینند
-        if hasattr(request.user, 'profile') and request.user.profile.user_level == UserLevel.WRITER:
+        if request.permissions.has_level(UserLevel.WRITER):
             return qs.filter(author=request.user)
         return qs
     
     def get_fieldsets(self, request, obj=None):
-        if request.user.is_superuser or (hasattr(request.user, 'profile') and 
-                                       request.user.profile.user_level in [UserLevel.SUPER_ADMIN, UserLevel.ADMIN]):
+        if request.user.is_superuser or request.permissions.has_level(UserLevel.SUPER_ADMIN, UserLevel.ADMIN):
             # سوپر ادمین و ادمین تور - تمام فیلدها
             return [
                 ('اطلاعات اصلی', {
@@ -49,7 +48,7 @@ class PostAdmin(SummernoteModelAdmin):
         readonly_fields = list(super().get_readonly_fields(request, obj))
         
         # نویسندگان نمی‌توانند author و status را تغییر دهند
-        if hasattr(request.user, 'profile') and request.user.profile.user_level == UserLevel.WRITER:
+        if request.permissions.has_level(UserLevel.WRITER):
             if obj:
                 readonly_fields.extend(['author', 'status', 'published_date'])
             else:
@@ -78,7 +77,7 @@ class PostAdmin(SummernoteModelAdmin):
         return True
     
     def has_change_permission(self, request, obj=None):
-        if obj and hasattr(request.user, 'profile') and request.user.profile.user_level == UserLevel.WRITER:
+        if obj and request.permissions.has_level(UserLevel.WRITER):
             return obj.author == request.user
         return True
     
@@ -87,13 +86,13 @@ class PostAdmin(SummernoteModelAdmin):
         return True
     
     def has_change_permission(self, request, obj=None):
-        if obj and hasattr(request.user, 'profile') and request.user.profile.user_level == UserLevel.WRITER:
+        if obj and request.permissions.has_level(UserLevel.WRITER):
             # نویسندگان فقط می‌توانند پست‌های خودشان را ویرایش کنند
             return obj.author == request.user
         return True
     
     def has_delete_permission(self, request, obj=None):
-        if obj and hasattr(request.user, 'profile') and request.user.profile.user_level == UserLevel.WRITER:
+        if obj and request.permissions.has_level(UserLevel.WRITER):
             # نویسندگان فقط می‌توانند پست‌های خودشان را حذف کنند
             return obj.author == request.user
         return True
@@ -0,0 +1,120 @@
+# blog/author_stats.py
+"""
+آمار نویسندگان (جدول AuthorStats)
+
+تعداد پست‌های منتشر شده، کل بازدیدها، بازدیدهای ۳۰ روز اخیر، تعداد نظرات
+تایید شده و تاریخ آخرین انتشار هر نویسنده در یک ردیف نگهداری می‌شود.
+
+با ذخیره/حذف پست، تغییر نظرات و تخلیه‌ی بازدیدها فقط آمار نویسندگان همان
+پست‌ها بعد از commit دوباره محاسبه می‌شود (دو کوئری تجمیعی روی نمایه‌ها).
+پنجره‌ی ۳۰ روزه با گذر زمان جابه‌جا می‌شود؛ دستور refresh_author_stats
+(به صورت دوره‌ای) همه‌ی ردیف‌ها را دوباره محاسبه می‌کند.
+
+get_stats آمار را از کش می‌خواند و پس از هر محاسبه‌ی دوباره کش جایگزین می‌شود؛
+برای کاربری که ردیف ندارد آمار خالی برمی‌گرداند؛ ردیف‌ها فقط از مسیرهای نوشتن
+(پست، نظر، بازدید) و refresh_author_stats ساخته می‌شوند.
+"""
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+from django.utils import timezone
+
+STATS_TIMEOUT = 60 * 60
+RECENT_DAYS = 30
+FIELDS = ('published_posts', 'total_views', 'views_30d', 'comment_count', 'last_published')
+EMPTY = dict.fromkeys(FIELDS, 0) | {'last_published': None}
+
+
+def _cache_key(author_id):
+    return f'author_stats:{author_id}'
+
+
+def compute(author_ids=None):
+    """محاسبه‌ی آمار نویسندگان از پست‌ها و بازدیدهای ساعتی - {شناسه‌ی نویسنده: آمار}"""
+    from blog.models import Post, PostViewBucket
+
+    posts = Post.objects.filter(status='published', author__isnull=False)
+    buckets = PostViewBucket.objects.filter(
+        post__status='published',
+        hour__gte=timezone.now() - timezone.timedelta(days=RECENT_DAYS),
+    )
+    if author_ids is not None:
+        posts = posts.filter(author_id__in=author_ids)
+        buckets = buckets.filter(post__author_id__in=author_ids)
+
+    stats = {author_id: dict(EMPTY) for author_id in author_ids or ()}
+    for row in posts.order_by().values('author_id').annotate(
+        published_posts=Count('pk'),
+        total_views=Sum('counted_views'),
+        comment_count=Sum('approved_comment_count'),
+        last_published=Max('published_date'),
+    ):
+        author_id = row.pop('author_id')
+        stats[author_id] = dict(EMPTY) | row
+    for author_id, views in buckets.order_by().values('post__author_id')\
+            .annotate(views=Sum('views')).values_list('post__author_id', 'views'):
+        stats.setdefault(author_id, dict(EMPTY))['views_30d'] = views
+    return stats
+
+
+def refresh(author_ids):
+    """محاسبه و ذخیره‌ی دوباره‌ی آمار نویسندگان داده شده"""
+    from blog.models import AuthorStats
+
+    author_ids = {author_id for author_id in author_ids if author_id}
+    if not author_ids:
+        return
+    # نویسندگانی که در این فاصله حذف شده‌اند کنار گذاشته می‌شوند
+    author_ids = set(User.objects.filter(pk__in=author_ids).values_list('pk', flat=True))
+    stats = compute(author_ids)
+    AuthorStats.objects.bulk_create(
+        [AuthorStats(author_id=author_id, **values) for author_id, values in stats.items()],
+        update_conflicts=True, unique_fields=['author'], update_fields=list(FIELDS) + ['updated_date'],
+    )
+    cache.set_many({_cache_key(author_id): values for author_id, values in stats.items()}, STATS_TIMEOUT)
+
+
+def schedule_refresh(author_ids):
+    author_ids = list(author_ids)
+    transaction.on_commit(lambda: refresh(author_ids))
+
+
+def schedule_for_posts(post_ids):
+    """به‌روزرسانی آمار نویسندگان چند پست پس از commit"""
+    from blog.models import Post
+
+    post_ids = list(post_ids)
+
+    def run():
+        refresh(Post.objects.filter(pk__in=post_ids).values_list('author_id', flat=True).distinct())
+
+    transaction.on_commit(run)
+
+
+def rebuild():
+    """محاسبه‌ی دوباره‌ی آمار همه‌ی نویسندگان - خروجی: تعداد نویسندگان"""
+    from blog.models import AuthorStats
+
+    stats = compute()
+    previous = list(AuthorStats.objects.values_list('pk', flat=True))
+    with transaction.atomic():
+        AuthorStats.objects.all().delete()
+        AuthorStats.objects.bulk_create(
+            [AuthorStats(author_id=author_id, **values) for author_id, values in stats.items()],
+            batch_size=1000,
+        )
+    cache.delete_many([_cache_key(author_id) for author_id in set(previous) | set(stats)])
+    return len(stats)
+
+
+def get_stats(author):
+    """آمار یک نویسنده به صورت دیکشنری (کش، سپس جدول) - خواندن ردیفی نمی‌سازد"""
+    from blog.models import AuthorStats
+
+    author_id = getattr(author, 'pk', author)
+    stats = cache.get(_cache_key(author_id))
+    if stats is None:
+        stats = AuthorStats.objects.filter(author_id=author_id).values(*FIELDS).first() or dict(EMPTY)
+        cache.set(_cache_key(author_id), stats, STATS_TIMEOUT)
+    return stats
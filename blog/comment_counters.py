@@ -0,0 +1,66 @@
+# blog/comment_counters.py
+"""
+شمارنده‌های نظرات تایید شده‌ی پست‌ها
+
+approved_comment_count و last_comment_at روی Post با یک UPDATE اتمیک
+به‌روزرسانی می‌شوند تا فهرست پست‌ها برای نمایش تعداد نظرات به هیچ کوئری
+اضافه‌ای نیاز نداشته باشد.
+"""
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def _last_comment_subquery():
+    from blog.models import Comment
+
+    return Subquery(
+        Comment.objects.filter(post=OuterRef('pk'), approved=True)
+        .order_by('-created_date').values('created_date')[:1]
+    )
+
+
+def _count_subquery():
+    from blog.models import Comment
+
+    return Coalesce(Subquery(
+        Comment.objects.filter(post=OuterRef('pk'), approved=True)
+        .order_by().values('post').annotate(c=Count('pk')).values('c')
+    ), 0)
+
+
+def apply_delta(post_id, delta):
+    """تغییر شمارنده‌ی یک پست به اندازه‌ی delta و محاسبه‌ی تاریخ آخرین نظر"""
+    from blog.models import Post
+
+    if not post_id or not delta:
+        return
+    Post.objects.filter(pk=post_id).update(
+        approved_comment_count=F('approved_comment_count') + delta,
+        last_comment_at=_last_comment_subquery(),
+    )
+
+
+def drifted_posts():
+    """پست‌هایی که شمارنده‌ی آنها با تعداد واقعی نظرات یکسان نیست"""
+    from blog.models import Post
+
+    return Post.objects.annotate(actual_count=_count_subquery())\
+        .exclude(approved_comment_count=F('actual_count'))
+
+
+def reconcile(chunk_size=1000, dry_run=False):
+    """اصلاح گروهی شمارنده‌ها - خروجی: تعداد پست‌های اصلاح شده"""
+    from blog import author_stats
+    from blog.models import Post
+
+    post_ids = list(drifted_posts().values_list('pk', flat=True))
+    if dry_run:
+        return len(post_ids)
+
+    for start in range(0, len(post_ids), chunk_size):
+        Post.objects.filter(pk__in=post_ids[start:start + chunk_size]).update(
+            approved_comment_count=_count_subquery(),
+            last_comment_at=_last_comment_subquery(),
+        )
+    author_stats.schedule_for_posts(post_ids)
+    return len(post_ids)
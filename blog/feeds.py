@@ -1,35 +1,146 @@
+import gzip
+import hashlib
+import re
+from collections import namedtuple
+
 from django.contrib.syndication.views import Feed
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_vary_headers
 from django.utils.feedgenerator import Atom1Feed
-from blog.models import Post
+from django.utils.http import http_date
+from website import fragment_cache
+from blog.models import Post, Category
+from blog.pagination import CursorPaginator
+
+FEED_SIZE = 20
+FEED_CACHE_TIMEOUT = 60 * 60
+
+_accepts_gzip = re.compile(r'\bgzip\b')
+
+# محدوده‌ی فید: همه‌ی پست‌ها، یک دسته‌بندی یا یک تگ
+FeedScope = namedtuple('FeedScope', ['key', 'filters', 'after', 'title', 'link'])
+
+
+class CachedFeed(Feed):
+    """
+    فید با پاسخ شرطی (304) و خروجی از پیش رندر و فشرده شده
+
+    اعتبارسنج فید (ETag/Last-Modified) از بیشترین updated_date و تعداد پست‌های
+    فید با یک کوئری تجمیعی ساخته می‌شود. خروجی کامل به صورت gzip زیر کلیدی
+    وابسته به همین اعتبارسنج در کش نگهداری می‌شود؛ بنابراین انتشار یا ویرایش
+    پست، کش را به طور خودکار نامعتبر می‌کند.
+    """
+
+    def get_validator(self, scope):
+        agg = Post.objects.filter(status='published', **scope.filters)\
+            .aggregate(last=Max('updated_date'), count=Count('pk'))
+        # تغییر تگ/دسته‌بندی‌ها تاریخ پست را عوض نمی‌کند؛ نسل پست‌ها هم در نظر گرفته می‌شود
+        generation = fragment_cache.get_generations([Post._meta.label_lower])[0]
+        raw = f"{self.__class__.__name__}|{scope.key}|{scope.after}|{agg['last']}|{agg['count']}|{generation}"
+        return f'"{hashlib.md5(raw.encode()).hexdigest()}"', agg['last']
+
+    def __call__(self, request, *args, **kwargs):
+        scope = self.get_object(request, *args, **kwargs)
+        etag, last_modified = self.get_validator(scope)
+        timestamp = int(last_modified.timestamp()) if last_modified else None
 
-class LatestEntriesFeed(Feed):
-    title = "Blog Newest Posts"
-    link = "/rss/feed"
-    description = "Latest posts from our blog" 
+        response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+        if response is None:
+            key = f'blog_feed:{etag.strip(chr(34))}'
+            cached = cache.get(key)
+            if cached is None:
+                rendered = super().__call__(request, *args, **kwargs)
+                cached = (rendered['Content-Type'], gzip.compress(rendered.content, mtime=0))
+                cache.set(key, cached, FEED_CACHE_TIMEOUT)
+
+            content_type, body = cached
+            if _accepts_gzip.search(request.headers.get('Accept-Encoding', '')):
+                response = HttpResponse(body, content_type=content_type)
+                response['Content-Encoding'] = 'gzip'
+            else:
+                response = HttpResponse(gzip.decompress(body), content_type=content_type)
+
+        # پاسخ 304 هم باید Vary داشته باشد تا کش‌های میانی نسخه‌ی gzip و ساده را جدا نگه دارند
+        patch_vary_headers(response, ['Accept-Encoding'])
+        response['ETag'] = etag
+        if timestamp:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+class LatestEntriesFeed(CachedFeed):
+    description = "Latest posts from our blog"
     description_template = "feeds/post-content.html"
-    
-    def items(self):
-        # ✅ اصلاح شده: استفاده از status='published'
-        return Post.objects.filter(
-            status='published'
-        ).select_related('author').prefetch_related('categories', 'tags')[:20]
-    
+
+    def get_object(self, request, *args, **kwargs):
+        # توکن صفحه‌بندی کلیدی (?after=) برای خواندن صفحات قدیمی‌تر فید
+        return FeedScope('latest', {}, request.GET.get('after'), "Blog Newest Posts", "/rss/feed")
+
+    def title(self, scope):
+        return scope.title
+
+    def link(self, scope):
+        return scope.link
+
+    def items(self, scope):
+        posts = Post.objects.filter(
+            status='published', **scope.filters
+        ).select_related('author').prefetch_related('categories', 'tags')\
+            .defer(*Post.LISTING_DEFERRED_FIELDS)
+        return CursorPaginator(posts, FEED_SIZE).get_page(after=scope.after).object_list
+
     def item_title(self, item):
         return item.title
-    
+
     def item_link(self, item):
         return reverse('blog:single', args=[item.id])
-    
+
     def item_author_name(self, item):
         return item.author.get_full_name() or item.author.username
-    
+
     def item_pubdate(self, item):
         return item.published_date
-    
+
     def item_updateddate(self, item):
         return item.updated_date
 
 class AtomSiteNewsFeed(LatestEntriesFeed):
     feed_type = Atom1Feed
-    subtitle = LatestEntriesFeed.description
\ No newline at end of file
+    subtitle = LatestEntriesFeed.description
+
+
+class CategoryFeed(LatestEntriesFeed):
+    """فید پست‌های یک دسته‌بندی"""
+
+    def get_object(self, request, cat_name):
+        # نام دسته‌بندی یکتا نیست؛ با چند دسته‌ی هم‌نام اولین آن‌ها استفاده می‌شود
+        category = Category.objects.filter(name=cat_name).order_by('pk').first()
+        if category is None:
+            raise Http404
+        return FeedScope(
+            f'category:{category.pk}', {'categories': category}, request.GET.get('after'),
+            f"Blog Posts in {category.name}", category.get_absolute_url(),
+        )
+
+
+class TagFeed(LatestEntriesFeed):
+    """فید پست‌های یک تگ"""
+
+    def get_object(self, request, tag_name):
+        return FeedScope(
+            f'tag:{tag_name}', {'tags__name': tag_name}, request.GET.get('after'),
+            f"Blog Posts tagged {tag_name}", reverse('blog:tag', kwargs={'tag_name': tag_name}),
+        )
+
+
+class AtomCategoryFeed(CategoryFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestEntriesFeed.description
+
+
+class AtomTagFeed(TagFeed):
+    feed_type = Atom1Feed
+    subtitle = LatestEntriesFeed.description
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'محاسبه‌ی متن ساده، تعداد کلمات، زمان مطالعه و خلاصه برای پست‌های موجود'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='تعداد پست‌های پردازش شده در هر مرحله')
+        parser.add_argument('--only-missing', action='store_true',
+                            help='فقط پست‌هایی که هنوز متن ساده ندارند')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        posts = Post.objects.only('pk', 'content').order_by('pk')
+        if options['only_missing']:
+            posts = posts.filter(plain_text='')
+
+        updated = 0
+        last_pk = 0
+        while True:
+            chunk = list(posts.filter(pk__gt=last_pk)[:chunk_size])
+            if not chunk:
+                break
+            for post in chunk:
+                post.update_text_fields()
+            # bulk_update سیگنال و updated_date را تغییر نمی‌دهد
+            with transaction.atomic():
+                Post.objects.bulk_update(chunk, Post.TEXT_FIELDS)
+            updated += len(chunk)
+            last_pk = chunk[-1].pk
+            self.stdout.write(f'{updated} پست به‌روزرسانی شد')
+
+        self.stdout.write(self.style.SUCCESS(f'متن ساده‌ی {updated} پست محاسبه شد'))
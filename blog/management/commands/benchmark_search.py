@@ -0,0 +1,81 @@
+import itertools
+import random
+import statistics
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from blog import search
+from blog.models import Post, PostSearchDocument, PostSearchTerm
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'سنجش زمان جستجو روی نمایه‌ی مصنوعی (داده‌ها در پایان برگردانده می‌شوند)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100000, help='تعداد پست‌های مصنوعی')
+        parser.add_argument('--terms', type=int, default=40, help='تعداد واژه‌ی هر پست')
+        parser.add_argument('--vocabulary', type=int, default=20000, help='تعداد واژه‌های متمایز')
+        parser.add_argument('--queries', type=int, default=50, help='تعداد جستجو برای هر گروه')
+
+    def populate(self, options):
+        rng = random.Random(1)
+        vocabulary = [f'w{i}' for i in range(options['vocabulary'])]
+        # توزیع Zipf: واژه‌های ابتدای فهرست بسیار پرتکرارند
+        cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(len(vocabulary))))
+        stamp = int(time.time() * 1000)
+        batch = 2000
+        for start in range(0, options['posts'], batch):
+            posts = Post.objects.bulk_create([
+                Post(title=f'bench {stamp} {i}', content='bench', status='published')
+                for i in range(start, min(start + batch, options['posts']))
+            ])
+            documents = []
+            terms = []
+            for post in posts:
+                words = set(rng.choices(vocabulary, cum_weights=cum_weights, k=options['terms']))
+                frequencies = {word: rng.randint(1, 5) for word in words}
+                documents.append(PostSearchDocument(post=post, length=sum(frequencies.values())))
+                terms.extend(PostSearchTerm(term=word, document_id=post.pk, frequency=frequency)
+                             for word, frequency in frequencies.items())
+            PostSearchDocument.objects.bulk_create(documents)
+            PostSearchTerm.objects.bulk_create(terms, batch_size=5000)
+        return vocabulary
+
+    def measure(self, label, queries):
+        timings = []
+        for query in queries:
+            started = time.perf_counter()
+            search.search(query)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        self.stdout.write(
+            f'{label}: میانه {statistics.median(timings):.1f}ms، '
+            f'p95 {timings[int(len(timings) * 0.95) - 1]:.1f}ms، بیشینه {timings[-1]:.1f}ms'
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(2)
+        count = options['queries']
+        try:
+            with transaction.atomic():
+                started = time.perf_counter()
+                vocabulary = self.populate(options)
+                self.stdout.write(f'ساخت نمایه‌ی {options["posts"]} پست: {time.perf_counter() - started:.1f} ثانیه')
+                cache.delete(search.STATS_CACHE_KEY)
+
+                self.measure('واژه‌ی نادر', [rng.choice(vocabulary[5000:]) for _ in range(count)])
+                self.measure('واژه‌ی میانه', [rng.choice(vocabulary[100:1000]) for _ in range(count)])
+                self.measure('واژه‌ی پرتکرار', [rng.choice(vocabulary[:20]) for _ in range(count)])
+                self.measure('سه واژه', [' '.join(rng.sample(vocabulary[:2000], 3)) for _ in range(count)])
+                raise Rollback
+        except Rollback:
+            pass
+        cache.delete(search.STATS_CACHE_KEY)
+        self.stdout.write(self.style.SUCCESS('سنجش کامل شد؛ داده‌های آزمایشی برگردانده شدند'))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import view_counter
+
+
+class Command(BaseCommand):
+    help = 'ذخیره‌ی بازدیدهای بافر شده‌ی پست‌ها و پاکسازی بازدیدهای ساعتی قدیمی'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', type=int, default=0,
+                            help='اجرای دوره‌ای با فاصله‌ی مشخص (ثانیه)')
+        parser.add_argument('--prune-days', type=int, default=30,
+                            help='حذف بازدیدهای ساعتی قدیمی‌تر از این تعداد روز')
+
+    def handle(self, *args, **options):
+        while True:
+            flushed = view_counter.flush()
+            pruned = view_counter.prune_buckets(days=options['prune_days'])
+            self.stdout.write(self.style.SUCCESS(
+                f'{flushed} بازدید ذخیره شد، {pruned} ردیف ساعتی قدیمی حذف شد'
+            ))
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
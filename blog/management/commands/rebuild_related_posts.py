@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from blog import related
+
+
+class Command(BaseCommand):
+    help = 'محاسبه‌ی کامل گراف پست‌های مرتبط، قبلی و بعدی'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='تعداد پست‌های پردازش شده در هر تراکنش')
+
+    def handle(self, *args, **options):
+        count = related.rebuild(chunk_size=options['chunk_size'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'گراف پست‌های مرتبط برای {count} پست ساخته شد'))
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from blog import search
+
+
+class Command(BaseCommand):
+    help = 'بازسازی کامل نمایه‌ی جستجوی پست‌های بلاگ'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500,
+                            help='تعداد پست‌های پردازش شده در هر مرحله')
+
+    def handle(self, *args, **options):
+        indexed = search.rebuild_index(chunk_size=options['chunk_size'], stdout=self.stdout)
+        self.stdout.write(self.style.SUCCESS(f'نمایه‌ی جستجو با {indexed} پست بازسازی شد'))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from blog import comment_counters
+
+
+class Command(BaseCommand):
+    help = 'اصلاح شمارنده‌ی نظرات تایید شده‌ی پست‌ها'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='تعداد پست‌های اصلاح شده در هر UPDATE')
+        parser.add_argument('--dry-run', action='store_true',
+                            help='فقط گزارش تعداد پست‌های ناهماهنگ')
+
+    def handle(self, *args, **options):
+        count = comment_counters.reconcile(chunk_size=options['chunk_size'], dry_run=options['dry_run'])
+        if options['dry_run']:
+            self.stdout.write(f'{count} پست شمارنده‌ی ناهماهنگ دارند')
+        else:
+            self.stdout.write(self.style.SUCCESS(f'شمارنده‌ی {count} پست اصلاح شد'))
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from blog import author_stats
+
+
+class Command(BaseCommand):
+    help = 'محاسبه‌ی دوباره‌ی آمار همه‌ی نویسندگان (از جمله پنجره‌ی بازدیدهای ۳۰ روز اخیر)'
+
+    def handle(self, *args, **options):
+        authors = author_stats.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'آمار {authors} نویسنده به‌روز شد'))
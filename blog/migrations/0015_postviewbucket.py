@@ -0,0 +1,29 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0014_post_approved_by_post_approved_date_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostViewBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='ساعت')),
+                ('views', models.PositiveIntegerField(default=0, verbose_name='بازدیدها')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_buckets', to='blog.post', verbose_name='پست')),
+            ],
+            options={
+                'verbose_name': 'بازدید ساعتی',
+                'verbose_name_plural': 'بازدیدهای ساعتی',
+                'indexes': [models.Index(fields=['hour', 'post'], name='blog_postvi_hour_96f69d_idx')],
+                'unique_together': {('post', 'hour')},
+            },
+        ),
+    ]
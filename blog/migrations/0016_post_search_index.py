@@ -0,0 +1,40 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0015_postviewbucket'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostSearchDocument',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='blog.post', verbose_name='پست')),
+                ('length', models.PositiveIntegerField(default=0, verbose_name='طول سند')),
+                ('indexed_date', models.DateTimeField(auto_now=True, verbose_name='تاریخ نمایه\u200cسازی')),
+            ],
+            options={
+                'verbose_name': 'سند جستجو',
+                'verbose_name_plural': 'اسناد جستجو',
+            },
+        ),
+        migrations.CreateModel(
+            name='PostSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, verbose_name='واژه')),
+                ('frequency', models.PositiveIntegerField(default=1, verbose_name='تکرار')),
+                ('document', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terms', to='blog.postsearchdocument', verbose_name='سند')),
+            ],
+            options={
+                'verbose_name': 'واژه\u200cی نمایه',
+                'verbose_name_plural': 'واژه\u200cهای نمایه',
+                'unique_together': {('term', 'document')},
+            },
+        ),
+    ]
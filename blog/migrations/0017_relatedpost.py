@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:41
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_post_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='postsearchdocument',
+            name='top_terms',
+            field=models.JSONField(blank=True, default=dict, verbose_name='واژه\u200cهای پرتکرار'),
+        ),
+        migrations.CreateModel(
+            name='RelatedPost',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('related', 'مرتبط'), ('previous', 'قبلی'), ('next', 'بعدی')], default='related', max_length=10, verbose_name='نوع')),
+                ('score', models.FloatField(default=0, verbose_name='امتیاز')),
+                ('rank', models.PositiveSmallIntegerField(default=0, verbose_name='رتبه')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_links', to='blog.post', verbose_name='پست')),
+                ('related', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.post', verbose_name='پست مرتبط')),
+            ],
+            options={
+                'verbose_name': 'پست مرتبط',
+                'verbose_name_plural': 'پست\u200cهای مرتبط',
+                'ordering': ['kind', 'rank'],
+                'indexes': [models.Index(fields=['post', 'kind', 'rank'], name='blog_relate_post_id_6d81ff_idx'), models.Index(fields=['related', 'kind'], name='blog_relate_related_d1b084_idx')],
+                'unique_together': {('post', 'kind', 'related')},
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:43
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_comment_counters(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    Comment = apps.get_model('blog', 'Comment')
+    approved = Comment.objects.filter(post=OuterRef('pk'), approved=True)
+    Post.objects.update(
+        approved_comment_count=Coalesce(Subquery(
+            approved.order_by().values('post').annotate(c=Count('pk')).values('c')
+        ), 0),
+        last_comment_at=Subquery(approved.order_by('-created_date').values('created_date')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_relatedpost'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='approved_comment_count',
+            field=models.PositiveIntegerField(default=0, verbose_name='تعداد نظرات تایید شده'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='last_comment_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='تاریخ آخرین نظر'),
+        ),
+        migrations.RunPython(populate_comment_counters, migrations.RunPython.noop),
+    ]
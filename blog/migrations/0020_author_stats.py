@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:17
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('blog', '0019_post_text_fields'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuthorStats',
+            fields=[
+                ('author', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='author_stats', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='نویسنده')),
+                ('published_posts', models.PositiveIntegerField(default=0, verbose_name='پست\u200cهای منتشر شده')),
+                ('total_views', models.PositiveIntegerField(default=0, verbose_name='کل بازدیدها')),
+                ('views_30d', models.PositiveIntegerField(default=0, verbose_name='بازدیدهای ۳۰ روز اخیر')),
+                ('comment_count', models.PositiveIntegerField(default=0, verbose_name='نظرات تایید شده')),
+                ('last_published', models.DateTimeField(blank=True, null=True, verbose_name='آخرین انتشار')),
+                ('updated_date', models.DateTimeField(auto_now=True, verbose_name='تاریخ بروزرسانی')),
+            ],
+            options={
+                'verbose_name': 'آمار نویسنده',
+                'verbose_name_plural': 'آمار نویسندگان',
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0020_author_stats'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='relatedpost',
+            name='kind',
+            field=models.CharField(choices=[('related', 'مرتبط'), ('previous', 'قبلی'), ('next', 'بعدی'), ('built', 'ساخته شده')], default='related', max_length=10, verbose_name='نوع'),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0021_related_built_marker'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PendingPostView',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField(verbose_name='ساعت')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='blog.post', verbose_name='پست')),
+            ],
+            options={
+                'verbose_name': 'بازدید در صف',
+                'verbose_name_plural': 'بازدیدهای در صف',
+                'indexes': [models.Index(fields=['post', 'hour'], name='blog_pendin_post_id_439770_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.7 on 2026-10-18 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0022_pendingpostview'),
+        ('taggit', '0006_rename_taggeditem_content_type_object_id_taggit_tagg_content_8fc721_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['status', 'published_date', 'id'], name='blog_post_status_3335c2_idx'),
+        ),
+        migrations.RemoveIndex(
+            model_name='post',
+            name='blog_post_status_d653ee_idx',
+        ),
+    ]
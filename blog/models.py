@@ -6,8 +6,27 @@ from taggit.models import TaggedItemBase
 from django.utils.html import strip_tags
 from django.utils.text import Truncator
 from django.utils import timezone
+from django.db.models import Sum
+from django.db.models.functions import Coalesce
+from accounts.permissions import get_permission_context
+from django.conf import settings
+import html
+import math
+import re
 import os
 
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def html_to_text(content):
+    """تبدیل محتوای HTML به متن ساده با فاصله‌های یکسان"""
+    if not content:
+        return ''
+    # فاصله قبل از هر تگ تا کلمات بندهای مجاور به هم نچسبند
+    text = html.unescape(strip_tags(content.replace('<', ' <'))).replace('\xa0', ' ')
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
 class Category(models.Model):
     name = models.CharField(max_length=150)
     
@@ -70,11 +89,27 @@ class Post(models.Model):
                                    related_name='approved_posts', verbose_name='تایید شده توسط')
     approved_date = models.DateTimeField(null=True, blank=True, verbose_name='تاریخ تایید')
     
+    # متن ساده و خلاصه‌ی محتوا (هنگام ذخیره محاسبه می‌شوند)
+    plain_text = models.TextField(blank=True, editable=False, verbose_name='متن ساده')
+    word_count = models.PositiveIntegerField(default=0, editable=False, verbose_name='تعداد کلمات')
+    reading_time = models.PositiveIntegerField(default=0, editable=False, verbose_name='زمان مطالعه (دقیقه)')
+    excerpt_text = models.CharField(max_length=500, blank=True, editable=False, verbose_name='خلاصه')
+    
+    # شمارنده‌های نظرات (توسط سیگنال‌ها نگهداری می‌شوند)
+    approved_comment_count = models.PositiveIntegerField(default=0, verbose_name='تعداد نظرات تایید شده')
+    last_comment_at = models.DateTimeField(null=True, blank=True, verbose_name='تاریخ آخرین نظر')
+    
+    # ستون‌های سنگینی که در فهرست‌ها و کارت‌ها لازم نیستند
+    LISTING_DEFERRED_FIELDS = ('content', 'plain_text')
+    TEXT_FIELDS = ('plain_text', 'word_count', 'reading_time', 'excerpt_text')
+    EXCERPT_WORDS = 25
+    
     class Meta:
         ordering = ['-created_date']
         verbose_name_plural = 'پست ها'
         indexes = [
-            models.Index(fields=['status', 'published_date']),
+            # ترتیب صفحه‌بندی کلیدی (published_date, id) - پیشوند status برای فیلتر انتشار
+            models.Index(fields=['status', 'published_date', 'id']),
             models.Index(fields=['author', 'created_date']),
         ]
     
@@ -91,56 +126,61 @@ class Post(models.Model):
         if self.status == 'published' and not self.approved_by:
             self.approved_by = self.author
             self.approved_date = timezone.now()
+        
+        # متن ساده فقط وقتی محتوا ذخیره می‌شود دوباره محاسبه شود
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None:
+            self.update_text_fields()
+        elif 'content' in update_fields:
+            self.update_text_fields()
+            kwargs['update_fields'] = set(update_fields) | set(self.TEXT_FIELDS)
             
         super().save(*args, **kwargs)
     
+    def update_text_fields(self):
+        """محاسبه‌ی متن ساده، تعداد کلمات، زمان مطالعه و خلاصه از محتوای HTML"""
+        self.plain_text = html_to_text(self.content)
+        self.word_count = len(self.plain_text.split())
+        words_per_minute = getattr(settings, 'BLOG_READING_WORDS_PER_MINUTE', 200)
+        self.reading_time = math.ceil(self.word_count / words_per_minute) if self.word_count else 0
+        self.excerpt_text = Truncator(self.plain_text).words(self.EXCERPT_WORDS)[:500]
+    
     def get_absolute_url(self):
         return reverse('blog:single', kwargs={'pid': self.id})
     
-    def excerpt(self, words=25):
-        plain_text = strip_tags(self.content)
-        return Truncator(plain_text).words(words)
+    def excerpt(self, words=EXCERPT_WORDS):
+        if words == self.EXCERPT_WORDS and self.excerpt_text:
+            return self.excerpt_text
+        # پست‌هایی که هنوز backfill نشده‌اند از محتوای اصلی محاسبه می‌شوند
+        return Truncator(self.plain_text or html_to_text(self.content)).words(words)
     
     def excerpt_chars(self, chars=100):
-        plain_text = strip_tags(self.content)
+        plain_text = self.plain_text or html_to_text(self.content)
         if len(plain_text) > chars:
             return plain_text[:chars] + '...'
         return plain_text
     
     def comments_count(self):
-        return self.comments.filter(approved=True).count()
+        return self.approved_comment_count
     
     def is_accessible_by(self, user):
         """بررسی دسترسی کاربر به پست"""
-        if self.status == 'published':
-            return True
-        if user.is_authenticated:
-            return (user.is_superuser or 
-                   user == self.author or 
-                   user in self.editors.all() or
-                   user.groups.filter(name='Content Managers').exists())
-        return False
+        return get_permission_context(user).can_access_post(self)
     
     def can_edit(self, user):
         """بررسی امکان ویرایش پست توسط کاربر"""
-        if not user.is_authenticated:
-            return False
-        return (user.is_superuser or 
-               user == self.author or 
-               user in self.editors.all() or
-               user.groups.filter(name='Content Managers').exists())
+        return get_permission_context(user).can_edit_post(self)
     
     def can_delete(self, user):
         """بررسی امکان حذف پست توسط کاربر"""
-        if not user.is_authenticated:
-            return False
-        return user.is_superuser or user == self.author
+        return get_permission_context(user).can_delete_post(self)
     
     @classmethod
     def get_accessible_posts(cls, user):
         """دریافت پست‌های قابل دسترسی برای کاربر"""
-        if user.is_authenticated:
-            if user.is_superuser or user.groups.filter(name='Content Managers').exists():
+        permissions = get_permission_context(user)
+        if permissions.is_authenticated:
+            if permissions.is_superuser or permissions.is_content_manager:
                 return cls.objects.all()
             return cls.objects.filter(
                 models.Q(status='published') |
@@ -150,13 +190,111 @@ class Post(models.Model):
         return cls.objects.filter(status='published')
     
     @classmethod
-    def get_featured_posts(cls, limit=5):
-        return cls.objects.filter(status='published').order_by('-counted_views')[:limit]
+    def get_featured_posts(cls, limit=5, hours=72):
+        """پست‌های پربازدید بر اساس بازدیدهای ساعت‌های اخیر"""
+        since = timezone.now() - timezone.timedelta(hours=hours)
+        return cls.objects.filter(status='published').annotate(
+            recent_views=Coalesce(
+                Sum('view_buckets__views', filter=models.Q(view_buckets__hour__gte=since)),
+                0
+            )
+        ).order_by('-recent_views', '-counted_views')[:limit]
     
     @classmethod
     def get_recent_posts(cls, limit=5):
         return cls.objects.filter(status='published').order_by('-published_date')[:limit]
 
+class PostViewBucket(models.Model):
+    """تعداد بازدیدهای هر پست در هر ساعت"""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='view_buckets', verbose_name='پست')
+    hour = models.DateTimeField(verbose_name='ساعت')
+    views = models.PositiveIntegerField(default=0, verbose_name='بازدیدها')
+
+    class Meta:
+        verbose_name = 'بازدید ساعتی'
+        verbose_name_plural = 'بازدیدهای ساعتی'
+        unique_together = ['post', 'hour']
+        indexes = [
+            models.Index(fields=['hour', 'post']),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} - {self.hour:%Y-%m-%d %H}:00 - {self.views}"
+
+class PendingPostView(models.Model):
+    """بازدیدهای هنوز ذخیره نشده (بافر blog.view_counter؛ فقط درج، بدون قفل ردیف پست)"""
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+', verbose_name='پست')
+    hour = models.DateTimeField(verbose_name='ساعت')
+
+    class Meta:
+        verbose_name = 'بازدید در صف'
+        verbose_name_plural = 'بازدیدهای در صف'
+        indexes = [
+            models.Index(fields=['post', 'hour']),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} - {self.hour:%Y-%m-%d %H}:00"
+
+class PostSearchDocument(models.Model):
+    """سند نمایه‌ی جستجو برای هر پست منتشر شده"""
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True,
+                                related_name='search_document', verbose_name='پست')
+    length = models.PositiveIntegerField(default=0, verbose_name='طول سند')
+    top_terms = models.JSONField(default=dict, blank=True, verbose_name='واژه‌های پرتکرار')
+    indexed_date = models.DateTimeField(auto_now=True, verbose_name='تاریخ نمایه‌سازی')
+
+    class Meta:
+        verbose_name = 'سند جستجو'
+        verbose_name_plural = 'اسناد جستجو'
+
+    def __str__(self):
+        return f"{self.post_id} - {self.length}"
+
+class PostSearchTerm(models.Model):
+    """نمایه‌ی معکوس: تعداد تکرار (وزن‌دار) هر واژه در هر سند"""
+    term = models.CharField(max_length=64, verbose_name='واژه')
+    document = models.ForeignKey(PostSearchDocument, on_delete=models.CASCADE,
+                                 related_name='terms', verbose_name='سند')
+    frequency = models.PositiveIntegerField(default=1, verbose_name='تکرار')
+
+    class Meta:
+        verbose_name = 'واژه‌ی نمایه'
+        verbose_name_plural = 'واژه‌های نمایه'
+        unique_together = ['term', 'document']
+
+    def __str__(self):
+        return f"{self.term} - {self.document_id} ({self.frequency})"
+
+class RelatedPost(models.Model):
+    """گراف از پیش محاسبه شده‌ی پست‌های مرتبط، قبلی و بعدی"""
+    KIND_CHOICES = [
+        ('related', 'مرتبط'),
+        ('previous', 'قبلی'),
+        ('next', 'بعدی'),
+        # ردیف نشانه (پست به خودش): گراف ساخته شده، حتی اگر پست مرتبطی نداشته باشد
+        ('built', 'ساخته شده'),
+    ]
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='related_links', verbose_name='پست')
+    related = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='+', verbose_name='پست مرتبط')
+    kind = models.CharField(max_length=10, choices=KIND_CHOICES, default='related', verbose_name='نوع')
+    score = models.FloatField(default=0, verbose_name='امتیاز')
+    rank = models.PositiveSmallIntegerField(default=0, verbose_name='رتبه')
+
+    class Meta:
+        verbose_name = 'پست مرتبط'
+        verbose_name_plural = 'پست‌های مرتبط'
+        ordering = ['kind', 'rank']
+        unique_together = ['post', 'kind', 'related']
+        indexes = [
+            models.Index(fields=['post', 'kind', 'rank']),
+            models.Index(fields=['related', 'kind']),
+        ]
+
+    def __str__(self):
+        return f"{self.post_id} -> {self.related_id} ({self.kind})"
+
 class Comment(models.Model):
     post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='comments', verbose_name='پست')
     name = models.CharField(max_length=255, verbose_name='نام')
@@ -182,4 +320,22 @@ class Comment(models.Model):
     def get_short_message(self):
         if len(self.message) > 50:
             return self.message[:50] + "..."
-        return self.message
\ No newline at end of file
+        return self.message
+
+class AuthorStats(models.Model):
+    """آمار هر نویسنده (توسط blog.author_stats نگهداری می‌شود)"""
+    author = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True,
+                                  related_name='author_stats', verbose_name='نویسنده')
+    published_posts = models.PositiveIntegerField(default=0, verbose_name='پست‌های منتشر شده')
+    total_views = models.PositiveIntegerField(default=0, verbose_name='کل بازدیدها')
+    views_30d = models.PositiveIntegerField(default=0, verbose_name='بازدیدهای ۳۰ روز اخیر')
+    comment_count = models.PositiveIntegerField(default=0, verbose_name='نظرات تایید شده')
+    last_published = models.DateTimeField(null=True, blank=True, verbose_name='آخرین انتشار')
+    updated_date = models.DateTimeField(auto_now=True, verbose_name='تاریخ بروزرسانی')
+
+    class Meta:
+        verbose_name = 'آمار نویسنده'
+        verbose_name_plural = 'آمار نویسندگان'
+
+    def __str__(self):
+        return f"{self.author_id} - {self.published_posts} پست"
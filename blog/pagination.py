@@ -0,0 +1,129 @@
+# blog/pagination.py
+"""
+صفحه‌بندی کلیدی (cursor/keyset) برای فهرست پست‌ها
+
+به جای COUNT و OFFSET، هر صفحه با شرط روی (published_date, id) آخرین
+آیتم صفحه‌ی قبل خوانده می‌شود؛ بنابراین هزینه‌ی صفحات عمیق هم ثابت است.
+توکن‌های next/prev برای کاربر مات (opaque) هستند.
+"""
+import base64
+import binascii
+import hashlib
+
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from website import fragment_cache
+
+APPROX_TOTAL_TIMEOUT = 600
+# انتشار، حذف یا تغییر دسته/برچسب پست‌ها نسل این برچسب‌ها را بالا می‌برد (blog/signals.py)
+APPROX_TOTAL_DEPENDS_ON = ('blog.post', 'blog.taggedpost')
+
+
+def encode_cursor(post):
+    raw = f'{post.published_date.isoformat()}|{post.pk}'
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """تبدیل توکن به (published_date, id) - توکن نامعتبر: None"""
+    if not token:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)).decode()
+        published, pk = raw.rsplit('|', 1)
+        published = parse_datetime(published)
+        if published is None:
+            return None
+        return published, int(pk)
+    except (ValueError, UnicodeDecodeError, binascii.Error):
+        return None
+
+
+class CursorPage:
+    """یک صفحه از نتایج صفحه‌بندی کلیدی"""
+    is_cursor_page = True
+
+    def __init__(self, object_list, has_next, has_previous, approx_total=None):
+        self.object_list = object_list
+        self.has_next = has_next
+        self.has_previous = has_previous
+        self.approx_total = approx_total
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    @property
+    def next_cursor(self):
+        if self.has_next and self.object_list:
+            return encode_cursor(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous and self.object_list:
+            return encode_cursor(self.object_list[0])
+        return None
+
+
+class CursorPaginator:
+    """صفحه‌بندی نزولی روی (published_date, id)"""
+
+    def __init__(self, queryset, per_page, total_cache_key=None):
+        self.queryset = queryset.filter(published_date__isnull=False)
+        self.per_page = per_page
+        self.total_cache_key = total_cache_key
+
+    def approx_total(self):
+        """تعداد تقریبی کل (از کش) - فقط در صورت تعیین کلید کش"""
+        if not self.total_cache_key:
+            return None
+        # نسل پست‌ها در کلید است؛ با هر تغییر پست‌ها شمارش قبلی کنار گذاشته می‌شود
+        generations = '.'.join(str(g) for g in fragment_cache.get_generations(APPROX_TOTAL_DEPENDS_ON))
+        key = 'blog_listing_total:{}:{}'.format(
+            hashlib.md5(self.total_cache_key.encode()).hexdigest(), generations
+        )
+        return cache.get_or_set(key, self.queryset.order_by().count, APPROX_TOTAL_TIMEOUT)
+
+    def get_page(self, after=None, before=None):
+        after = decode_cursor(after)
+        before = decode_cursor(before) if not after else None
+
+        if before:
+            published, pk = before
+            rows = list(
+                self.queryset.filter(
+                    Q(published_date__gt=published) |
+                    Q(published_date=published, pk__gt=pk)
+                ).order_by('published_date', 'pk')[:self.per_page + 1]
+            )
+            has_previous = len(rows) > self.per_page
+            if not has_previous:
+                # به ابتدای فهرست رسیده‌ایم؛ صفحه‌ی اول کامل نمایش داده شود
+                return self.get_page()
+            object_list = rows[:self.per_page][::-1]
+            has_next = True
+        else:
+            queryset = self.queryset
+            if after:
+                published, pk = after
+                queryset = queryset.filter(
+                    Q(published_date__lt=published) |
+                    Q(published_date=published, pk__lt=pk)
+                )
+            rows = list(queryset.order_by('-published_date', '-pk')[:self.per_page + 1])
+            has_next = len(rows) > self.per_page
+            object_list = rows[:self.per_page]
+            has_previous = after is not None
+
+        return CursorPage(object_list, has_next, has_previous, self.approx_total())
+
+    def get_page_from_request(self, request):
+        return self.get_page(after=request.GET.get('after'), before=request.GET.get('before'))
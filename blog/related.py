@@ -0,0 +1,318 @@
+# blog/related.py
+"""
+موتور پست‌های مرتبط
+
+برای هر پست منتشر شده، پست‌های مرتبط بر اساس ترکیب دو معیار امتیازدهی و
+k مورد برتر در جدول RelatedPost ذخیره می‌شوند:
+  - شباهت جاکارد وزن‌دار تگ‌ها و دسته‌بندی‌ها
+  - شباهت کسینوسی TF-IDF محتوا (از واژه‌های نمایه‌ی جستجو)
+پست قبلی و بعدی هم در همین جدول نگهداری می‌شوند تا صفحه‌ی تک پست همه را با
+یک کوئری بخواند. ردیف نشانه‌ی «built» (پست به خودش) یعنی گراف پست ساخته شده
+است، حتی اگر پست مرتبطی نداشته باشد.
+"""
+import math
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from blog import search
+
+TOP_K = 4
+
+TAG_WEIGHT = 1.0
+CATEGORY_WEIGHT = 0.5
+
+TAXONOMY_SCORE_WEIGHT = 0.5
+CONTENT_SCORE_WEIGHT = 0.5
+
+# تعداد واژه‌های کمیاب هر پست که برای یافتن نامزدها استفاده می‌شوند
+CANDIDATE_TERMS = 10
+MAX_CANDIDATES = 100
+
+
+def _taxonomy(post_ids):
+    """تگ‌ها و دسته‌بندی‌های مجموعه‌ای از پست‌ها"""
+    from blog.models import Post, TaggedPost
+
+    features = {post_id: {} for post_id in post_ids}
+    for post_id, tag_id in TaggedPost.objects.filter(content_object_id__in=post_ids)\
+            .values_list('content_object_id', 'tag_id'):
+        features[post_id][('tag', tag_id)] = TAG_WEIGHT
+    for post_id, category_id in Post.categories.through.objects.filter(post_id__in=post_ids)\
+            .values_list('post_id', 'category_id'):
+        features[post_id][('category', category_id)] = CATEGORY_WEIGHT
+    return features
+
+
+def _weighted_jaccard(a, b):
+    if not a or not b:
+        return 0.0
+    shared = sum(min(a[k], b[k]) for k in a.keys() & b.keys())
+    union = sum(a.values()) + sum(b.values()) - shared
+    return shared / union if union else 0.0
+
+
+def _cosine(a, b):
+    dot = sum(a[t] * b[t] for t in a.keys() & b.keys())
+    if not dot:
+        return 0.0
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+    return dot / norm if norm else 0.0
+
+
+def _taxonomy_candidates(post, features):
+    from blog.models import Post, TaggedPost
+
+    tag_ids = [key[1] for key in features if key[0] == 'tag']
+    category_ids = [key[1] for key in features if key[0] == 'category']
+    shared = Counter()
+    if tag_ids:
+        for post_id in TaggedPost.objects.filter(
+                tag_id__in=tag_ids, content_object__status='published'
+        ).exclude(content_object_id=post.pk).values_list('content_object_id', flat=True):
+            shared[post_id] += TAG_WEIGHT
+    if category_ids:
+        for post_id in Post.categories.through.objects.filter(
+                category_id__in=category_ids, post__status='published'
+        ).exclude(post_id=post.pk).values_list('post_id', flat=True):
+            shared[post_id] += CATEGORY_WEIGHT
+    return [post_id for post_id, _ in shared.most_common(MAX_CANDIDATES)]
+
+
+def _content_candidates(post, top_terms, document_frequencies, total_docs):
+    from blog.models import PostSearchTerm
+
+    rare_terms = sorted(
+        (t for t in top_terms if document_frequencies.get(t, 0) <= total_docs * search.COMMON_TERM_RATIO),
+        key=lambda t: document_frequencies.get(t, 0),
+    )[:CANDIDATE_TERMS]
+    if not rare_terms:
+        return []
+    shared = Counter(
+        PostSearchTerm.objects.filter(term__in=rare_terms)
+        .exclude(document_id=post.pk)
+        .values_list('document_id', flat=True)
+    )
+    return [post_id for post_id, _ in shared.most_common(MAX_CANDIDATES)]
+
+
+def _tfidf(top_terms, document_frequencies, total_docs):
+    return {
+        term: freq * math.log((1 + total_docs) / (1 + document_frequencies.get(term, 0)))
+        for term, freq in top_terms.items()
+    }
+
+
+def compute_scores(post):
+    """امتیاز شباهت پست با نامزدهای مرتبط: {post_id: score}"""
+    from blog.models import PostSearchDocument, PostSearchTerm
+
+    features = _taxonomy([post.pk])[post.pk]
+    document = PostSearchDocument.objects.filter(post_id=post.pk).only('top_terms').first()
+    top_terms = document.top_terms if document else {}
+    total_docs = search.get_stats()['count']
+
+    document_frequencies = dict(
+        PostSearchTerm.objects.filter(term__in=list(top_terms))
+        .values_list('term')
+        .annotate(df=Count('pk'))
+        .values_list('term', 'df')
+    ) if top_terms else {}
+
+    candidate_ids = set(_taxonomy_candidates(post, features))
+    candidate_ids.update(_content_candidates(post, top_terms, document_frequencies, total_docs))
+    if not candidate_ids:
+        return {}
+
+    candidate_terms = dict(
+        PostSearchDocument.objects.filter(post_id__in=candidate_ids, post__status='published')
+        .values_list('post_id', 'top_terms')
+    )
+    missing_terms = {t for terms in candidate_terms.values() for t in terms} - document_frequencies.keys()
+    if missing_terms:
+        document_frequencies.update(
+            PostSearchTerm.objects.filter(term__in=list(missing_terms))
+            .values_list('term')
+            .annotate(df=Count('pk'))
+            .values_list('term', 'df')
+        )
+
+    vector = _tfidf(top_terms, document_frequencies, total_docs)
+    candidate_features = _taxonomy(list(candidate_ids))
+
+    scores = {}
+    for candidate_id in candidate_ids:
+        score = (
+            TAXONOMY_SCORE_WEIGHT * _weighted_jaccard(features, candidate_features[candidate_id]) +
+            CONTENT_SCORE_WEIGHT * _cosine(
+                vector, _tfidf(candidate_terms.get(candidate_id, {}), document_frequencies, total_docs)
+            )
+        )
+        if score > 0:
+            scores[candidate_id] = score
+    return scores
+
+
+def _write_related_many(rankings):
+    """ذخیره‌ی k مرتبط برتر چند پست با یک حذف و یک bulk_create - rankings: {post_id: scores}"""
+    from blog.models import RelatedPost
+
+    if not rankings:
+        return
+    rows = []
+    for post_id, scores in rankings.items():
+        top = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:TOP_K]
+        rows.append(RelatedPost(post_id=post_id, related_id=post_id, kind='built'))
+        rows.extend(
+            RelatedPost(post_id=post_id, related_id=related_id, kind='related', score=score, rank=rank)
+            for rank, (related_id, score) in enumerate(top)
+        )
+    RelatedPost.objects.filter(post_id__in=rankings, kind__in=['related', 'built']).delete()
+    RelatedPost.objects.bulk_create(rows, batch_size=1000)
+
+
+def _write_related(post_id, scores):
+    _write_related_many({post_id: scores})
+
+
+def _merge_into(scores, post_id):
+    """افزودن پست به فهرست مرتبط‌های نامزدها در صورت قرارگرفتن در k برتر"""
+    from blog.models import RelatedPost
+
+    current = {}
+    for row in RelatedPost.objects.filter(post_id__in=scores, kind='related')\
+            .values('post_id', 'related_id', 'score'):
+        current.setdefault(row['post_id'], {})[row['related_id']] = row['score']
+
+    changed = {}
+    for other_id, score in scores.items():
+        related = current.get(other_id, {})
+        related.pop(post_id, None)
+        if len(related) >= TOP_K and score <= min(related.values()):
+            continue
+        related[post_id] = score
+        changed[other_id] = related
+    _write_related_many(changed)
+
+
+def refresh_neighbors(post_ids):
+    """محاسبه‌ی مجدد پست قبلی و بعدی برای مجموعه‌ای از پست‌ها"""
+    from blog.models import Post, RelatedPost
+
+    posts = Post.objects.filter(pk__in=post_ids).only('pk', 'status', 'published_date')
+    RelatedPost.objects.filter(post_id__in=post_ids, kind__in=['previous', 'next']).delete()
+
+    rows = []
+    for post in posts:
+        if post.status != 'published' or not post.published_date:
+            continue
+        published = Post.objects.filter(status='published')
+        previous_id = published.filter(published_date__lt=post.published_date)\
+            .order_by('-published_date').values_list('pk', flat=True).first()
+        next_id = published.filter(published_date__gt=post.published_date)\
+            .order_by('published_date').values_list('pk', flat=True).first()
+        if previous_id:
+            rows.append(RelatedPost(post_id=post.pk, related_id=previous_id, kind='previous'))
+        if next_id:
+            rows.append(RelatedPost(post_id=post.pk, related_id=next_id, kind='next'))
+    RelatedPost.objects.bulk_create(rows)
+
+
+def _neighbor_ids(post):
+    from blog.models import Post
+
+    if post.status != 'published' or not post.published_date:
+        return set()
+    published = Post.objects.filter(status='published').exclude(pk=post.pk)
+    ids = {
+        published.filter(published_date__lt=post.published_date)
+        .order_by('-published_date').values_list('pk', flat=True).first(),
+        published.filter(published_date__gt=post.published_date)
+        .order_by('published_date').values_list('pk', flat=True).first(),
+    }
+    ids.discard(None)
+    return ids
+
+
+def refresh_post(post_id):
+    """به‌روزرسانی تدریجی گراف برای یک پست (پس از انتشار یا تغییر تگ/دسته)"""
+    from blog.models import Post, RelatedPost
+
+    post = Post.objects.filter(pk=post_id).only('pk', 'status', 'published_date').first()
+
+    with transaction.atomic():
+        # پست‌هایی که به این پست اشاره دارند
+        linked = RelatedPost.objects.filter(related_id=post_id)\
+            .exclude(post_id=post_id).values_list('post_id', 'kind')
+        affected_related = {pid for pid, kind in linked if kind == 'related'}
+        affected_neighbors = {pid for pid, kind in linked if kind != 'related'}
+
+        if post is None or post.status != 'published':
+            RelatedPost.objects.filter(Q(post_id=post_id) | Q(related_id=post_id)).delete()
+            _write_related_many({
+                other.pk: compute_scores(other)
+                for other in Post.objects.filter(pk__in=affected_related)
+            })
+            refresh_neighbors(affected_neighbors)
+            return
+
+        scores = compute_scores(post)
+        _write_related(post_id, scores)
+        _merge_into(scores, post_id)
+        refresh_neighbors(affected_neighbors | _neighbor_ids(post) | {post_id})
+
+
+def schedule_refresh(post_id):
+    """به‌روزرسانی گراف پس از commit تراکنش جاری (بعد از نمایه‌ی جستجو)"""
+    transaction.on_commit(lambda: refresh_post(post_id))
+
+
+def get_links(post):
+    """پست‌های مرتبط، قبلی و بعدی با یک کوئری"""
+    from blog.models import RelatedPost
+
+    links = RelatedPost.objects.filter(post=post, related__status='published')\
+        .select_related('related')\
+        .order_by('kind', 'rank')
+    related_posts, previous_post, next_post = [], None, None
+    found = False
+    for link in links:
+        found = True
+        if link.kind == 'built':
+            continue
+        if link.kind == 'related':
+            related_posts.append(link.related)
+        elif link.kind == 'previous':
+            previous_post = link.related
+        else:
+            next_post = link.related
+    return found, related_posts, previous_post, next_post
+
+
+def rebuild(chunk_size=500, stdout=None):
+    """محاسبه‌ی کامل گراف برای همه‌ی پست‌های منتشر شده"""
+    from blog.models import Post, RelatedPost
+
+    RelatedPost.objects.all().delete()
+    post_ids = list(Post.objects.filter(status='published').order_by('pk').values_list('pk', flat=True))
+
+    for start in range(0, len(post_ids), chunk_size):
+        chunk = Post.objects.filter(pk__in=post_ids[start:start + chunk_size])
+        with transaction.atomic():
+            _write_related_many({post.pk: compute_scores(post) for post in chunk})
+        if stdout:
+            stdout.write(f'{min(start + chunk_size, len(post_ids))} از {len(post_ids)} پست پردازش شد')
+
+    # قبلی/بعدی با یک پیمایش مرتب از کل پست‌ها
+    ordered = list(Post.objects.filter(status='published', published_date__isnull=False)
+                   .order_by('published_date', 'pk').values_list('pk', flat=True))
+    rows = []
+    for i, post_id in enumerate(ordered):
+        if i > 0:
+            rows.append(RelatedPost(post_id=post_id, related_id=ordered[i - 1], kind='previous'))
+        if i < len(ordered) - 1:
+            rows.append(RelatedPost(post_id=post_id, related_id=ordered[i + 1], kind='next'))
+    RelatedPost.objects.bulk_create(rows, batch_size=1000)
+
+    return len(post_ids)
@@ -0,0 +1,259 @@
+# blog/search.py
+"""
+موتور جستجوی پست‌های بلاگ
+
+نمایه‌ی معکوس در جداول PostSearchDocument و PostSearchTerm نگهداری می‌شود.
+متن‌ها قبل از نمایه‌سازی و جستجو یکسان‌سازی می‌شوند (ی/ك عربی، نیم‌فاصله،
+اعراب، ارقام فارسی و عربی) و نتایج با الگوریتم BM25 رتبه‌بندی می‌شوند.
+"""
+import hashlib
+import math
+import re
+from collections import Counter
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, Count, FloatField, Sum, Value, When
+from django.db.models.functions import Cast
+from django.utils.html import strip_tags
+
+from website.normalization import normalize
+
+# وزن هر بخش از پست در امتیازدهی
+FIELD_WEIGHTS = {
+    'title': 3,
+    'tags': 2,
+    'categories': 2,
+    'author': 1,
+    'content': 1,
+}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# واژه‌هایی که در بیش از این نسبت از اسناد آمده‌اند، در صورت وجود واژه‌های
+# دیگر در عبارت جستجو، نادیده گرفته می‌شوند
+COMMON_TERM_RATIO = 0.5
+
+STATS_CACHE_KEY = 'blog_search_stats'
+STATS_CACHE_TIMEOUT = 300
+
+MAX_TERM_LENGTH = 64
+
+# حداکثر تعداد نتایج رتبه‌بندی شده‌ی هر جستجو
+MAX_RESULTS = 500
+
+# تعداد واژه‌های پرتکرار هر سند که برای یافتن پست‌های مرتبط نگهداری می‌شوند
+TOP_TERMS_SIZE = 50
+
+_TOKEN_RE = re.compile(r'\w+')
+
+STOP_WORDS = frozenset([
+    'و', 'در', 'به', 'از', 'که', 'این', 'را', 'با', 'است', 'برای', 'آن', 'یک',
+    'تا', 'هم', 'بر', 'یا', 'اما', 'اگر', 'نیز', 'شد', 'شود', 'می', 'های', 'ها',
+    'the', 'a', 'an', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'is', 'are',
+])
+
+
+def tokenize(text):
+    """تبدیل متن به فهرست واژه‌های یکسان‌سازی شده"""
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in _TOKEN_RE.findall(normalize(text))
+        if token not in STOP_WORDS
+    ]
+
+
+def _post_fields(post):
+    return {
+        'title': post.title,
+        'content': post.plain_text or strip_tags(post.content),
+        'author': post.author.username if post.author_id else '',
+        'categories': ' '.join(c.name for c in post.categories.all()),
+        'tags': ' '.join(t.name for t in post.tags.all()),
+    }
+
+
+def build_terms(post):
+    """محاسبه‌ی تکرار وزن‌دار واژه‌های یک پست"""
+    frequencies = Counter()
+    for field, text in _post_fields(post).items():
+        weight = FIELD_WEIGHTS[field]
+        for token in tokenize(text):
+            frequencies[token] += weight
+    return frequencies
+
+
+def index_post(post):
+    """نمایه‌سازی (یا حذف از نمایه) یک پست"""
+    from blog.models import PostSearchDocument, PostSearchTerm
+
+    if post.status != 'published':
+        remove_post(post.pk)
+        return
+
+    frequencies = build_terms(post)
+    with transaction.atomic():
+        document, _ = PostSearchDocument.objects.update_or_create(
+            post_id=post.pk,
+            defaults={
+                'length': sum(frequencies.values()),
+                'top_terms': dict(frequencies.most_common(TOP_TERMS_SIZE)),
+            },
+        )
+        PostSearchTerm.objects.filter(document=document).delete()
+        PostSearchTerm.objects.bulk_create([
+            PostSearchTerm(term=term, document=document, frequency=freq)
+            for term, freq in frequencies.items()
+        ])
+
+
+def remove_post(post_id):
+    """حذف یک پست از نمایه"""
+    from blog.models import PostSearchDocument
+
+    PostSearchDocument.objects.filter(post_id=post_id).delete()
+
+
+def index_post_by_id(post_id):
+    from blog.models import Post
+
+    post = Post.objects.select_related('author')\
+        .prefetch_related('categories', 'tags')\
+        .filter(pk=post_id).first()
+    if post is None:
+        remove_post(post_id)
+    else:
+        index_post(post)
+
+
+def schedule_index(post_id):
+    """نمایه‌سازی پست پس از commit تراکنش جاری"""
+    transaction.on_commit(lambda: index_post_by_id(post_id))
+
+
+def reindex_posts(post_ids, chunk_size=500):
+    """نمایه‌سازی دوباره‌ی چند پست (مثلاً پس از تغییر نام دسته‌بندی یا تگ)"""
+    from blog.models import Post
+
+    post_ids = sorted(set(post_ids))
+    for start in range(0, len(post_ids), chunk_size):
+        chunk = post_ids[start:start + chunk_size]
+        posts = {
+            post.pk: post for post in Post.objects.filter(pk__in=chunk)
+            .select_related('author').prefetch_related('categories', 'tags')
+        }
+        for post_id in chunk:
+            if post_id in posts:
+                index_post(posts[post_id])
+            else:
+                remove_post(post_id)
+
+
+def schedule_reindex(post_ids):
+    """نمایه‌سازی دوباره‌ی چند پست پس از commit"""
+    post_ids = list(post_ids)
+    if post_ids:
+        transaction.on_commit(lambda: reindex_posts(post_ids))
+
+
+def get_stats():
+    """تعداد اسناد و میانگین طول سند (با کش کوتاه‌مدت)"""
+    from blog.models import PostSearchDocument
+
+    stats = cache.get(STATS_CACHE_KEY)
+    if stats is None:
+        agg = PostSearchDocument.objects.aggregate(count=Count('pk'), total=Sum('length'))
+        count = agg['count'] or 0
+        stats = {
+            'count': count,
+            'avg_length': (agg['total'] or 0) / count if count else 0,
+        }
+        cache.set(STATS_CACHE_KEY, stats, STATS_CACHE_TIMEOUT)
+    return stats
+
+
+def is_index_ready():
+    return get_stats()['count'] > 0
+
+
+def search(query, limit=MAX_RESULTS):
+    """جستجو و رتبه‌بندی BM25 - خروجی: شناسه‌ی limit پست برتر به ترتیب امتیاز"""
+    from blog.models import PostSearchTerm
+
+    terms = list(dict.fromkeys(tokenize(query)))
+    if not terms:
+        return []
+
+    stats = get_stats()
+    total_docs = stats['count']
+    avg_length = stats['avg_length'] or 1
+    if not total_docs:
+        return []
+
+    document_frequencies = dict(
+        PostSearchTerm.objects.filter(term__in=terms)
+        .values_list('term')
+        .annotate(df=Count('pk'))
+        .values_list('term', 'df')
+    )
+    if not document_frequencies:
+        return []
+
+    # واژه‌های بسیار پرتکرار سهم ناچیزی در امتیاز دارند و خواندنشان گران است
+    selective = [t for t, df in document_frequencies.items() if df <= total_docs * COMMON_TERM_RATIO]
+    lookup_terms = selective or list(document_frequencies)
+
+    idf = {
+        term: math.log(1 + (total_docs - df + 0.5) / (df + 0.5))
+        for term, df in document_frequencies.items()
+    }
+
+    # امتیاز BM25 در خود دیتابیس جمع زده می‌شود و فقط limit سند برتر برمی‌گردد
+    frequency = Cast('frequency', FloatField())
+    norm = BM25_K1 * (1 - BM25_B) + BM25_K1 * BM25_B / avg_length * Cast('document__length', FloatField())
+    term_idf = Case(*[When(term=term, then=Value(idf[term])) for term in lookup_terms],
+                    default=Value(0.0), output_field=FloatField())
+
+    def rank():
+        return list(
+            PostSearchTerm.objects.filter(term__in=lookup_terms)
+            .values('document_id')
+            .annotate(score=Sum(term_idf * frequency * (BM25_K1 + 1) / (frequency + norm)))
+            .order_by('-score', 'document_id')
+            .values_list('document_id', flat=True)[:limit]
+        )
+
+    if selective:
+        return rank()
+    # فقط واژه‌های پرتکرار: خواندن بیش از نیمی از نمایه؛ نتیجه مثل آمار کوتاه‌مدت کش می‌شود
+    # (تعداد این واژه‌ها محدود است، پس تعداد کلیدها هم محدود می‌ماند)
+    key = 'blog_search_common:' + hashlib.md5(f'{sorted(lookup_terms)}:{limit}'.encode()).hexdigest()
+    return cache.get_or_set(key, rank, STATS_CACHE_TIMEOUT)
+
+
+def rebuild_index(chunk_size=500, stdout=None):
+    """بازسازی کامل نمایه"""
+    from blog.models import Post, PostSearchDocument
+
+    PostSearchDocument.objects.all().delete()
+    posts = Post.objects.filter(status='published')\
+        .select_related('author')\
+        .prefetch_related('categories', 'tags')\
+        .order_by('pk')
+
+    indexed = 0
+    last_pk = 0
+    while True:
+        chunk = list(posts.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            break
+        for post in chunk:
+            index_post(post)
+        indexed += len(chunk)
+        last_pk = chunk[-1].pk
+        if stdout:
+            stdout.write(f'{indexed} پست نمایه شد')
+
+    cache.delete(STATS_CACHE_KEY)
+    return indexed
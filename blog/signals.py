@@ -0,0 +1,122 @@
+# blog/signals.py
+from django.db.models.signals import post_init, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from taggit.models import Tag
+
+from blog import search, related, comment_counters, author_stats
+from website import fragment_cache
+from blog.models import Post, Category, TaggedPost, RelatedPost, Comment
+
+# فیلدهایی که در نمایه‌ی جستجو و گراف پست‌های مرتبط اثر دارند
+INDEXED_FIELDS = {'title', 'content', 'status', 'author', 'published_date'}
+# فیلدهایی که در آمار نویسنده اثر دارند
+STATS_FIELDS = {'status', 'author', 'published_date', 'counted_views', 'approved_comment_count'}
+
+# نسل کش قطعه‌های سایدبار در همه‌ی پروسه‌ها (حتی بدون بارگذاری تگ‌ها) به‌روز شود
+fragment_cache.track(Post, Category, TaggedPost)
+
+
+def _schedule(post_id):
+    # ترتیب مهم است: گراف مرتبط‌ها از واژه‌های نمایه‌ی جستجو استفاده می‌کند
+    search.schedule_index(post_id)
+    related.schedule_refresh(post_id)
+
+
+@receiver(post_save, sender=Post)
+def index_post_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """به‌روزرسانی نمایه‌ی جستجو و پست‌های مرتبط پس از ذخیره‌ی پست"""
+    if raw:
+        return
+    # ذخیره‌های جزئی (مثل شمارنده‌ها) روی متن پست اثری ندارند
+    if update_fields and not set(update_fields) & INDEXED_FIELDS:
+        return
+    _schedule(instance.pk)
+
+
+@receiver(post_init, sender=Post)
+def remember_post_author(sender, instance, **kwargs):
+    """نویسنده‌ی اولیه‌ی پست تا با تغییر نویسنده آمار هر دو به‌روز شود"""
+    # از __dict__ تا فیلد defer شده باعث کوئری اضافه نشود
+    instance._stats_author_id = instance.__dict__.get('author_id')
+
+
+@receiver(post_save, sender=Post)
+def refresh_author_stats_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and not set(update_fields) & STATS_FIELDS):
+        return
+    author_stats.schedule_refresh({instance._stats_author_id, instance.author_id})
+    instance._stats_author_id = instance.author_id
+
+
+@receiver(pre_delete, sender=Post)
+def refresh_linked_posts_on_delete(sender, instance, **kwargs):
+    """پست‌هایی که به پست حذف شده اشاره دارند دوباره محاسبه شوند"""
+    for post_id in RelatedPost.objects.filter(related_id=instance.pk)\
+            .exclude(post_id=instance.pk).values_list('post_id', flat=True).distinct():
+        related.schedule_refresh(post_id)
+
+
+@receiver(post_delete, sender=Post)
+def remove_post_from_index(sender, instance, **kwargs):
+    search.remove_post(instance.pk)
+    author_stats.schedule_refresh([instance.author_id])
+
+
+@receiver(m2m_changed, sender=Post.categories.through)
+@receiver(m2m_changed, sender=TaggedPost)
+def index_post_on_taxonomy_change(sender, instance, action, reverse, pk_set=None, **kwargs):
+    """به‌روزرسانی نمایه و پست‌های مرتبط پس از تغییر دسته‌بندی‌ها یا تگ‌های پست"""
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        _schedule(instance.pk)
+    elif pk_set:
+        for post_id in pk_set:
+            _schedule(post_id)
+
+
+@receiver(post_init, sender=Category)
+@receiver(post_init, sender=Tag)
+def remember_taxonomy_name(sender, instance, **kwargs):
+    instance._indexed_name = instance.__dict__.get('name')
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_save, sender=Tag)
+def index_posts_on_taxonomy_rename(sender, instance, created, raw=False, **kwargs):
+    """نام دسته‌بندی و تگ در نمایه‌ی پست‌ها آمده است؛ با تغییر نام، پست‌هایشان دوباره نمایه شوند"""
+    if raw or created or instance.name == instance._indexed_name:
+        return
+    if sender is Category:
+        post_ids = instance.posts.values_list('pk', flat=True)
+    else:
+        post_ids = TaggedPost.objects.filter(tag=instance).values_list('content_object_id', flat=True)
+    search.schedule_reindex(post_ids)
+    instance._indexed_name = instance.name
+
+
+@receiver(post_init, sender=Comment)
+def remember_comment_state(sender, instance, **kwargs):
+    """نگهداری وضعیت اولیه‌ی نظر برای محاسبه‌ی تغییر شمارنده"""
+    instance._counted_post_id = instance.post_id if instance.approved else None
+
+
+@receiver(post_save, sender=Comment)
+def update_comment_counters(sender, instance, created, raw=False, **kwargs):
+    """به‌روزرسانی شمارنده هنگام ایجاد، تایید یا لغو تایید نظر"""
+    if raw:
+        return
+    old_post_id = None if created else instance._counted_post_id
+    new_post_id = instance.post_id if instance.approved else None
+    if old_post_id != new_post_id:
+        comment_counters.apply_delta(old_post_id, -1)
+        comment_counters.apply_delta(new_post_id, 1)
+        author_stats.schedule_for_posts({old_post_id, new_post_id} - {None})
+    instance._counted_post_id = new_post_id
+
+
+@receiver(post_delete, sender=Comment)
+def update_comment_counters_on_delete(sender, instance, **kwargs):
+    comment_counters.apply_delta(instance._counted_post_id, -1)
+    if instance._counted_post_id:
+        author_stats.schedule_for_posts([instance._counted_post_id])
@@ -5,9 +5,11 @@ from blog.models import Post
 class BlogSitemap(Sitemap):
     changefreq = "daily"
     priority = 0.5
+    # فیلد تاریخ تغییر، برای تشخیص تغییر هر بخش از نقشه‌ی سایت
+    lastmod_field = 'updated_date'
 
     def items(self):
-        return Post.objects.filter(status=True)
+        return Post.objects.filter(status='published').order_by('pk')
 
     def lastmod(self, obj):
-        return obj.published_date
\ No newline at end of file
+        return obj.updated_date
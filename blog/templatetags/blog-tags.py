@@ -1,25 +1,29 @@
 from django import template
-from blog.models import Post,Category
-from django.db.models import Count
+from blog.models import Post,Category,TaggedPost
+from website.fragment_cache import cached_simple_tag, cached_inclusion_tag
+from django.db.models import Count, Q
 # from django.db.models import Count,Sum
 
 register = template.Library()
 
-@register.simple_tag(name = 'totalposts')
+# خروجی تگ‌های سایدبار در کش نسخه‌دار نگهداری می‌شود و با ذخیره/حذف
+# پست، دسته‌بندی یا تگ به صورت خودکار نامعتبر می‌شود
+@cached_simple_tag(register, depends_on=[Post], name='totalposts')
 def function():
-    posts = Post.objects.filter(status=1).count()
+    posts = Post.objects.filter(status='published').count()
     return posts
 
-@register.inclusion_tag('blog/blog-popular-posts.html', name='latestposts')
+# زمان نسبی (naturaltime) در قالب نمایش داده می‌شود؛ کش کوتاه‌تر
+@cached_inclusion_tag(register, 'blog/blog-popular-posts.html', depends_on=[Post], name='latestposts', timeout=600)
 def latestposts(arg=5):
-    posts = Post.objects.filter(status=1).order_by('-published_date')[:arg]
+    posts = list(Post.objects.filter(status='published').defer(*Post.LISTING_DEFERRED_FIELDS).order_by('-published_date')[:arg])
     return {'posts':posts}
 
-@register.inclusion_tag('blog/blog-post-categories.html', name='postcategories')
+@cached_inclusion_tag(register, 'blog/blog-post-categories.html', depends_on=[Post, Category, TaggedPost], name='postcategories')
 def post_categories():
     # روش بهینه‌شده با استفاده از annotate
     categories = Category.objects.annotate(
-        post_count=Count('posts')
+        post_count=Count('posts', filter=Q(posts__status='published'))
     ).filter(
         post_count__gt=0
     ).order_by('-post_count')
@@ -3,6 +3,8 @@ from django.contrib.auth.models import User
 from django.urls import reverse
 from django.utils.html import format_html
 
+from website.templatetags.renditions import picture
+
 register = template.Library()
 
 @register.simple_tag
@@ -28,28 +30,28 @@ def profile_link(user, current_user, text=None, css_class=""):
     else:
         return format_html('<span class="text-muted">{}</span>', display_text)
 
+def _image_tag(image, alt_text, css_class, size):
+    """تصویر فیلد (نسخه‌ی thumb با تگ picture) یا آدرس ساده"""
+    style = f"width: {size}; height: {size}; object-fit: cover;"
+    if hasattr(image, 'storage'):
+        return picture(image, 'thumb', alt=alt_text, css_class=css_class, style=style)
+    return format_html('<img src="{}" alt="{}" class="{}" style="{}">', image, alt_text, css_class, style)
+
 @register.simple_tag
 def profile_image_link(user, current_user, image_url, alt_text, css_class="", size="70px"):
     """
-    ایجاد لینک پروفایل برای تصاویر کاربران - نسخه بهینه شده
+    ایجاد لینک پروفایل برای تصاویر کاربران - image_url: آدرس یا فیلد تصویر (نسخه‌ی thumb)
     """
+    image = _image_tag(image_url, alt_text, css_class, size)
     if not user or not isinstance(user, User):
-        return format_html(
-            '<img src="{}" alt="{}" class="{}" style="width: {}; height: {}; object-fit: cover;">',
-            image_url, alt_text, css_class, size, size
-        )
+        return image
     
     # فقط اگر کاربر جاری لاگین کرده باشد لینک فعال شود
     if current_user.is_authenticated:
         url = reverse('accounts:profile_view', kwargs={'username': user.username})
         return format_html(
-            '<a href="{}" class="profile-image-link" title="مشاهده پروفایل {}">'
-            '<img src="{}" alt="{}" class="{}" style="width: {}; height: {}; object-fit: cover;">'
-            '</a>',
-            url, user.username, image_url, alt_text, css_class, size, size
+            '<a href="{}" class="profile-image-link" title="مشاهده پروفایل {}">{}</a>',
+            url, user.username, image
         )
     else:
-        return format_html(
-            '<img src="{}" alt="{}" class="{}" style="width: {}; height: {}; object-fit: cover;">',
-            image_url, alt_text, css_class, size, size
-        )
\ No newline at end of file
+        return image
\ No newline at end of file
@@ -1,3 +1,115 @@
-from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
 
-# Create your tests here.
+from . import author_stats, view_counter
+from .pagination import CursorPaginator
+from .models import AuthorStats, PendingPostView, Post, PostViewBucket
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ViewCounterTests(TestCase):
+    def setUp(self):
+        self.posts = [Post.objects.create(title=f'p{i}', content='c', status='published') for i in range(2)]
+
+    def test_flush_applies_buffered_views_once(self):
+        for _ in range(3):
+            view_counter.record_view(self.posts[0].pk)
+        view_counter.record_view(self.posts[1].pk)
+        self.assertEqual(view_counter.pending_views(self.posts[0].pk), 3)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(view_counter.flush(batch_size=2), 4)
+            self.assertEqual(view_counter.flush(), 0)
+
+        self.assertFalse(PendingPostView.objects.exists())
+        self.assertEqual(
+            dict(Post.objects.values_list('pk', 'counted_views')),
+            {self.posts[0].pk: 3, self.posts[1].pk: 1},
+        )
+        bucket = PostViewBucket.objects.get(post=self.posts[0])
+        self.assertEqual((bucket.hour, bucket.views), (view_counter.current_hour(), 3))
+
+    def test_failed_batch_keeps_buffer(self):
+        view_counter.record_view(self.posts[0].pk)
+        original = view_counter.apply_views
+
+        def failing(*args, **kwargs):
+            original(*args, **kwargs)
+            raise RuntimeError('db down')
+
+        view_counter.apply_views = failing
+        try:
+            self.assertEqual(view_counter.flush(), 0)
+        finally:
+            view_counter.apply_views = original
+
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).counted_views, 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(view_counter.flush(), 1)
+        self.assertEqual(Post.objects.get(pk=self.posts[0].pk).counted_views, 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class CursorPaginatorTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        for i in range(3):
+            Post.objects.create(title=f'p{i}', content='c', status='published')
+
+    def paginator(self):
+        return CursorPaginator(Post.objects.filter(status='published'), 2, total_cache_key='index')
+
+    def test_pages_follow_cursor(self):
+        first = self.paginator().get_page()
+        second = self.paginator().get_page(after=first.next_cursor)
+        self.assertEqual(len(first), 2)
+        self.assertEqual(len(second), 1)
+        self.assertFalse(second.has_next)
+        self.assertEqual(set(first) | set(second), set(Post.objects.all()))
+
+    def test_approx_total_follows_post_changes(self):
+        self.assertEqual(self.paginator().approx_total(), 3)
+        Post.objects.create(title='new', content='c', status='published')
+        self.assertEqual(self.paginator().approx_total(), 4)
+        Post.objects.first().delete()
+        self.assertEqual(self.paginator().approx_total(), 3)
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class AuthorStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_reading_stats_of_non_author_creates_no_row(self):
+        reader = User.objects.create(username='reader')
+        self.assertEqual(author_stats.get_stats(reader), author_stats.EMPTY)
+        self.assertFalse(AuthorStats.objects.exists())
+
+    def test_publishing_creates_row(self):
+        writer = User.objects.create(username='writer')
+        with self.captureOnCommitCallbacks(execute=True):
+            Post.objects.create(title='p', content='c', status='published', author=writer)
+        self.assertEqual(author_stats.get_stats(writer)['published_posts'], 1)
+        self.assertTrue(AuthorStats.objects.filter(author=writer).exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class FeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create(username='writer')
+        Post.objects.create(title='p', content='c', status='published', author=author)
+
+    def test_conditional_response_varies_on_encoding(self):
+        response = self.client.get(reverse('blog:rss_feed'), HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        not_modified = self.client.get(reverse('blog:rss_feed'), HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertIn('Accept-Encoding', not_modified['Vary'])
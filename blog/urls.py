@@ -1,6 +1,6 @@
 from django.urls import path
 from blog.views import *
-from blog.feeds import LatestEntriesFeed, AtomSiteNewsFeed
+from blog.feeds import LatestEntriesFeed, AtomSiteNewsFeed, CategoryFeed, TagFeed, AtomCategoryFeed, AtomTagFeed
 from . import views
 
 
@@ -17,5 +17,9 @@ urlpatterns = [
     path('search/', blog_search, name='search'),
     path('rss/feed/', LatestEntriesFeed(), name='rss_feed'),
     path('atom/feed/', AtomSiteNewsFeed(), name='atom_feed'),
+    path('category/<str:cat_name>/rss/', CategoryFeed(), name='category_rss_feed'),
+    path('category/<str:cat_name>/atom/', AtomCategoryFeed(), name='category_atom_feed'),
+    path('tag/<str:tag_name>/rss/', TagFeed(), name='tag_rss_feed'),
+    path('tag/<str:tag_name>/atom/', AtomTagFeed(), name='tag_atom_feed'),
     # path('post/<int:pid>/', views.post_detail, name='single'),
     ]
\ No newline at end of file
@@ -0,0 +1,114 @@
+# blog/view_counter.py
+"""
+شمارنده بازدید پست‌ها به صورت write-behind
+
+هر بازدید فقط یک ردیف در جدول PendingPostView درج می‌کند؛ درج روی ردیف پست
+قفل نمی‌گیرد و بازدیدهای هم‌زمان یک پست پرطرفدار منتظر هم نمی‌مانند. بافر در
+دیتابیس است (نه کش) تا شمارش به اتمیک بودن backend کش وابسته نباشد و با
+بسته شدن یا kill شدن یک worker چیزی از دست نرود.
+
+تخلیه (دستور flush_post_views، به صورت دوره‌ای و خارج از مسیر درخواست)
+ردیف‌های بافر را دسته به دسته قفل می‌کند، برای هر پست و ساعت یک UPDATE اتمیک
+(F) اجرا می‌کند و ردیف‌ها را در همان تراکنش حذف می‌کند؛ بنابراین هر بازدید
+دقیقاً یک بار شمرده می‌شود، حتی با چند تخلیه‌ی هم‌زمان یا خطا در میانه‌ی کار.
+"""
+import logging
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+FLUSH_BATCH_SIZE = 5000
+
+
+def current_hour(now=None):
+    """شروع ساعت جاری (برای بازدیدهای ساعتی)"""
+    now = now or timezone.now()
+    return now.replace(minute=0, second=0, microsecond=0)
+
+
+def record_view(post_id):
+    """ثبت یک بازدید در بافر (یک INSERT)"""
+    from blog.models import PendingPostView
+
+    PendingPostView.objects.create(post_id=post_id, hour=current_hour())
+
+
+def pending_views(post_id):
+    """بازدیدهای هنوز ذخیره نشده‌ی یک پست"""
+    from blog.models import PendingPostView
+
+    return PendingPostView.objects.filter(post_id=post_id).count()
+
+
+def apply_views(counts, hour=None):
+    """اعمال بازدیدها در دیتابیس - یک UPDATE اتمیک برای هر پست"""
+    from blog import author_stats
+    from blog.models import Post, PostViewBucket
+
+    counts = {post_id: n for post_id, n in counts.items() if n > 0}
+    if not counts:
+        return 0
+
+    hour = hour or current_hour()
+    with transaction.atomic():
+        # ایجاد ردیف‌های ساعتی که هنوز وجود ندارند (بدون خطای تکراری)
+        existing = Post.objects.filter(pk__in=counts).values_list('pk', flat=True)
+        PostViewBucket.objects.bulk_create(
+            [PostViewBucket(post_id=post_id, hour=hour, views=0) for post_id in existing],
+            ignore_conflicts=True,
+        )
+        for post_id, n in counts.items():
+            Post.objects.filter(pk=post_id).update(counted_views=F('counted_views') + n)
+            PostViewBucket.objects.filter(post_id=post_id, hour=hour).update(views=F('views') + n)
+        # update() سیگنال ندارد؛ آمار نویسندگان همین پست‌ها به‌روز شود
+        author_stats.schedule_for_posts(counts)
+
+    return sum(counts.values())
+
+
+def flush_batch(batch_size=FLUSH_BATCH_SIZE):
+    """تخلیه‌ی یک دسته از بافر در یک تراکنش - خروجی: (ردیف‌های خوانده شده، بازدیدهای ذخیره شده)"""
+    from blog.models import PendingPostView
+
+    with transaction.atomic():
+        # ردیف‌های قفل شده توسط تخلیه‌ی هم‌زمان دیگر رد می‌شوند
+        rows = list(
+            PendingPostView.objects.select_for_update(skip_locked=True)
+            .order_by('pk').values_list('pk', 'post_id', 'hour')[:batch_size]
+        )
+        if not rows:
+            return 0, 0
+        by_hour = {}
+        for (post_id, hour), n in Counter((post_id, hour) for _pk, post_id, hour in rows).items():
+            by_hour.setdefault(hour, {})[post_id] = n
+        total = sum(apply_views(counts, hour=hour) for hour, counts in by_hour.items())
+        PendingPostView.objects.filter(pk__in=[pk for pk, _post_id, _hour in rows]).delete()
+    return len(rows), total
+
+
+def flush(batch_size=FLUSH_BATCH_SIZE):
+    """ذخیره‌ی همه‌ی بازدیدهای بافر در دیتابیس - خروجی: تعداد بازدیدهای ذخیره شده"""
+    total = 0
+    while True:
+        try:
+            read, saved = flush_batch(batch_size)
+        except Exception as e:
+            # دسته‌ی ناموفق کامل برگردانده می‌شود و در تخلیه‌ی بعدی دوباره خوانده می‌شود
+            logger.error(f"Error flushing post views: {str(e)}")
+            return total
+        total += saved
+        if read < batch_size:
+            return total
+
+
+def prune_buckets(days=30):
+    """حذف بازدیدهای ساعتی قدیمی‌تر از چند روز"""
+    from blog.models import PostViewBucket
+
+    cutoff = current_hour() - timezone.timedelta(days=days)
+    deleted, _ = PostViewBucket.objects.filter(hour__lt=cutoff).delete()
+    return deleted
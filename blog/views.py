@@ -3,13 +3,16 @@ from blog.models import Post, Comment, Category
 from django.db.models import Q, Count
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from blog.forms import CommentForm
+from blog import view_counter, search, related, author_stats
+from blog.pagination import CursorPaginator
 from django.contrib import messages
 from django.http import Http404
 from django.views.decorators.cache import cache_page
 from django.views.decorators.vary import vary_on_cookie
 from django.core.paginator import Paginator
 from django.contrib.auth.models import User
-from django.db.models import Prefetch
+
+LISTING_PAGE_SIZE = 4
 
 
 def is_post_editor(user):
@@ -25,19 +28,14 @@ def blog_view(request):
     # ✅ اصلاح شده: استفاده از status='published' به جای status=True
     posts_list = Post.objects.filter(status='published')\
         .select_related('author', 'author__profile')\
-        .prefetch_related(
-            'categories',
-            'tags',
-            Prefetch('comments', queryset=Comment.objects.filter(approved=True))
-        )\
-        .order_by('-published_date')
+        .prefetch_related('categories', 'tags')\
+        .defer(*Post.LISTING_DEFERRED_FIELDS)
     
     # تعیین پروفایل برای نمایش
     profile_user = get_default_profile_user(request)
     
-    paginator = Paginator(posts_list, 4)
-    page = request.GET.get('page')
-    posts = paginator.get_page(page)
+    paginator = CursorPaginator(posts_list, LISTING_PAGE_SIZE, total_cache_key='index')
+    posts = paginator.get_page_from_request(request)
     
     context = {
         'posts': posts,
@@ -67,31 +65,34 @@ def blog_single(request, pid):
             status='published'
         )
         
-        # افزایش تعداد بازدیدها
-        post.counted_views += 1
-        post.save(update_fields=['counted_views'])
+        # افزایش تعداد بازدیدها (در بافر؛ ذخیره‌ی دوره‌ای در دیتابیس)
+        view_counter.record_view(post.pk)
+        post.counted_views += view_counter.pending_views(post.pk)
         
         # کامنت‌های تأیید شده
         comments = Comment.objects.filter(post=post, approved=True)\
             .select_related('post', 'user', 'user__profile')\
             .order_by('-created_date')
         
-        # پست قبلی و بعدی
-        previous_post = Post.objects.filter(
-            status='published',  # ✅
-            published_date__lt=post.published_date
-        ).order_by('-published_date').first()
+        # پست‌های مرتبط، قبلی و بعدی از گراف از پیش محاسبه شده (یک کوئری)
+        found, related_posts, previous_post, next_post = related.get_links(post)
         
-        next_post = Post.objects.filter(
-            status='published',  # ✅ اصلاح شده
-            published_date__gt=post.published_date
-        ).order_by('published_date').first()
-        
-        # پست‌های مرتبط
-        related_posts = Post.objects.filter(
-            status='published',  # ✅ اصلاح شده
-            categories__in=post.categories.all()
-        ).exclude(id=post.id).distinct()[:4]
+        if not found:
+            # گراف هنوز برای این پست ساخته نشده است (rebuild_related_posts)
+            previous_post = Post.objects.filter(
+                status='published',
+                published_date__lt=post.published_date
+            ).order_by('-published_date').first()
+            
+            next_post = Post.objects.filter(
+                status='published',
+                published_date__gt=post.published_date
+            ).order_by('published_date').first()
+            
+            related_posts = Post.objects.filter(
+                status='published',
+                categories__in=post.categories.all()
+            ).exclude(id=post.id).distinct()[:4]
         
         # مدیریت فرم کامنت
         if request.method == 'POST':
@@ -154,17 +155,23 @@ def blog_search(request):
         messages.info(request, 'لطفا عبارت جستجو را وارد کنید.')
         return redirect('blog:index')
     
-    # ✅ اصلاح شده: استفاده از status='published'
-    posts = Post.objects.filter(status='published')\
-        .select_related('author')\
-        .prefetch_related('categories', 'tags')\
-        .filter(
-            Q(title__icontains=query) |
-            Q(content__icontains=query) |
-            Q(author__username__icontains=query) |
-            Q(categories__name__icontains=query) |
-            Q(tags__name__icontains=query)
-        ).distinct()
+    use_index = search.is_index_ready()
+    if use_index:
+        # نتایج رتبه‌بندی شده از نمایه‌ی جستجو؛ فقط پست‌های همین صفحه واکشی می‌شوند
+        posts = search.search(query)
+    else:
+        # تا زمان ساخت نمایه (rebuild_search_index) از جستجوی ساده استفاده می‌شود
+        posts = Post.objects.filter(status='published')\
+            .select_related('author')\
+            .prefetch_related('categories', 'tags')\
+            .defer(*Post.LISTING_DEFERRED_FIELDS)\
+            .filter(
+                Q(title__icontains=query) |
+                Q(content__icontains=query) |
+                Q(author__username__icontains=query) |
+                Q(categories__name__icontains=query) |
+                Q(tags__name__icontains=query)
+            ).distinct()
     
     # تعیین پروفایل برای نمایش
     if request.user.is_authenticated:
@@ -184,6 +191,15 @@ def blog_search(request):
         posts = paginator.get_page(1)
     except EmptyPage:
         posts = paginator.get_page(paginator.num_pages)
+    
+    if use_index:
+        # تبدیل شناسه‌های این صفحه به پست با حفظ ترتیب امتیاز
+        post_map = Post.objects.filter(status='published', pk__in=posts.object_list)\
+            .select_related('author')\
+            .prefetch_related('categories', 'tags')\
+            .defer(*Post.LISTING_DEFERRED_FIELDS)\
+            .in_bulk()
+        posts.object_list = [post_map[pk] for pk in posts.object_list if pk in post_map]
         
     context = {
         'posts': posts, 
@@ -198,7 +214,8 @@ def blog_category(request, cat_name):
     # ✅ اصلاح شده: استفاده از status='published'
     posts = Post.objects.filter(status='published', categories__name=cat_name)\
         .select_related('author')\
-        .prefetch_related('categories', 'tags')
+        .prefetch_related('categories', 'tags')\
+        .defer(*Post.LISTING_DEFERRED_FIELDS)
     
     # تعیین پروفایل برای نمایش
     if request.user.is_authenticated:
@@ -209,6 +226,9 @@ def blog_category(request, cat_name):
         except:
             profile_user = None
     
+    paginator = CursorPaginator(posts, LISTING_PAGE_SIZE, total_cache_key=f'category:{cat_name}')
+    posts = paginator.get_page_from_request(request)
+    
     context = {
         'posts': posts,
         'current_cat': cat_name,
@@ -221,7 +241,8 @@ def blog_tag(request, tag_name):
     # ✅ اصلاح شده: استفاده از status='published'
     posts = Post.objects.filter(status='published', tags__name=tag_name)\
         .select_related('author')\
-        .prefetch_related('categories', 'tags')
+        .prefetch_related('categories', 'tags')\
+        .defer(*Post.LISTING_DEFERRED_FIELDS)
     
     # تعیین پروفایل برای نمایش
     if request.user.is_authenticated:
@@ -232,6 +253,9 @@ def blog_tag(request, tag_name):
         except:
             profile_user = None
     
+    paginator = CursorPaginator(posts, LISTING_PAGE_SIZE, total_cache_key=f'tag:{tag_name}')
+    posts = paginator.get_page_from_request(request)
+    
     context = {
         'posts': posts,
         'current_tag': tag_name,
@@ -245,14 +269,19 @@ def blog_author(request, author_username):
     # ✅ اصلاح شده: استفاده از status='published'
     posts = Post.objects.filter(status='published', author=author)\
         .select_related('author')\
-        .prefetch_related('categories', 'tags')
+        .prefetch_related('categories', 'tags')\
+        .defer(*Post.LISTING_DEFERRED_FIELDS)
     
     # پروفایل نویسنده
     profile_user = author
     
+    paginator = CursorPaginator(posts, LISTING_PAGE_SIZE, total_cache_key=f'author:{author.pk}')
+    posts = paginator.get_page_from_request(request)
+    
     context = {
         'posts': posts,
         'current_author': author,
         'profile_user': profile_user,
+        'author_stats': author_stats.get_stats(author),
     }
     return render(request, 'blog/blog-home.html', context)
\ No newline at end of file
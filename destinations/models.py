@@ -1,4 +1,5 @@
 from django.db import models
+from django.urls import reverse
 
 
 class Destination(models.Model):
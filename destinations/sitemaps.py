@@ -0,0 +1,14 @@
+from django.contrib.sitemaps import Sitemap
+from destinations.models import Destination
+
+
+class DestinationSitemap(Sitemap):
+    changefreq = "weekly"
+    priority = 0.6
+    lastmod_field = 'updated_date'
+
+    def items(self):
+        return Destination.objects.filter(is_active=True).order_by('pk')
+
+    def lastmod(self, obj):
+        return obj.updated_date
@@ -86,7 +86,7 @@ class PageAdmin(admin.ModelAdmin):
     def has_delete_permission(self, request, obj=None):
         if request.user.is_superuser:
             return True
-        if obj and (obj.author == request.user or request.user in obj.editors.all()):
+        if obj and request.permissions.can_edit_page(obj):
             return True
         return False
 
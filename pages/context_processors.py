@@ -1,16 +1,7 @@
 # pages/context_processors.py
-from django.db.models import Q
-from .models import Page
+from . import menu
+
 
 def pages_menu(request):
-    """دریافت صفحات برای منو - بهینه‌سازی شده"""
-    try:
-        pages = Page.objects.filter(
-            status='published',
-            show_in_menu=True
-        ).order_by('menu_order', 'title')[:8]
-        
-        return {'pages_menu': pages}
-    except:
-        # در صورت خطا، لیست خالی برگردان
-        return {'pages_menu': []}
\ No newline at end of file
+    """صفحات منو - کش شده و فقط در صورت استفاده در قالب خوانده می‌شود"""
+    return menu.context()
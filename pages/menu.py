@@ -0,0 +1,66 @@
+# pages/menu.py
+"""
+منوی صفحات (context processor pages_menu)
+
+آیتم‌های منو (عنوان و آدرس reverse شده) یک بار ساخته و زیر کلید نسل
+«pages.menu» در کش ذخیره می‌شوند؛ هر پروسه هم یک نسخه‌ی محلی نگه می‌دارد.
+ذخیره یا حذف صفحه‌ای که در منو هست (یا بوده) نسل را بالا می‌برد.
+
+context processor مقدار تنبل برمی‌گرداند؛ درخواستی که base.html را رندر
+نمی‌کند (AJAX، ادمین، JSON) هزینه‌ای نمی‌پردازد و بقیه فقط یک خواندن نسل
+از کش دارند.
+"""
+import logging
+
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.utils.functional import SimpleLazyObject
+
+from website import fragment_cache
+
+logger = logging.getLogger(__name__)
+
+MENU_LABEL = 'pages.menu'
+MENU_TIMEOUT = 60 * 60 * 24
+MENU_SIZE = 8
+# فیلدهایی که در منو اثر دارند
+MENU_FIELDS = {'title', 'slug', 'status', 'show_in_menu', 'menu_order'}
+
+_local = {'generation': None, 'items': None}
+
+
+def build():
+    """آیتم‌های منو از دیتابیس - [{'title', 'url'}]"""
+    from .models import Page
+
+    pages = Page.objects.filter(status='published', show_in_menu=True)\
+        .order_by('menu_order', 'title').only('title', 'slug')[:MENU_SIZE]
+    return [{'title': page.title, 'url': page.get_absolute_url()} for page in pages]
+
+
+def get_items():
+    """آیتم‌های منو (نسخه‌ی محلی پروسه، سپس کش، سپس دیتابیس)"""
+    generation = fragment_cache.get_generations([MENU_LABEL])[0]
+    if _local['generation'] == generation:
+        return _local['items']
+
+    key = f'pages_menu:{generation}'
+    items = cache.get(key)
+    if items is None:
+        try:
+            items = build()
+        except DatabaseError:
+            # منو نباید صفحه را از کار بیندازد؛ نتیجه‌ی خطا کش نمی‌شود
+            logger.exception('Error building pages menu')
+            return []
+        cache.set(key, items, MENU_TIMEOUT)
+    _local.update(generation=generation, items=items)
+    return items
+
+
+def invalidate():
+    fragment_cache.bump_label(MENU_LABEL)
+
+
+def context():
+    return {'pages_menu': SimpleLazyObject(get_items)}
@@ -7,6 +7,7 @@ from django.utils.text import slugify
 from ckeditor.fields import RichTextField
 from tours.models import Tour
 from blog.models import Post
+from accounts.permissions import get_permission_context
 
 class Page(models.Model):
     PAGE_TYPES = [
@@ -128,13 +129,11 @@ class Page(models.Model):
     
     def is_accessible_by(self, user):
         """بررسی دسترسی کاربر به صفحه"""
-        if self.access_level == 'public':
-            return True
-        elif self.access_level == 'private':
-            return user.is_authenticated and user.is_staff
-        elif self.access_level == 'premium':
-            return user.is_authenticated and (user.is_staff or hasattr(user, 'premium_subscription'))
-        return False
+        return get_permission_context(user).can_access_page(self)
+    
+    def can_edit(self, user):
+        """بررسی امکان ویرایش صفحه توسط کاربر"""
+        return get_permission_context(user).can_edit_page(self)
     
     def get_related_tours_display(self):
         """نمایش تورهای مرتبط"""
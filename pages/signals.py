@@ -0,0 +1,40 @@
+# pages/signals.py
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from pages import menu
+from pages.models import Page
+
+
+def _in_menu(values):
+    return values.get('show_in_menu') and values.get('status') == 'published'
+
+
+@receiver(post_init, sender=Page)
+def remember_menu_state(sender, instance, **kwargs):
+    """وضعیت اولیه‌ی منو تا با خروج صفحه از منو هم کش نامعتبر شود"""
+    # از __dict__ تا فیلد defer شده باعث کوئری اضافه نشود
+    instance._was_in_menu = bool(_in_menu(instance.__dict__))
+
+
+def _invalidate():
+    menu.invalidate()
+    # پس از commit دوباره، تا خواننده‌ای که در این فاصله داده‌ی قدیمی را کش کرده نادیده گرفته شود
+    transaction.on_commit(menu.invalidate)
+
+
+@receiver(post_save, sender=Page)
+def invalidate_menu_on_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    if update_fields and not set(update_fields) & menu.MENU_FIELDS:
+        return
+    in_menu = bool(_in_menu(instance.__dict__))
+    if in_menu or instance._was_in_menu:
+        _invalidate()
+    instance._was_in_menu = in_menu
+
+
+@receiver(post_delete, sender=Page)
+def invalidate_menu_on_delete(sender, instance, **kwargs):
+    if instance._was_in_menu or _in_menu(instance.__dict__):
+        _invalidate()
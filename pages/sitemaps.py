@@ -0,0 +1,14 @@
+from django.contrib.sitemaps import Sitemap
+from pages.models import Page
+
+
+class PageSitemap(Sitemap):
+    changefreq = "weekly"
+    priority = 0.4
+    lastmod_field = 'updated_date'
+
+    def items(self):
+        return Page.objects.filter(status='published', access_level='public').order_by('pk')
+
+    def lastmod(self, obj):
+        return obj.updated_date
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.models import Group
 from .models import *
+from . import seat_maps
 from accounts.models import UserLevel
 from accounts.permissions import user_has_permission
 
@@ -16,29 +17,44 @@ class TourCategoryAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         # نویسندگان نمی‌توانند دسته‌بندی‌ها را ببینند
-        if hasattr(request.user, 'profile') and request.user.profile.user_level == UserLevel.WRITER:
+        if request.permissions.has_level(UserLevel.WRITER):
             return qs.none()
         return qs
     
     def has_module_permission(self, request):
         # فقط سوپر ادمین و ادمین تور می‌توانند دسته‌بندی‌ها را مدیریت کنند
-        if hasattr(request.user, 'profile'):
-            return request.user.profile.user_level in [UserLevel.SUPER_ADMIN, UserLevel.ADMIN]
+        permissions = request.permissions
+        if permissions.user_level is not None:
+            return permissions.has_level(UserLevel.SUPER_ADMIN, UserLevel.ADMIN)
         return request.user.is_superuser
     
     def tour_count(self, obj):
         return obj.tours.count()
     tour_count.short_description = 'تعداد تورها'
 
+class SeatLayoutInline(admin.StackedInline):
+    model = SeatLayout
+    can_delete = False
+
 class TransportationAdmin(admin.ModelAdmin):
     list_display = ['name', 'transport_type', 'capacity', 'is_active']
     list_filter = ['transport_type', 'is_active']
     search_fields = ['name']
+    inlines = [SeatLayoutInline]
+    actions = ['generate_seats']
+    
+    @admin.action(description='ساخت صندلی‌ها از طرح چیدمان')
+    def generate_seats(self, request, queryset):
+        created = 0
+        for layout in SeatLayout.objects.filter(transportation__in=queryset):
+            created += seat_maps.generate_seats(layout)[0]
+        self.message_user(request, f'{created} صندلی جدید ساخته شد.')
     
     def has_module_permission(self, request):
         # فقط سوپر ادمین و ادمین تور می‌توانند وسایل نقلیه را مدیریت کنند
-        if hasattr(request.user, 'profile'):
-            return request.user.profile.user_level in [UserLevel.SUPER_ADMIN, UserLevel.ADMIN]
+        permissions = request.permissions
+        if permissions.user_level is not None:
+            return permissions.has_level(UserLevel.SUPER_ADMIN, UserLevel.ADMIN)
         return request.user.is_superuser
 
 class TourAdmin(admin.ModelAdmin):
@@ -54,16 +70,15 @@ class TourAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         # نویسندگان فقط تورهای فعال را می‌بینند
-        if hasattr(request.user, 'profile') and request.user.profile.user_level == UserLevel.WRITER:
+        if request.permissions.has_level(UserLevel.WRITER):
             return qs.filter(is_active=True)
         return qs
     
     def get_fieldsets(self, request, obj=None):
-        if request.user.is_superuser or (hasattr(request.user, 'profile') and 
-                                       request.user.profile.user_level == UserLevel.SUPER_ADMIN):
+        if request.user.is_superuser or request.permissions.has_level(UserLevel.SUPER_ADMIN):
             # سوپر ادمین - تمام فیلدها
             return self.get_super_admin_fieldsets()
-        elif hasattr(request.user, 'profile') and request.user.profile.user_level == UserLevel.ADMIN:
+        elif request.permissions.has_level(UserLevel.ADMIN):
             # ادمین تور - فیلدهای کامل مدیریت تور
             return self.get_tour_admin_fieldsets()
         else:
@@ -148,27 +163,29 @@ class TourAdmin(admin.ModelAdmin):
         readonly_fields = list(super().get_readonly_fields(request, obj))
         
         # نویسندگان نمی‌توانند هیچ فیلدی را ویرایش کنند
-        if hasattr(request.user, 'profile') and request.user.profile.user_level == UserLevel.WRITER:
+        if request.permissions.has_level(UserLevel.WRITER):
             readonly_fields.extend([f.name for f in self.model._meta.fields if f.name != 'id'])
         
         return readonly_fields
     
     def has_add_permission(self, request):
         # فقط سوپر ادمین و ادمین تور می‌توانند تور اضافه کنند
-        if hasattr(request.user, 'profile'):
-            return request.user.profile.user_level in [UserLevel.SUPER_ADMIN, UserLevel.ADMIN]
+        permissions = request.permissions
+        if permissions.user_level is not None:
+            return permissions.has_level(UserLevel.SUPER_ADMIN, UserLevel.ADMIN)
         return request.user.is_superuser
     
     def has_change_permission(self, request, obj=None):
         # نویسندگان نمی‌توانند تورها را ویرایش کنند
-        if hasattr(request.user, 'profile') and request.user.profile.user_level == UserLevel.WRITER:
+        if request.permissions.has_level(UserLevel.WRITER):
             return False
         return super().has_change_permission(request, obj)
     
     def has_delete_permission(self, request, obj=None):
         # فقط سوپر ادمین می‌تواند تورها را حذف کند
-        if hasattr(request.user, 'profile'):
-            return request.user.profile.user_level == UserLevel.SUPER_ADMIN
+        permissions = request.permissions
+        if permissions.user_level is not None:
+            return permissions.has_level(UserLevel.SUPER_ADMIN)
         return request.user.is_superuser
 
 class TourBookingAdmin(admin.ModelAdmin):
@@ -183,14 +200,15 @@ class TourBookingAdmin(admin.ModelAdmin):
     def get_queryset(self, request):
         qs = super().get_queryset(request)
         # نویسندگان نمی‌توانند رزروها را ببینند
-        if hasattr(request.user, 'profile') and request.user.profile.user_level == UserLevel.WRITER:
+        if request.permissions.has_level(UserLevel.WRITER):
             return qs.none()
         return qs
     
     def has_module_permission(self, request):
         # فقط سوپر ادمین و ادمین تور می‌توانند رزروها را مدیریت کنند
-        if hasattr(request.user, 'profile'):
-            return request.user.profile.user_level in [UserLevel.SUPER_ADMIN, UserLevel.ADMIN]
+        permissions = request.permissions
+        if permissions.user_level is not None:
+            return permissions.has_level(UserLevel.SUPER_ADMIN, UserLevel.ADMIN)
         return request.user.is_superuser
     
     def get_total_passengers(self, obj):
@@ -204,8 +222,9 @@ class DiscountAdmin(admin.ModelAdmin):
     
     def has_module_permission(self, request):
         # فقط سوپر ادمین می‌تواند تخفیف‌ها را مدیریت کند
-        if hasattr(request.user, 'profile'):
-            return request.user.profile.user_level == UserLevel.SUPER_ADMIN
+        permissions = request.permissions
+        if permissions.user_level is not None:
+            return permissions.has_level(UserLevel.SUPER_ADMIN)
         return request.user.is_superuser
 
 # ثبت مدل‌ها در ادمین
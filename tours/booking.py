@@ -0,0 +1,86 @@
+# tours/booking.py
+"""
+مسیر ثبت رزرو تور
+
+اعتبارسنجی، قیمت‌گذاری، کاهش ظرفیت، ثبت رزرو، ثبت گروهی (bulk_create)
+مسافرین و صندلی‌ها و اعمال تخفیف‌ها همگی در یک تراکنش انجام می‌شوند؛ خطا در
+هر مرحله کل رزرو را برمی‌گرداند. تعداد کوئری‌ها به تعداد مسافرین وابسته نیست،
+بنابراین رزروهای گروهی بزرگ هم از همین مسیر ثبت می‌شوند.
+"""
+from django.utils import timezone
+
+from . import inventory, redemption, seat_inventory
+from .models import TourBooking, Passenger
+
+PASSENGER_TYPES = ('adult', 'child', 'infant')
+
+
+class BookingError(Exception):
+    """داده‌ی رزرو نامعتبر است"""
+
+
+def price_booking(tour, adult_count, child_count=0, infant_count=0):
+    """مبلغ پایه‌ی رزرو (پیش از تخفیف‌های کد/خودکار)"""
+    return (
+        adult_count * tour.get_current_price() +
+        (child_count * tour.child_price if tour.child_price else 0) +
+        (infant_count * tour.infant_price if tour.infant_price else 0)
+    )
+
+
+def validate(tour, adult_count, child_count=0, infant_count=0, passengers=(), seat_ids=()):
+    total = adult_count + child_count + infant_count
+    if not tour.is_active:
+        raise BookingError('این تور فعال نیست.')
+    if tour.departure_datetime <= timezone.now():
+        raise BookingError('زمان رزرو این تور به پایان رسیده است.')
+    if adult_count < 1 or child_count < 0 or infant_count < 0:
+        raise BookingError('تعداد مسافران نامعتبر است.')
+    if total < tour.min_travelers:
+        raise BookingError(f'حداقل تعداد مسافر برای این تور {tour.min_travelers} نفر است.')
+    if tour.max_travelers and total > tour.max_travelers:
+        raise BookingError(f'حداکثر تعداد مسافر برای این تور {tour.max_travelers} نفر است.')
+    if passengers:
+        counts = [sum(1 for p in passengers if p['passenger_type'] == t) for t in PASSENGER_TYPES]
+        if counts != [adult_count, child_count, infant_count]:
+            raise BookingError('اطلاعات مسافرین با تعداد مسافران همخوانی ندارد.')
+    if seat_ids and not passengers:
+        raise BookingError('برای انتخاب صندلی اطلاعات مسافرین لازم است.')
+    if len(seat_ids) > len(passengers):
+        raise BookingError('تعداد صندلی‌های انتخابی بیش از تعداد مسافران است.')
+    if len(set(seat_ids)) != len(seat_ids):
+        raise BookingError('صندلی تکراری انتخاب شده است.')
+
+
+def book(tour, user, adult_count, child_count=0, infant_count=0, passengers=(), seat_ids=(),
+         seat_owner=None, discount_code=None, **booking_fields):
+    """
+    ثبت کامل رزرو در یک تراکنش
+
+    passengers: فهرست دیکشنری‌های فیلدهای Passenger (همراه با passenger_type)
+    seat_ids: صندلی‌های نگه‌داشته شده توسط seat_owner، به ترتیب مسافرین
+    خطاها: BookingError، InsufficientCapacity، SeatUnavailable، DiscountExhausted
+    """
+    validate(tour, adult_count, child_count, infant_count, passengers, seat_ids)
+    total_passengers = adult_count + child_count + infant_count
+
+    def create_booking(locked_tour):
+        base_amount = price_booking(locked_tour, adult_count, child_count, infant_count)
+        booking = TourBooking(
+            user=user, tour=locked_tour,
+            adult_count=adult_count, child_count=child_count, infant_count=infant_count,
+            base_amount=base_amount, total_amount=base_amount,
+            **booking_fields
+        )
+        booking.save()
+
+        created = Passenger.objects.bulk_create([
+            Passenger(booking=booking, **passenger) for passenger in passengers
+        ])
+        if seat_ids:
+            seat_inventory.confirm_seats(booking, list(zip(seat_ids, created)), seat_owner)
+
+        redemption.redeem_best(booking, locked_tour, discount_code)
+        return booking
+
+    return inventory.book(tour.pk, total_passengers, create_booking)
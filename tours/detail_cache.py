@@ -0,0 +1,116 @@
+# tours/detail_cache.py
+"""
+کش صفحه‌ی جزئیات تور
+
+بخش ثابت صفحه (تور همراه با دسته‌بندی، وسایل نقلیه و گالری، فهرست خدمات
+شامل/غیرشامل و تورهای مشابه) یک بار ساخته و زیر کلیدی نگهداری می‌شود که نسل
+همان تور (برچسب اسلاگ) و نسل داده‌های مشترک Transportation و TourCategory
+(website.fragment_cache) در آن آمده است. ویرایش یک تور یا تصاویر گالری آن فقط
+کش همان تور را نامعتبر می‌کند. تورهای مشابه به تورهای هم‌دسته وابسته‌اند؛ نسل
+دسته‌بندی تور هنگام ساخت در کش ذخیره و هنگام خواندن مقایسه می‌شود.
+
+ظرفیت و قیمت در هر درخواست با یک کوئری کوچک (live_values) خوانده می‌شوند؛
+رزروها ظرفیت را با UPDATE کم می‌کنند و نسل تور را تغییر نمی‌دهند.
+"""
+import hashlib
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+from website import fragment_cache
+from .models import Tour, Transportation, TourCategory
+
+# داده‌های مشترک بین همه‌ی تورها؛ سیگنال‌های افزایش نسل در tours.signals متصل می‌شوند
+DEPENDENCIES = [Transportation, TourCategory]
+_LABELS = [model._meta.label_lower for model in DEPENDENCIES]
+
+RELATED_TOURS = 4
+LIVE_FIELDS = ['available_capacity', 'base_price', 'discount_price', 'departure_datetime']
+
+
+def cache_timeout():
+    # فهرست تورهای مشابه به زمان حال وابسته است (تورهای حرکت کرده حذف می‌شوند)
+    return getattr(settings, 'TOUR_DETAIL_CACHE_TIMEOUT', 60 * 15)
+
+
+def _slug_digest(slug):
+    return hashlib.md5(slug.encode()).hexdigest()
+
+
+def _tour_label(slug):
+    return f'tours.tour:{_slug_digest(slug)}'
+
+
+def _category_label(category_id):
+    # تورهای مشابه (تورهای فعال هم‌دسته)
+    return f'tours.tour_category:{category_id}'
+
+
+def _detail_key(slug):
+    generations = '.'.join(str(g) for g in fragment_cache.get_generations([_tour_label(slug), *_LABELS]))
+    return f'tour_detail:{_slug_digest(slug)}:{generations}'
+
+
+def invalidate(slugs=(), category_ids=()):
+    """نامعتبر کردن کش صفحه‌ی تورها و فهرست تورهای مشابه دسته‌بندی‌ها"""
+    for slug in set(slugs):
+        fragment_cache.bump_label(_tour_label(slug))
+    for category_id in set(category_ids):
+        fragment_cache.bump_label(_category_label(category_id))
+
+
+def build_context(tour):
+    related_tours = list(
+        Tour.objects.filter(
+            category_id=tour.category_id,
+            is_active=True,
+            departure_datetime__gte=timezone.now()
+        ).exclude(id=tour.id)
+        .only('title', 'slug', 'origin_city', 'destination_city', 'featured_image', 'base_price', 'discount_price')
+        [:RELATED_TOURS]
+    )
+    return {
+        'tour': tour,
+        'related_tours': related_tours,
+        'includes_list': tour.get_includes_list(),
+        'excludes_list': tour.get_excludes_list(),
+    }
+
+
+def get_context(slug):
+    """بخش ثابت context صفحه‌ی تور فعال - تور ناموجود: Tour.DoesNotExist"""
+    key = _detail_key(slug)
+    cached = cache.get(key)
+    if cached is not None:
+        category_generation, context = cached
+        if category_generation == fragment_cache.get_generations([_category_label(context['tour'].category_id)])[0]:
+            return context
+
+    tour = Tour.objects.select_related('category', 'departure_transportation', 'return_transportation')\
+        .prefetch_related('gallery_images')\
+        .get(slug=slug, is_active=True)
+    # نسل پیش از کوئری تورهای مشابه خوانده می‌شود تا تغییر هم‌زمان کش کهنه باقی نگذارد
+    category_generation = fragment_cache.get_generations([_category_label(tour.category_id)])[0]
+    context = build_context(tour)
+    cache.set(key, (category_generation, context), cache_timeout())
+    return context
+
+
+def live_values(tour):
+    """ظرفیت، قیمت و امکان رزرو به صورت زنده (یک کوئری)"""
+    values = Tour.objects.filter(pk=tour.pk).values(*LIVE_FIELDS).first() or {
+        field: getattr(tour, field) for field in LIVE_FIELDS
+    }
+    base_price = values['base_price']
+    final_price = values['discount_price'] or base_price
+    has_discount = values['discount_price'] is not None and values['discount_price'] < base_price
+    return {
+        'available_capacity': values['available_capacity'],
+        'base_price': base_price,
+        'final_price': final_price,
+        'has_discount': has_discount,
+        'discount_amount': base_price - final_price if has_discount else Decimal('0'),
+        'can_book': values['available_capacity'] > 0 and values['departure_datetime'] > timezone.now(),
+    }
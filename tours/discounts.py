@@ -0,0 +1,185 @@
+# tours/discounts.py
+"""
+موتور قواعد تخفیف
+
+همه‌ی تخفیف‌های فعال (همراه با تورها و دسته‌بندی‌های M2M و TourDiscount) یک بار
+در حافظه‌ی پروسه به نمایه‌ای از «تور/دسته‌بندی -> قواعد» تبدیل می‌شوند و
+ارزیابی تخفیف یک رزرو یا یک صفحه از تورها بدون کوئری انجام می‌شود.
+
+نمایه به نسل مدل‌های Discount و TourDiscount (website.fragment_cache) وابسته است؛
+ویرایش هر تخفیف نسل را بالا می‌برد و همه‌ی پروسه‌ها در درخواست بعدی نمایه را
+دوباره می‌سازند. شمارنده‌ی استفاده (used_count) در نمایه نیست تا هر رزرو نمایه
+را باطل نکند؛ ظرفیت تخفیف‌های محدود با یک کوئری کوچک (exhausted_ids) و در نهایت
+با UPDATE شرطی هنگام مصرف (tours.redemption.claim) بررسی می‌شود.
+
+قاعده‌ی ترکیب: از میان تخفیف‌های غیرقابل ترکیب فقط بیشترین اعمال می‌شود و
+تخفیف‌های قابل ترکیب (is_stackable) به آن اضافه می‌شوند. تخفیف‌های متصل به تور
+(TourDiscount) خودکار اعمال می‌شوند و سایر تخفیف‌ها فقط با کد.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import F
+from django.utils import timezone
+
+from website import fragment_cache
+from .models import Discount, TourDiscount
+
+# سیگنال‌های افزایش نسل در tours.signals متصل می‌شوند
+_LABELS = [Discount._meta.label_lower, TourDiscount._meta.label_lower]
+
+
+class DiscountRule:
+    """نسخه‌ی فقط‌خواندنی یک تخفیف برای ارزیابی سریع"""
+
+    __slots__ = (
+        'id', 'name', 'code', 'discount_type', 'value', 'apply_to', 'max_discount',
+        'min_booking_value', 'max_uses', 'valid_from', 'valid_to',
+        'is_stackable', 'tour_ids', 'category_ids',
+    )
+
+    def __init__(self, discount):
+        for field in self.__slots__[:-2]:
+            setattr(self, field, getattr(discount, field))
+        self.tour_ids = set()
+        self.category_ids = set()
+
+    def is_valid(self, today):
+        # ظرفیت استفاده جداگانه بررسی می‌شود (exhausted_ids)
+        return self.valid_from <= today <= self.valid_to
+
+    def applies_to(self, tour_id, category_id):
+        if self.apply_to == 'all_tours':
+            return True
+        if self.apply_to == 'specific_tours':
+            return tour_id in self.tour_ids
+        if self.apply_to == 'tour_categories':
+            return category_id in self.category_ids
+        return False
+
+    def amount(self, booking_amount):
+        """همان محاسبه‌ی Discount.calculate_discount_amount"""
+        if booking_amount < self.min_booking_value:
+            return Decimal('0')
+        if self.discount_type == 'percentage':
+            discount = booking_amount * self.value / 100
+        else:
+            discount = self.value
+        if self.max_discount:
+            discount = min(discount, self.max_discount)
+        return min(discount, booking_amount).quantize(Decimal('0.01'))
+
+
+class DiscountIndex:
+    def __init__(self):
+        self.by_code = {}
+        # تخفیف‌های خودکار هر تور به ترتیب اولویت
+        self.by_tour = defaultdict(list)
+
+    @classmethod
+    def build(cls):
+        index = cls()
+        discounts = Discount.objects.filter(is_active=True, valid_to__gte=timezone.now().date())
+        rules = {discount.pk: DiscountRule(discount) for discount in discounts}
+
+        for discount_id, tour_id in Discount.tours.through.objects\
+                .filter(discount_id__in=rules).values_list('discount_id', 'tour_id'):
+            rules[discount_id].tour_ids.add(tour_id)
+        for discount_id, category_id in Discount.categories.through.objects\
+                .filter(discount_id__in=rules).values_list('discount_id', 'tourcategory_id'):
+            rules[discount_id].category_ids.add(category_id)
+
+        for rule in rules.values():
+            index.by_code[rule.code] = rule
+        for tour_id, discount_id in TourDiscount.objects.filter(discount_id__in=rules)\
+                .order_by('-priority').values_list('tour_id', 'discount_id'):
+            index.by_tour[tour_id].append(rules[discount_id])
+        return index
+
+    def find_code(self, code):
+        return self.by_code.get((code or '').strip())
+
+    def candidates(self, tour_id, category_id, code=None, today=None, exclude=()):
+        """قواعد معتبر قابل اعمال: تخفیف‌های خودکار تور و در صورت وجود، کد وارد شده"""
+        today = today or timezone.now().date()
+        rules = list(self.by_tour.get(tour_id, ()))
+        rule = self.find_code(code) if code else None
+        if rule and rule not in rules:
+            rules.append(rule)
+        return [
+            rule for rule in rules
+            if rule.id not in exclude and rule.is_valid(today) and rule.applies_to(tour_id, category_id)
+        ]
+
+    def limited_ids(self, tour_id, category_id, code=None, today=None):
+        """شناسه‌ی قواعد قابل اعمالی که سقف استفاده دارند"""
+        return {rule.id for rule in self.candidates(tour_id, category_id, code, today) if rule.max_uses}
+
+    def best(self, tour_id, category_id, booking_amount, code=None, today=None, exclude=()):
+        """بهترین ترکیب تخفیف‌ها - خروجی: (مبلغ کل تخفیف، [(قاعده، مبلغ)])"""
+        booking_amount = Decimal(booking_amount)
+        applied = []
+        best_single = None
+        for rule in self.candidates(tour_id, category_id, code, today, exclude):
+            amount = rule.amount(booking_amount)
+            if not amount:
+                continue
+            if rule.is_stackable:
+                applied.append((rule, amount))
+            elif best_single is None or amount > best_single[1]:
+                best_single = (rule, amount)
+        if best_single:
+            applied.insert(0, best_single)
+        total = min(sum((amount for _rule, amount in applied), Decimal('0')), booking_amount)
+        return total, applied
+
+
+_index = None
+_index_generations = None
+
+
+def get_index():
+    """نمایه‌ی تخفیف‌ها در حافظه‌ی پروسه؛ با تغییر نسل دوباره ساخته می‌شود"""
+    global _index, _index_generations
+    generations = fragment_cache.get_generations(_LABELS)
+    if _index is None or generations != _index_generations:
+        _index = DiscountIndex.build()
+        _index_generations = generations
+    return _index
+
+
+def exhausted_ids(discount_ids):
+    """تخفیف‌های محدودی که ظرفیت استفاده‌ی آن‌ها تمام شده - از دیتابیس، نه نمایه"""
+    if not discount_ids:
+        return set()
+    return set(
+        Discount.objects.filter(pk__in=discount_ids, max_uses__gt=0, used_count__gte=F('max_uses'))
+        .values_list('pk', flat=True)
+    )
+
+
+def best_discount(tour, booking_amount, code=None):
+    index = get_index()
+    exclude = exhausted_ids(index.limited_ids(tour.pk, tour.category_id, code))
+    return index.best(tour.pk, tour.category_id, booking_amount, code, exclude=exclude)
+
+
+def annotate_prices(tours):
+    """
+    افزودن effective_price و auto_discount به یک صفحه از تورها
+
+    قیمت پایه‌ی هر تور (get_current_price) با تخفیف‌های خودکار آن تور برای یک
+    بزرگسال محاسبه می‌شود.
+    """
+    index = get_index()
+    today = timezone.now().date()
+    # ظرفیت تخفیف‌های محدود کل صفحه با یک کوئری
+    exclude = exhausted_ids(set().union(*(
+        index.limited_ids(tour.pk, tour.category_id, today=today) for tour in tours
+    )))
+    for tour in tours:
+        price = tour.get_current_price()
+        discount, _applied = index.best(tour.pk, tour.category_id, price, today=today, exclude=exclude)
+        tour.auto_discount = discount
+        tour.effective_price = price - discount
+    return tours
@@ -0,0 +1,88 @@
+# tours/expiry.py
+"""
+لغو دسته‌ای رزروهای در انتظار پرداخت که مهلتشان گذشته است
+
+رزروها در دسته‌های chunk_size تایی (هر دسته در یک تراکنش کوتاه) پردازش
+می‌شوند تا حجم زیاد رزروهای منقضی جدول را مدت طولانی قفل نکند:
+  - انتخاب شناسه‌ها با نمایه‌ی (status, expires_at)
+  - تغییر وضعیت با یک UPDATE شرطی (فقط رزروهایی که هنوز pending هستند)؛
+    مراحل بعد فقط روی رزروهایی اجرا می‌شوند که همین UPDATE لغوشان کرده است
+  - بازگرداندن ظرفیت با یک UPDATE تجمیعی برای هر تور
+  - آزاد کردن صندلی‌های رفت و برگشت رزروها
+  - بازگرداندن استفاده‌های تخفیف رزروها
+"""
+from django.db import transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from . import inventory, redemption
+from .models import TourBooking, SelectedSeat, SelectedReturnSeat
+
+CHUNK_SIZE = 1000
+
+
+def expired_bookings(now=None):
+    return TourBooking.objects.filter(status='pending', expires_at__lte=now or timezone.now())
+
+
+def expire_chunk(now, chunk_size=CHUNK_SIZE):
+    """
+    لغو یک دسته - خروجی: (تعداد انتخاب شده، تعداد لغو شده، تعداد مسافر)
+
+    تعداد انتخاب شده ممکن است از لغو شده بیشتر باشد (رزروهایی که هم‌زمان تایید
+    شده‌اند)؛ پایان کار فقط با خالی بودن انتخاب مشخص می‌شود.
+    """
+    with transaction.atomic():
+        # skip_locked: رزروی که هم‌زمان در حال پرداخت است رد می‌شود (در دیتابیس‌های پشتیبان)
+        ids = list(
+            expired_bookings(now).order_by('expires_at', 'pk')
+            .select_for_update(skip_locked=True)
+            .values_list('pk', flat=True)[:chunk_size]
+        )
+        if not ids:
+            return 0, 0, 0
+        selected = len(ids)
+
+        # UPDATE شرطی اول: رزروی که بین SELECT و UPDATE تایید شده لغو نمی‌شود
+        # (skip_locked در SQLite اثری ندارد). ردیف‌های لغو شده با زمان یکتای همین
+        # اجرا علامت می‌خورند و فقط همان‌ها ظرفیت، صندلی و تخفیفشان را پس می‌دهند.
+        stamp = timezone.now()
+        TourBooking.objects.filter(pk__in=ids, status='pending')\
+            .update(status='cancelled', updated_at=stamp)
+        ids = list(
+            TourBooking.objects.filter(pk__in=ids, status='cancelled', updated_at=stamp)
+            .values_list('pk', flat=True)
+        )
+        if not ids:
+            return selected, 0, 0
+
+        per_tour = list(
+            TourBooking.objects.filter(pk__in=ids).order_by()
+            .values('tour_id')
+            .annotate(passengers=Sum(F('adult_count') + F('child_count') + F('infant_count')))
+        )
+
+        passengers = 0
+        for row in per_tour:
+            inventory.release(row['tour_id'], row['passengers'])
+            passengers += row['passengers']
+
+        SelectedSeat.objects.filter(booking_id__in=ids).delete()
+        SelectedReturnSeat.objects.filter(booking_id__in=ids).delete()
+        redemption.release_bookings(ids)
+    return selected, len(ids), passengers
+
+
+def expire_bookings(now=None, chunk_size=CHUNK_SIZE, stdout=None):
+    """لغو همه‌ی رزروهای منقضی - خروجی: (تعداد رزرو، تعداد مسافر)"""
+    now = now or timezone.now()
+    total_bookings = total_passengers = 0
+    while True:
+        selected, bookings, passengers = expire_chunk(now, chunk_size)
+        if not selected:
+            break
+        total_bookings += bookings
+        total_passengers += passengers
+        if stdout and bookings:
+            stdout.write(f'{bookings} رزرو لغو شد')
+    return total_bookings, total_passengers
@@ -1,23 +1,93 @@
 # tours/forms.py
 from django import forms
-from .models import TourBooking, Tour, TourCategory
+from django.core.validators import RegexValidator
+from .models import TourBooking, Tour, TourCategory, Transportation, Passenger
+from .search import DURATION_BUCKETS, PRICE_BUCKETS
 
 class TourSearchForm(forms.Form):
     destination = forms.CharField(required=False, label='مقصد')
-    category = forms.ModelChoiceField(
+    category = forms.ModelMultipleChoiceField(
         queryset=TourCategory.objects.filter(is_active=True),
         required=False,
         label='دسته‌بندی'
     )
+    tour_type = forms.MultipleChoiceField(choices=Tour.TOUR_TYPES, required=False, label='نوع تور')
+    transport = forms.MultipleChoiceField(choices=Transportation.TRANSPORT_TYPES, required=False, label='وسیله نقلیه')
+    month = forms.CharField(
+        required=False,
+        validators=[RegexValidator(r'^\d{4}-\d{2}$')],
+        label='ماه حرکت'
+    )
+    duration = forms.MultipleChoiceField(
+        choices=[(key, label) for key, label, _low, _high in DURATION_BUCKETS],
+        required=False,
+        label='مدت تور'
+    )
+    price_range = forms.MultipleChoiceField(
+        choices=[(key, label) for key, label, _low, _high in PRICE_BUCKETS],
+        required=False,
+        label='بازه قیمت'
+    )
     min_price = forms.DecimalField(required=False, label='حداقل قیمت')
     max_price = forms.DecimalField(required=False, label='حداکثر قیمت')
     departure_date = forms.DateField(required=False, label='تاریخ حرکت')
+    # مقدار نامعتبر در search نادیده گرفته می‌شود
+    sort = forms.CharField(required=False)
 
 class TourBookingForm(forms.ModelForm):
+    # سقف فیلدهای مسافر برای جلوگیری از ساخت فرم‌های بسیار بزرگ
+    MAX_PASSENGERS = 200
+    
+    discount_code = forms.CharField(required=False, max_length=20, label='کد تخفیف')
+    
     class Meta:
         model = TourBooking
         fields = ['adult_count', 'child_count', 'infant_count', 'special_requests']
     
     def __init__(self, *args, **kwargs):
         self.tour = kwargs.pop('tour', None)
-        super().__init__(*args, **kwargs)
\ No newline at end of file
+        super().__init__(*args, **kwargs)
+        # فیلدهای هر مسافر (passenger_{i}_...) بر اساس تعداد ارسال شده
+        for i in range(self._passenger_count()):
+            self.fields[f'passenger_{i}_first_name'] = forms.CharField(max_length=50, label='نام')
+            self.fields[f'passenger_{i}_last_name'] = forms.CharField(max_length=50, label='نام خانوادگی')
+            self.fields[f'passenger_{i}_national_id'] = forms.CharField(max_length=10, required=False, label='کدملی')
+            self.fields[f'passenger_{i}_birth_date'] = forms.DateField(label='تاریخ تولد')
+            self.fields[f'passenger_{i}_gender'] = forms.ChoiceField(choices=Passenger.GENDER_CHOICES, label='جنسیت')
+    
+    def _count(self, name):
+        source = self.data if self.is_bound else self.initial
+        try:
+            return max(int(source.get(name) or 0), 0)
+        except (TypeError, ValueError):
+            return 0
+    
+    def _passenger_count(self):
+        total = self._count('adult_count') + self._count('child_count') + self._count('infant_count')
+        return min(total, self.MAX_PASSENGERS)
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        total = sum(cleaned_data.get(name) or 0 for name in ('adult_count', 'child_count', 'infant_count'))
+        if total > self.MAX_PASSENGERS:
+            raise forms.ValidationError(f'حداکثر {self.MAX_PASSENGERS} مسافر در هر رزرو مجاز است.')
+        if self.tour and total > self.tour.available_capacity:
+            raise forms.ValidationError('ظرفیت کافی موجود نیست.')
+        return cleaned_data
+    
+    def get_passengers(self):
+        """اطلاعات مسافرین به ترتیب بزرگسال، کودک و نوزاد"""
+        adult_count = self.cleaned_data['adult_count']
+        child_count = self.cleaned_data['child_count']
+        passengers = []
+        for i in range(self._passenger_count()):
+            passenger_type = 'adult' if i < adult_count else 'child' if i < adult_count + child_count else 'infant'
+            passengers.append({
+                'first_name': self.cleaned_data[f'passenger_{i}_first_name'],
+                'last_name': self.cleaned_data[f'passenger_{i}_last_name'],
+                'national_id': self.cleaned_data[f'passenger_{i}_national_id'],
+                'date_of_birth': self.cleaned_data[f'passenger_{i}_birth_date'],
+                'gender': self.cleaned_data[f'passenger_{i}_gender'],
+                'passenger_type': passenger_type,
+            })
+        return passengers
\ No newline at end of file
@@ -0,0 +1,65 @@
+# tours/inventory.py
+"""
+مدیریت ظرفیت تورها بدون فروش بیش از ظرفیت
+
+کاهش ظرفیت با یک UPDATE شرطی انجام می‌شود:
+    UPDATE tour SET available_capacity = available_capacity - n
+    WHERE id = ... AND available_capacity >= n
+بنابراین دو رزرو هم‌زمان هرگز نمی‌توانند ظرفیت را منفی کنند و نیازی به
+ذخیره‌ی کل ردیف تور (و تداخل با ویرایش‌های ادمین) نیست.
+update() سیگنال ندارد؛ تقویم مسیرها (route_calendar) از همین‌جا به‌روز می‌شود.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Least
+
+from . import route_calendar
+from .models import Tour
+
+
+class InsufficientCapacity(Exception):
+    """ظرفیت کافی برای رزرو وجود ندارد"""
+
+
+def reserve(tour_id, count):
+    """کم کردن اتمیک ظرفیت - در صورت کمبود ظرفیت InsufficientCapacity"""
+    if count <= 0:
+        raise ValueError('تعداد رزرو باید مثبت باشد')
+    updated = Tour.objects.filter(pk=tour_id, available_capacity__gte=count)\
+        .update(available_capacity=F('available_capacity') - count)
+    if not updated:
+        raise InsufficientCapacity(tour_id)
+    route_calendar.schedule([tour_id])
+
+
+def release(tour_id, count):
+    """بازگرداندن ظرفیت (حداکثر تا ظرفیت کل)"""
+    if count <= 0:
+        return
+    Tour.objects.filter(pk=tour_id).update(
+        available_capacity=Least(F('available_capacity') + count, F('total_capacity'))
+    )
+    route_calendar.schedule([tour_id])
+
+
+def lock_tour(tour_id):
+    """خواندن تور با قفل ردیف (در دیتابیس‌هایی که پشتیبانی می‌کنند) - داخل تراکنش"""
+    return Tour.objects.select_for_update().get(pk=tour_id)
+
+
+def remaining(tour_id):
+    return Tour.objects.filter(pk=tour_id).values_list('available_capacity', flat=True).first()
+
+
+def book(tour_id, count, create_booking):
+    """
+    رزرو ظرفیت و ایجاد رزرو در یک تراکنش
+
+    create_booking با نسخه‌ی قفل‌شده و تازه‌ی تور صدا زده می‌شود. اگر خطا دهد،
+    ظرفیت کم شده هم همراه تراکنش برگردانده می‌شود.
+    """
+    with transaction.atomic():
+        # ابتدا UPDATE شرطی: قفل نوشتن از همان ابتدای تراکنش گرفته می‌شود
+        reserve(tour_id, count)
+        tour = lock_tour(tour_id)
+        return create_booking(tour)
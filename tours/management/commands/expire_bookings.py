@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from tours import expiry
+
+
+class Command(BaseCommand):
+    help = 'لغو رزروهای در انتظار منقضی شده و بازگرداندن ظرفیت و صندلی‌های آن‌ها'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=expiry.CHUNK_SIZE,
+                            help='تعداد رزرو در هر تراکنش')
+        parser.add_argument('--loop', type=int, default=0,
+                            help='اجرای دوره‌ای با فاصله‌ی مشخص (ثانیه)')
+
+    def handle(self, *args, **options):
+        while True:
+            bookings, passengers = expiry.expire_bookings(
+                chunk_size=options['chunk_size'], stdout=self.stdout
+            )
+            self.stdout.write(self.style.SUCCESS(
+                f'{bookings} رزرو منقضی لغو شد و ظرفیت {passengers} مسافر بازگردانده شد'
+            ))
+            if not options['loop']:
+                break
+            time.sleep(options['loop'])
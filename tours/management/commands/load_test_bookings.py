@@ -0,0 +1,99 @@
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, OperationalError, connection
+from django.utils import timezone
+
+from tours import inventory
+from tours.models import Tour, TourBooking
+
+
+class Command(BaseCommand):
+    help = 'آزمون بار هم‌زمان رزرو روی یک تور موقت برای اطمینان از عدم فروش بیش از ظرفیت'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--capacity', type=int, default=100, help='ظرفیت تور آزمایشی')
+        parser.add_argument('--requests', type=int, default=500, help='تعداد کل درخواست‌های رزرو')
+        parser.add_argument('--threads', type=int, default=50, help='تعداد رشته‌های هم‌زمان')
+        parser.add_argument('--party-size', type=int, default=1, help='تعداد مسافر هر رزرو')
+        parser.add_argument('--retries', type=int, default=20,
+                            help='تعداد تلاش مجدد در صورت قفل بودن دیتابیس (SQLite)')
+        parser.add_argument('--keep', action='store_true', help='تور و رزروهای آزمایشی حذف نشوند')
+
+    def handle(self, *args, **options):
+        party_size = options['party_size']
+        stamp = int(time.time() * 1000)
+        user = User.objects.create(username=f'load_test_{stamp}')
+        tour = Tour.objects.create(
+            title='Load test tour', slug=f'load-test-{stamp}',
+            description='-', short_description='-', tour_type='one_way',
+            origin_city='-', destination_city='-', duration_days=1, duration_nights=0,
+            departure_datetime=timezone.now() + timezone.timedelta(days=30),
+            base_price=1, total_capacity=options['capacity'], available_capacity=options['capacity'],
+            featured_image='', includes='-', excludes='-', itinerary='-', is_active=False,
+        )
+
+        barrier = threading.Barrier(min(options['threads'], options['requests']))
+
+        def create_booking(locked_tour):
+            return TourBooking.objects.create(
+                user=user, tour=locked_tour, adult_count=party_size,
+                base_amount=party_size, total_amount=party_size, status='pending',
+            )
+
+        def attempt(index):
+            if index < barrier.parties:
+                # شروع هم‌زمان اولین دسته از درخواست‌ها
+                barrier.wait()
+            try:
+                for attempt_number in range(options['retries'] + 1):
+                    try:
+                        inventory.book(tour.pk, party_size, create_booking)
+                        return 'booked'
+                    except inventory.InsufficientCapacity:
+                        return 'rejected'
+                    except OperationalError:
+                        time.sleep(random.uniform(0.005, 0.02) * (attempt_number + 1))
+                    except DatabaseError:
+                        break
+                return 'error'
+            finally:
+                connection.close()
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            results = Counter(executor.map(attempt, range(options['requests'])))
+        elapsed = time.monotonic() - started
+
+        tour.refresh_from_db()
+        booked_seats = results['booked'] * party_size
+        stored_bookings = TourBooking.objects.filter(tour=tour).count()
+        sold = options['capacity'] - tour.available_capacity
+
+        self.stdout.write(
+            f"{options['requests']} درخواست در {elapsed:.2f} ثانیه: "
+            f"{results['booked']} موفق، {results['rejected']} رد شده، {results['error']} خطا"
+        )
+        self.stdout.write(
+            f'ظرفیت فروخته شده: {sold} از {options["capacity"]} - رزروهای ثبت شده: {stored_bookings}'
+        )
+
+        consistent = (
+            sold == booked_seats and
+            stored_bookings == results['booked'] and
+            sold <= options['capacity']
+        )
+
+        if not options['keep']:
+            TourBooking.objects.filter(tour=tour).delete()
+            tour.delete()
+            user.delete()
+
+        if not consistent:
+            raise CommandError('ناسازگاری ظرفیت: فروش بیش از ظرفیت یا رزرو بدون کاهش ظرفیت')
+        self.stdout.write(self.style.SUCCESS('بدون فروش بیش از ظرفیت'))
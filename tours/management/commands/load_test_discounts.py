@@ -0,0 +1,111 @@
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, OperationalError, connection, transaction
+from django.utils import timezone
+
+from tours import redemption
+from tours.models import Tour, TourBooking, Discount, BookingDiscount
+
+
+class Command(BaseCommand):
+    help = 'آزمون بار هم‌زمان استفاده از یک کد تخفیف موقت برای اطمینان از عدم عبور از حداکثر استفاده'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-uses', type=int, default=50, help='حداکثر استفاده‌ی تخفیف آزمایشی (0 = نامحدود)')
+        parser.add_argument('--requests', type=int, default=300, help='تعداد کل درخواست‌های استفاده')
+        parser.add_argument('--threads', type=int, default=30, help='تعداد رشته‌های هم‌زمان')
+        parser.add_argument('--release', type=int, default=10,
+                            help='تعداد رزروهای موفقی که پس از آزمون لغو می‌شوند')
+        parser.add_argument('--retries', type=int, default=20,
+                            help='تعداد تلاش مجدد در صورت قفل بودن دیتابیس (SQLite)')
+        parser.add_argument('--keep', action='store_true', help='داده‌های آزمایشی حذف نشوند')
+
+    def handle(self, *args, **options):
+        max_uses = options['max_uses']
+        stamp = int(time.time() * 1000)
+        today = timezone.now().date()
+        user = User.objects.create(username=f'load_test_{stamp}')
+        tour = Tour.objects.create(
+            title='Load test tour', slug=f'load-test-{stamp}',
+            description='-', short_description='-', tour_type='one_way',
+            origin_city='-', destination_city='-', duration_days=1, duration_nights=0,
+            departure_datetime=timezone.now() + timezone.timedelta(days=30),
+            base_price=100, total_capacity=options['requests'], available_capacity=options['requests'],
+            featured_image='', includes='-', excludes='-', itinerary='-', is_active=False,
+        )
+        discount = Discount.objects.create(
+            name='Load test', code=f'LT{stamp}'[:20], discount_type='fixed', value=10,
+            max_uses=max_uses, valid_from=today, valid_to=today, is_public=False,
+        )
+
+        barrier = threading.Barrier(min(options['threads'], options['requests']))
+
+        def attempt(index):
+            if index < barrier.parties:
+                # شروع هم‌زمان اولین دسته از درخواست‌ها
+                barrier.wait()
+            try:
+                for attempt_number in range(options['retries'] + 1):
+                    try:
+                        with transaction.atomic():
+                            booking = TourBooking.objects.create(
+                                user=user, tour=tour, base_amount=100, total_amount=90, discount_amount=10,
+                            )
+                            redemption.redeem(booking, discount.pk, 10, discount.code)
+                        return 'redeemed'
+                    except redemption.DiscountExhausted:
+                        return 'rejected'
+                    except OperationalError:
+                        time.sleep(random.uniform(0.005, 0.02) * (attempt_number + 1))
+                    except DatabaseError:
+                        break
+                return 'error'
+            finally:
+                connection.close()
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            results = Counter(executor.map(attempt, range(options['requests'])))
+        elapsed = time.monotonic() - started
+
+        discount.refresh_from_db()
+        ledger = BookingDiscount.objects.filter(discount=discount, released_at__isnull=True).count()
+        self.stdout.write(
+            f"{options['requests']} درخواست در {elapsed:.2f} ثانیه: "
+            f"{results['redeemed']} موفق، {results['rejected']} رد شده، {results['error']} خطا"
+        )
+        self.stdout.write(f'استفاده شده: {discount.used_count} از {max_uses} - ردیف‌های دفتر: {ledger}')
+        consistent = (
+            discount.used_count == results['redeemed'] == ledger and
+            (max_uses == 0 or discount.used_count <= max_uses)
+        )
+
+        # لغو چند رزرو: استفاده‌ها برگردانده می‌شوند و فراخوانی دوباره اثری ندارد
+        to_release = list(
+            TourBooking.objects.filter(applied_discounts__discount=discount)
+            .values_list('pk', flat=True)[:options['release']]
+        )
+        released = redemption.release_bookings(to_release)
+        released_again = redemption.release_bookings(to_release)
+        discount.refresh_from_db()
+        self.stdout.write(f'{released} استفاده برگردانده شد - استفاده‌ی فعلی: {discount.used_count}')
+        consistent = (
+            consistent and released_again == 0 and
+            discount.used_count == results['redeemed'] - released
+        )
+
+        if not options['keep']:
+            TourBooking.objects.filter(tour=tour).delete()
+            discount.delete()
+            tour.delete()
+            user.delete()
+
+        if not consistent:
+            raise CommandError('ناسازگاری: استفاده بیش از حد مجاز یا دفتر ناهماهنگ با شمارنده')
+        self.stdout.write(self.style.SUCCESS('بدون عبور از حداکثر استفاده'))
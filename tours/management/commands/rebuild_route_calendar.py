@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from tours import route_calendar
+
+
+class Command(BaseCommand):
+    help = 'ساخت دوباره‌ی کامل تقویم قیمت و ظرفیت مسیرها از روی تورهای فعال'
+
+    def handle(self, *args, **options):
+        days = route_calendar.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'تقویم مسیرها با {days} روز ساخته شد'))
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:56
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def populate_selected_seat_tour(apps, schema_editor):
+    SelectedSeat = apps.get_model('tours', 'SelectedSeat')
+    TourBooking = apps.get_model('tours', 'TourBooking')
+    SelectedSeat.objects.update(
+        tour=Subquery(TourBooking.objects.filter(pk=OuterRef('booking_id')).values('tour_id')[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tours', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='selectedseat',
+            unique_together=set(),
+        ),
+        migrations.AddField(
+            model_name='selectedseat',
+            name='tour',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='selected_seats', to='tours.tour', verbose_name='تور'),
+        ),
+        migrations.RunPython(populate_selected_seat_tour, migrations.RunPython.noop),
+        migrations.AlterUniqueTogether(
+            name='selectedseat',
+            unique_together={('tour', 'seat', 'is_departure')},
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:58
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tours', '0002_selectedseat_tour'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tourbooking',
+            index=models.Index(fields=['status', 'expires_at'], name='tours_tourb_status_98d327_idx'),
+        ),
+    ]
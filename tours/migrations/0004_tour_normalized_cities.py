@@ -0,0 +1,67 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:59
+
+import re
+
+from django.db import migrations, models
+
+# کپی ثابت یکسان‌ساز در زمان این مایگریشن؛ تغییرات بعدی website.normalization
+# نباید نتیجه‌ی اجرای دوباره‌ی این مایگریشن را عوض کند.
+_CHAR_MAP = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ئ': 'ی',
+    'ك': 'ک',
+    'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ؤ': 'و',
+    '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
+    '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9',
+    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
+    '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
+    '\u200c': None,  # نیم‌فاصله
+    '\u200d': None,
+    '\u0640': None,  # کشیده
+})
+
+# اعراب و علائم تجوید
+_DIACRITICS_RE = re.compile('[\u064b-\u065f\u0670\u06d6-\u06ed]')
+
+
+def normalize(text):
+    """یکسان‌سازی متن فارسی برای نمایه و جستجو"""
+    if not text:
+        return ''
+    text = _DIACRITICS_RE.sub('', text.translate(_CHAR_MAP))
+    return text.lower()
+
+
+def normalize_city(name):
+    return ' '.join(normalize(name).split())
+
+
+def populate_normalized_cities(apps, schema_editor):
+    Tour = apps.get_model('tours', 'Tour')
+    tours = list(Tour.objects.only('origin_city', 'destination_city'))
+    for tour in tours:
+        tour.origin_city_normalized = normalize_city(tour.origin_city)
+        tour.destination_city_normalized = normalize_city(tour.destination_city)
+    Tour.objects.bulk_update(tours, ['origin_city_normalized', 'destination_city_normalized'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tours', '0003_tourbooking_status_expires_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tour',
+            name='destination_city_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='tour',
+            name='origin_city_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=100),
+        ),
+        migrations.RunPython(populate_normalized_cities, migrations.RunPython.noop),
+    ]
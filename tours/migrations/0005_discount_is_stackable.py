@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tours', '0004_tour_normalized_cities'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='discount',
+            name='is_stackable',
+            field=models.BooleanField(default=False, help_text='همراه با تخفیف\u200cهای دیگر اعمال شود', verbose_name='قابل ترکیب'),
+        ),
+    ]
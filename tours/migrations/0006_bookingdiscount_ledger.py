@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tours', '0005_discount_is_stackable'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookingdiscount',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='bookingdiscount',
+            name='released_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='زمان آزادسازی'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-18 11:09
+
+from django.db import migrations, models
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+
+
+def populate_route_days(apps, schema_editor):
+    Tour = apps.get_model('tours', 'Tour')
+    RouteDay = apps.get_model('tours', 'RouteDay')
+    rows = Tour.objects.filter(is_active=True).annotate(date=TruncDate('departure_datetime'))\
+        .values('origin_city_normalized', 'destination_city_normalized', 'date').order_by()\
+        .annotate(
+            min_price=Min(Coalesce('discount_price', 'base_price'), filter=Q(available_capacity__gt=0)),
+            seats_left=Sum('available_capacity'),
+            tour_count=Count('pk'),
+        )
+    RouteDay.objects.bulk_create([
+        RouteDay(
+            origin_city=row['origin_city_normalized'], destination_city=row['destination_city_normalized'],
+            date=row['date'], min_price=row['min_price'], seats_left=row['seats_left'] or 0,
+            tour_count=row['tour_count'],
+        ) for row in rows
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tours', '0006_bookingdiscount_ledger'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RouteDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('origin_city', models.CharField(max_length=100, verbose_name='شهر مبدأ')),
+                ('destination_city', models.CharField(max_length=100, verbose_name='شهر مقصد')),
+                ('date', models.DateField(verbose_name='تاریخ حرکت')),
+                ('min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True, verbose_name='کمترین قیمت')),
+                ('seats_left', models.PositiveIntegerField(default=0, verbose_name='ظرفیت باقیمانده')),
+                ('tour_count', models.PositiveIntegerField(default=0, verbose_name='تعداد تورها')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'روز مسیر',
+                'verbose_name_plural': 'تقویم مسیرها',
+                'constraints': [models.UniqueConstraint(fields=('origin_city', 'destination_city', 'date'), name='unique_route_day')],
+            },
+        ),
+        migrations.RunPython(populate_route_days, migrations.RunPython.noop),
+    ]
@@ -4,6 +4,8 @@ from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
 from django.urls import reverse
 
+from website.normalization import normalize_city
+
 class TourCategory(models.Model):
     """دسته‌بندی تورها"""
     name = models.CharField(max_length=100, verbose_name='نام دسته‌بندی')
@@ -141,6 +143,9 @@ class Tour(models.Model):
     # اطلاعات اصلی
     origin_city = models.CharField(max_length=100, verbose_name='شهر مبدأ')
     destination_city = models.CharField(max_length=100, verbose_name='شهر مقصد')
+    # نسخه‌ی یکسان‌سازی شده‌ی شهرها برای جستجو (در save پر می‌شوند)
+    origin_city_normalized = models.CharField(max_length=100, blank=True, db_index=True, editable=False)
+    destination_city_normalized = models.CharField(max_length=100, blank=True, db_index=True, editable=False)
     duration_days = models.PositiveIntegerField(verbose_name='تعداد روزها')
     duration_nights = models.PositiveIntegerField(verbose_name='تعداد شب‌ها')
     
@@ -215,8 +220,21 @@ class Tour(models.Model):
     def __str__(self):
         return f"{self.title} - {self.origin_city} به {self.destination_city}"
 
+    def save(self, *args, **kwargs):
+        self.origin_city_normalized = normalize_city(self.origin_city)
+        self.destination_city_normalized = normalize_city(self.destination_city)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if 'origin_city' in update_fields:
+                update_fields.add('origin_city_normalized')
+            if 'destination_city' in update_fields:
+                update_fields.add('destination_city_normalized')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+
     def get_absolute_url(self):
-        return reverse('tours:detail', kwargs={'slug': self.slug})
+        return reverse('tours:tour_detail', kwargs={'slug': self.slug})
 
     def is_round_trip(self):
         return self.tour_type == 'round_trip'
@@ -307,15 +325,20 @@ class TourBooking(models.Model):
         verbose_name = 'رزرو تور'
         verbose_name_plural = 'رزروهای تور'
         ordering = ['-created_at']
+        indexes = [
+            # یافتن رزروهای در انتظار منقضی شده (tours.expiry)
+            models.Index(fields=['status', 'expires_at']),
+        ]
 
     def __str__(self):
         return f"{self.booking_reference} - {self.user.get_full_name() or self.user.username}"
 
     def save(self, *args, **kwargs):
         if not self.booking_reference:
-            import random
+            import secrets
             timestamp = int(timezone.now().timestamp())
-            self.booking_reference = f"TR{timestamp}{random.randint(1000, 9999)}"
+            # بخش تصادفی بزرگ‌تر تا رزروهای هم‌زمان در یک ثانیه کد تکراری نگیرند
+            self.booking_reference = f"TR{timestamp}{secrets.token_hex(4).upper()}"
         
         # محاسبه تاریخ انقضا (24 ساعت بعد)
         if not self.expires_at and self.status == 'pending':
@@ -359,6 +382,8 @@ class Passenger(models.Model):
 
 class SelectedSeat(models.Model):
     booking = models.ForeignKey(TourBooking, on_delete=models.CASCADE)
+    # تکرار booking.tour برای یکتایی صندلی در هر تور (نه در کل وسیله نقلیه)
+    tour = models.ForeignKey(Tour, on_delete=models.CASCADE, null=True, related_name='selected_seats', verbose_name='تور')
     seat = models.ForeignKey(Seat, on_delete=models.CASCADE)
     passenger = models.ForeignKey(Passenger, on_delete=models.CASCADE, verbose_name='مسافر')
     is_departure = models.BooleanField(default=True, verbose_name='صندلی رفت')
@@ -366,7 +391,12 @@ class SelectedSeat(models.Model):
     class Meta:
         verbose_name = 'صندلی انتخاب شده'
         verbose_name_plural = 'صندلی‌های انتخاب شده'
-        unique_together = ['seat', 'is_departure']
+        unique_together = ['tour', 'seat', 'is_departure']
+
+    def save(self, *args, **kwargs):
+        if self.tour_id is None and self.booking_id:
+            self.tour_id = self.booking.tour_id
+        super().save(*args, **kwargs)
 
     def __str__(self):
         return f"{self.passenger} - {self.seat.seat_number}"
@@ -415,6 +445,8 @@ class Discount(models.Model):
     # شرایط
     is_active = models.BooleanField(default=True, verbose_name='فعال')
     is_public = models.BooleanField(default=True, verbose_name='نمایش عمومی')
+    is_stackable = models.BooleanField(default=False, verbose_name='قابل ترکیب',
+                                       help_text='همراه با تخفیف‌های دیگر اعمال شود')
     
     # ارتباطات
     tours = models.ManyToManyField('Tour', blank=True, verbose_name='تورهای مشخص')
@@ -450,10 +482,10 @@ class Discount(models.Model):
         if booking_amount < self.min_booking_value:
             return 0
             
-        if self.apply_to == 'specific_tours' and tour and tour not in self.tours.all():
+        if self.apply_to == 'specific_tours' and tour and not self.tours.filter(pk=tour.pk).exists():
             return 0
             
-        if self.apply_to == 'tour_categories' and category and category not in self.categories.all():
+        if self.apply_to == 'tour_categories' and category and not self.categories.filter(pk=category.pk).exists():
             return 0
         
         # محاسبه تخفیف
@@ -476,16 +508,16 @@ class Discount(models.Model):
         if self.apply_to == 'all_tours':
             return True
         elif self.apply_to == 'specific_tours':
-            return tour in self.tours.all()
+            return self.tours.filter(pk=tour.pk).exists()
         elif self.apply_to == 'tour_categories':
-            return tour.category in self.categories.all()
+            return bool(tour.category_id) and self.categories.filter(pk=tour.category_id).exists()
         return False
 
     def use_discount(self):
-        """افزایش شمارنده استفاده"""
-        if self.max_uses > 0:
-            self.used_count += 1
-            self.save()
+        """افزایش اتمیک شمارنده استفاده - در صورت اتمام ظرفیت DiscountExhausted"""
+        from .redemption import claim
+        claim(self.pk)
+        self.refresh_from_db(fields=['used_count'])
 
 class TourDiscount(models.Model):
     """تخفیف‌های خاص هر تور"""
@@ -508,10 +540,40 @@ class BookingDiscount(models.Model):
     discount = models.ForeignKey(Discount, on_delete=models.CASCADE)
     discount_amount = models.DecimalField(max_digits=10, decimal_places=2, verbose_name='مبلغ تخفیف')
     discount_code = models.CharField(max_length=50, blank=True, verbose_name='کد تخفیف استفاده شده')
+    created_at = models.DateTimeField(auto_now_add=True, null=True)
+    # زمان بازگرداندن استفاده (لغو یا انقضای رزرو)
+    released_at = models.DateTimeField(null=True, blank=True, verbose_name='زمان آزادسازی')
     
     class Meta:
         verbose_name = 'تخفیف رزرو'
         verbose_name_plural = 'تخفیف‌های رزرو'
 
     def __str__(self):
-        return f"{self.booking.booking_reference} - {self.discount_amount}"
\ No newline at end of file
+        return f"{self.booking.booking_reference} - {self.discount_amount}"
+
+
+class RouteDay(models.Model):
+    """
+    تقویم مسیرها: خلاصه‌ی تورهای فعال هر مسیر در هر روز
+
+    توسط tours.route_calendar با تغییر تورها و ظرفیت آن‌ها به‌روز می‌شود.
+    """
+    # نام‌های یکسان‌سازی شده (normalize_city)
+    origin_city = models.CharField(max_length=100, verbose_name='شهر مبدأ')
+    destination_city = models.CharField(max_length=100, verbose_name='شهر مقصد')
+    date = models.DateField(verbose_name='تاریخ حرکت')
+    # کمترین قیمت فعلی (discount_price یا base_price) میان تورهای دارای ظرفیت
+    min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True, verbose_name='کمترین قیمت')
+    seats_left = models.PositiveIntegerField(default=0, verbose_name='ظرفیت باقیمانده')
+    tour_count = models.PositiveIntegerField(default=0, verbose_name='تعداد تورها')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'روز مسیر'
+        verbose_name_plural = 'تقویم مسیرها'
+        constraints = [
+            models.UniqueConstraint(fields=['origin_city', 'destination_city', 'date'], name='unique_route_day'),
+        ]
+
+    def __str__(self):
+        return f"{self.origin_city} به {self.destination_city} - {self.date}"
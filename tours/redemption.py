@@ -0,0 +1,88 @@
+# tours/redemption.py
+"""
+استفاده‌ی اتمیک از تخفیف‌ها با دفتر ثبت BookingDiscount
+
+مصرف یک بار از تخفیف با یک UPDATE شرطی انجام می‌شود:
+    UPDATE discount SET used_count = used_count + 1
+    WHERE id = ... AND (max_uses = 0 OR used_count < max_uses)
+و ردیف BookingDiscount در همان تراکنش ثبت می‌شود؛ بنابراین هم‌زمانی رزروها
+هرگز از max_uses عبور نمی‌کند و هر استفاده در دفتر قابل ردیابی است.
+با لغو یا انقضای رزرو، استفاده‌ها (فقط یک بار) برگردانده می‌شوند.
+"""
+from collections import Counter
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from . import discounts
+from .models import Discount, BookingDiscount
+
+
+class DiscountExhausted(Exception):
+    """تخفیف منقضی شده یا ظرفیت استفاده‌ی آن تمام شده است"""
+
+
+def claim(discount_id):
+    """
+    مصرف اتمیک یک بار از تخفیف - در صورت عدم امکان DiscountExhausted
+
+    شمارنده در نمایه‌ی تخفیف‌ها نیست؛ بنابراین مصرف، نمایه را باطل نمی‌کند.
+    """
+    today = timezone.now().date()
+    updated = Discount.objects.filter(
+        Q(max_uses=0) | Q(used_count__lt=F('max_uses')),
+        pk=discount_id, is_active=True, valid_from__lte=today, valid_to__gte=today,
+    ).update(used_count=F('used_count') + 1)
+    if not updated:
+        raise DiscountExhausted(discount_id)
+
+
+def redeem(booking, discount_id, amount, code=''):
+    """مصرف تخفیف و ثبت آن در دفتر رزرو در یک تراکنش"""
+    with transaction.atomic():
+        claim(discount_id)
+        return BookingDiscount.objects.create(
+            booking=booking, discount_id=discount_id, discount_amount=amount, discount_code=code,
+        )
+
+
+def redeem_best(booking, tour, code=None):
+    """
+    اعمال بهترین ترکیب تخفیف‌ها (خودکار + کد) روی رزرو ذخیره شده
+
+    باید داخل تراکنش رزرو صدا زده شود تا در صورت DiscountExhausted کل رزرو
+    برگردانده شود. خروجی: مبلغ کل تخفیف.
+    """
+    total, applied = discounts.best_discount(tour, booking.base_amount, code)
+    code = (code or '').strip()
+    for rule, amount in applied:
+        redeem(booking, rule.id, amount, code if rule.code == code else '')
+    if total:
+        booking.discount_amount = total
+        booking.total_amount = booking.base_amount + booking.tax_amount - total
+        booking.save(update_fields=['discount_amount', 'total_amount'])
+    return total
+
+
+def release_bookings(booking_ids):
+    """
+    بازگرداندن استفاده‌های تخفیف رزروهای لغو/منقضی شده
+
+    ردیف‌های دفتر با یک UPDATE شرطی علامت‌گذاری می‌شوند و برای هر تخفیف یک
+    UPDATE تجمیعی شمارنده را کم می‌کند؛ فراخوانی دوباره اثری ندارد.
+    خروجی: تعداد استفاده‌های برگردانده شده.
+    """
+    with transaction.atomic():
+        entries = BookingDiscount.objects.select_for_update()\
+            .filter(booking_id__in=booking_ids, released_at__isnull=True)
+        rows = list(entries.values_list('pk', 'discount_id'))
+        if not rows:
+            return 0
+        BookingDiscount.objects.filter(pk__in=[pk for pk, _ in rows], released_at__isnull=True)\
+            .update(released_at=timezone.now())
+        for discount_id, uses in Counter(discount_id for _, discount_id in rows).items():
+            Discount.objects.filter(pk=discount_id)\
+                .update(used_count=Greatest(F('used_count') - uses, 0))
+    return len(rows)
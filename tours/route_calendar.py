@@ -0,0 +1,123 @@
+# tours/route_calendar.py
+"""
+تقویم قیمت و ظرفیت مسیرها (جدول RouteDay)
+
+برای هر (مبدأ، مقصد، روز حرکت) کمترین قیمت فعلی، ظرفیت باقیمانده و تعداد
+تورهای فعال نگهداری می‌شود تا تقویم یک ماه با یک کوئری بازه‌ای روی نمایه‌ی
+یکتای جدول خوانده شود.
+
+به‌روزرسانی تدریجی است: با ذخیره/حذف تور (tours.signals) و تغییر ظرفیت
+(tours.inventory) فقط روزهای مسیرهای همان تورها بعد از commit دوباره محاسبه
+می‌شوند. rebuild کل جدول را از نو می‌سازد (دستور rebuild_route_calendar).
+"""
+import datetime
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.db.models.functions import Coalesce, TruncDate
+from django.utils import timezone
+
+from website.normalization import normalize_city
+
+from .models import Tour, RouteDay
+
+FIELDS = ['min_price', 'seats_left', 'tour_count']
+
+
+def route_key(origin_city, destination_city, departure_datetime):
+    """کلید روز مسیر از نام‌های یکسان‌سازی شده و زمان حرکت"""
+    return (origin_city, destination_city, timezone.localdate(departure_datetime))
+
+
+def _aggregate(condition=None):
+    tours = Tour.objects.filter(is_active=True)
+    if condition is not None:
+        tours = tours.filter(condition)
+    return tours.annotate(date=TruncDate('departure_datetime'))\
+        .values('origin_city_normalized', 'destination_city_normalized', 'date')\
+        .order_by()\
+        .annotate(
+            min_price=Min(Coalesce('discount_price', 'base_price'), filter=Q(available_capacity__gt=0)),
+            seats_left=Sum('available_capacity'),
+            tour_count=Count('pk'),
+        )
+
+
+def _route_days(rows):
+    return {
+        (row['origin_city_normalized'], row['destination_city_normalized'], row['date']): RouteDay(
+            origin_city=row['origin_city_normalized'],
+            destination_city=row['destination_city_normalized'],
+            date=row['date'],
+            min_price=row['min_price'],
+            seats_left=row['seats_left'] or 0,
+            tour_count=row['tour_count'],
+        )
+        for row in rows
+    }
+
+
+def _save(days):
+    RouteDay.objects.bulk_create(
+        days, update_conflicts=True,
+        unique_fields=['origin_city', 'destination_city', 'date'],
+        update_fields=FIELDS + ['updated_at'],
+    )
+
+
+def refresh(keys):
+    """محاسبه‌ی دوباره‌ی روزهای مسیر داده شده؛ روزهای بدون تور فعال حذف می‌شوند"""
+    keys = set(keys)
+    if not keys:
+        return
+    condition = reduce(or_, (
+        Q(origin_city_normalized=origin, destination_city_normalized=destination, departure_datetime__date=date)
+        for origin, destination, date in keys
+    ))
+    days = _route_days(_aggregate(condition))
+    with transaction.atomic():
+        if days:
+            _save(list(days.values()))
+        empty = keys - set(days)
+        if empty:
+            RouteDay.objects.filter(reduce(or_, (
+                Q(origin_city=origin, destination_city=destination, date=date)
+                for origin, destination, date in empty
+            ))).delete()
+
+
+def refresh_tours(tour_ids):
+    tours = Tour.objects.filter(pk__in=tour_ids)\
+        .values_list('origin_city_normalized', 'destination_city_normalized', 'departure_datetime')
+    refresh(route_key(*tour) for tour in tours)
+
+
+def schedule(tour_ids):
+    """به‌روزرسانی روزهای مسیر تورها پس از commit تراکنش جاری"""
+    tour_ids = list(tour_ids)
+    transaction.on_commit(lambda: refresh_tours(tour_ids))
+
+
+def rebuild():
+    """ساخت دوباره‌ی کل تقویم - خروجی: تعداد روزهای مسیر"""
+    days = list(_route_days(_aggregate()).values())
+    with transaction.atomic():
+        RouteDay.objects.all().delete()
+        RouteDay.objects.bulk_create(days, batch_size=1000)
+    return len(days)
+
+
+def month_calendar(origin_city, destination_city, year, month):
+    """روزهای دارای تور یک مسیر در یک ماه (از امروز به بعد) با یک کوئری بازه‌ای"""
+    start = datetime.date(year, month, 1)
+    end = datetime.date(year + month // 12, month % 12 + 1, 1)
+    start = max(start, timezone.localdate())
+    return list(
+        RouteDay.objects.filter(
+            origin_city=normalize_city(origin_city),
+            destination_city=normalize_city(destination_city),
+            date__gte=start, date__lt=end,
+        ).order_by('date').values('date', *FIELDS)
+    )
@@ -0,0 +1,205 @@
+# tours/search.py
+"""
+جستجوی تورها با فیلترهای چندگانه (facet)
+
+تعداد تورهای هر گزینه‌ی فیلتر (دسته‌بندی، نوع تور، وسیله نقلیه رفت، ماه حرکت،
+مدت و بازه‌ی قیمت) با یک کوئری گروه‌بندی شده روی ترکیب همه‌ی ابعاد محاسبه
+می‌شود. شمارش هر بعد در پایتون و با اعمال فیلترهای انتخاب شده‌ی سایر ابعاد
+انجام می‌شود؛ بنابراین انتخاب یک گزینه، گزینه‌های دیگر همان بعد را صفر نمی‌کند.
+
+جستجوی شهر مانند قبل بخشی از نام را پیدا می‌کند (contains) اما روی ستون‌های
+یکسان‌سازی شده (حروف کوچک، ی/ک عربی، نیم‌فاصله) انجام می‌شود.
+"""
+from collections import namedtuple, defaultdict
+
+from django.db.models import Case, CharField, Count, Q, Value, When
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+from django.utils.dateformat import format as date_format
+
+from website.normalization import normalize_city
+
+from .models import Tour, TourCategory, Transportation
+
+# (کلید، عنوان، حداقل، حداکثر) - حداکثر None یعنی بدون سقف
+DURATION_BUCKETS = [
+    ('1-3', '۱ تا ۳ روز', 1, 3),
+    ('4-7', '۴ تا ۷ روز', 4, 7),
+    ('8-14', '۸ تا ۱۴ روز', 8, 14),
+    ('15+', 'بیش از ۱۴ روز', 15, None),
+]
+
+PRICE_BUCKETS = [
+    ('0-5m', 'تا ۵ میلیون', 0, 5_000_000),
+    ('5m-10m', '۵ تا ۱۰ میلیون', 5_000_000, 10_000_000),
+    ('10m-20m', '۱۰ تا ۲۰ میلیون', 10_000_000, 20_000_000),
+    ('20m+', 'بیش از ۲۰ میلیون', 20_000_000, None),
+]
+
+SORT_OPTIONS = ['-created_at', 'departure_datetime', '-departure_datetime', 'price', '-price']
+# نام‌های قدیمی پارامتر مرتب‌سازی
+SORT_ALIASES = {'base_price': 'price', '-base_price': '-price'}
+
+# نام هر بعد در پارامترهای جستجو -> ستون گروه‌بندی
+FACETS = {
+    'category': 'category_id',
+    'tour_type': 'tour_type',
+    'transport': 'departure_transportation__transport_type',
+    'month': 'month',
+    'duration': 'duration_bucket',
+    'price_range': 'price_bucket',
+}
+
+FACET_LABELS = {
+    'category': 'دسته‌بندی',
+    'tour_type': 'نوع تور',
+    'transport': 'وسیله نقلیه',
+    'month': 'ماه حرکت',
+    'duration': 'مدت تور',
+    'price_range': 'بازه قیمت',
+}
+
+SearchResult = namedtuple('SearchResult', ['tours', 'facets', 'total'])
+
+
+def _bucket_case(field, buckets, inclusive_max):
+    whens = []
+    for key, _label, low, high in buckets:
+        condition = Q(**{f'{field}__gte': low})
+        if high is not None:
+            condition &= Q(**{f'{field}__lte' if inclusive_max else f'{field}__lt': high})
+        whens.append(When(condition, then=Value(key)))
+    return Case(*whens, default=Value(''), output_field=CharField())
+
+
+def base_queryset():
+    """تورهای فعال آینده با ستون‌های محاسبه شده‌ی ابعاد"""
+    return Tour.objects.filter(is_active=True, departure_datetime__gte=timezone.now()).alias(
+        price=Coalesce('discount_price', 'base_price'),
+    ).annotate(
+        month=TruncMonth('departure_datetime'),
+        duration_bucket=_bucket_case('duration_days', DURATION_BUCKETS, inclusive_max=True),
+        price_bucket=_bucket_case('price', PRICE_BUCKETS, inclusive_max=False),
+    )
+
+
+def _month_key(value):
+    return value.strftime('%Y-%m') if value else ''
+
+
+def _selected(params):
+    """مقادیر انتخاب شده‌ی هر بعد به صورت مجموعه‌ای از رشته‌ها"""
+    selected = {}
+    for name in FACETS:
+        value = params.get(name)
+        if value is None or value == '':
+            continue
+        values = value if isinstance(value, (list, tuple, set)) or hasattr(value, 'model') else [value]
+        values = {str(getattr(v, 'pk', v)) for v in values}
+        if values:
+            selected[name] = values
+    return selected
+
+
+def _facet_filter(name, values):
+    if name == 'month':
+        condition = Q()
+        for value in values:
+            year, month = value.split('-')
+            condition |= Q(departure_datetime__year=int(year), departure_datetime__month=int(month))
+        return condition
+    return Q(**{f'{FACETS[name]}__in': values})
+
+
+def search(params):
+    """
+    جستجوی تورها - params: cleaned_data فرم TourSearchForm (یا دیکشنری مشابه)
+
+    خروجی SearchResult: کوئری‌ست مرتب شده‌ی نتایج، فهرست ابعاد با گزینه‌ها و
+    تعداد هر گزینه و تعداد کل نتایج (بدون کوئری شمارش جداگانه).
+    """
+    tours = base_queryset()
+
+    destination = normalize_city(params.get('destination') or '')
+    if destination:
+        tours = tours.filter(
+            Q(destination_city_normalized__contains=destination) |
+            Q(origin_city_normalized__contains=destination)
+        )
+    if params.get('min_price'):
+        tours = tours.filter(price__gte=params['min_price'])
+    if params.get('max_price'):
+        tours = tours.filter(price__lte=params['max_price'])
+    if params.get('departure_date'):
+        tours = tours.filter(departure_datetime__date=params['departure_date'])
+
+    selected = _selected(params)
+
+    # یک کوئری: تعداد تورها برای هر ترکیب از مقادیر ابعاد
+    rows = list(tours.order_by().values(*FACETS.values()).annotate(count=Count('pk')))
+    for row in rows:
+        row['month'] = _month_key(row['month'])
+
+    counts = {name: defaultdict(int) for name in FACETS}
+    total = 0
+    for row in rows:
+        values = {name: str(row[column]) for name, column in FACETS.items()}
+        misses = [name for name, chosen in selected.items() if values[name] not in chosen]
+        if not misses:
+            total += row['count']
+        for name in FACETS:
+            # شمارش هر بعد با فیلترهای سایر ابعاد
+            if not misses or misses == [name]:
+                counts[name][values[name]] += row['count']
+
+    for name, values in selected.items():
+        tours = tours.filter(_facet_filter(name, values))
+
+    sort = SORT_ALIASES.get(params.get('sort'), params.get('sort'))
+    if sort not in SORT_OPTIONS:
+        sort = '-created_at'
+    tours = tours.select_related('category').order_by(sort, 'pk')
+
+    return SearchResult(tours, _build_facets(counts, selected), total)
+
+
+def _build_facets(counts, selected):
+    category_names = dict(
+        TourCategory.objects.filter(pk__in=[pk for pk in counts['category'] if pk != 'None'])
+        .values_list('pk', 'name')
+    )
+    labels = {
+        'category': {str(pk): name for pk, name in category_names.items()},
+        'tour_type': dict(Tour.TOUR_TYPES),
+        'transport': dict(Transportation.TRANSPORT_TYPES),
+        'duration': {key: label for key, label, _low, _high in DURATION_BUCKETS},
+        'price_range': {key: label for key, label, _low, _high in PRICE_BUCKETS},
+    }
+    # ترتیب ثابت گزینه‌ها برای بعدهای بازه‌ای
+    order = {
+        'duration': [key for key, *_ in DURATION_BUCKETS],
+        'price_range': [key for key, *_ in PRICE_BUCKETS],
+    }
+
+    facets = []
+    for name, values in counts.items():
+        keys = [key for key in values if key not in ('', 'None')]
+        if name in order:
+            keys.sort(key=order[name].index)
+        else:
+            keys.sort()
+        options = []
+        for key in keys:
+            if name == 'month':
+                year, month = key.split('-')
+                label = date_format(timezone.datetime(int(year), int(month), 1), 'F Y')
+            else:
+                label = labels[name].get(key, key)
+            options.append({
+                'value': key,
+                'label': label,
+                'count': values[key],
+                'selected': key in selected.get(name, ()),
+            })
+        facets.append({'name': name, 'label': FACET_LABELS[name], 'options': options})
+    return facets
@@ -0,0 +1,283 @@
+# tours/seat_inventory.py
+"""
+موجودی صندلی هر تور (به تفکیک رفت و برگشت)
+
+وضعیت صندلی‌ها دیگر به پرچم سراسری Seat.is_available وابسته نیست؛ هر
+حرکت (تور + مسیر رفت/برگشت) موجودی جداگانه دارد:
+  - صندلی‌های فروخته شده به صورت یک bitmap (عدد صحیح) در کش نگهداری
+    می‌شوند و در صورت نبودن، از جدول SelectedSeat ساخته می‌شوند.
+  - نگه‌داشتن موقت (hold) هر صندلی یک کلید جداگانه با TTL است که با
+    cache.add به صورت انحصاری گرفته می‌شود و خودبه‌خود منقضی می‌شود.
+  - holdهای فعال نقشه مستقیماً از همین کلیدها خوانده می‌شوند (بدون خلاصه‌ی
+    مشترکی که با خواندن-تغییر-نوشتن هم‌زمان خراب شود).
+خواندن نقشه‌ی صندلی دو get_many از کش است (صندلی‌ها و bitmap، سپس holdها).
+
+انحصاری بودن hold به اتمیک بودن cache.add وابسته است (Redis/Memcached). کش
+فایلی (FileBasedCache) add را با یک get و set جداگانه انجام می‌دهد و ممکن است
+دو کاربر هم‌زمان یک صندلی را نگه دارند؛ holdها را با TOUR_SEAT_HOLD_CACHE روی
+یک کش اتمیک ببرید. در هر حال یکتایی (tour, seat, is_departure) در دیتابیس
+آخرین مانع است و confirm_seats تداخل را به SeatUnavailable تبدیل می‌کند.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from .models import Seat, SelectedSeat, Tour
+
+LEGS = ('departure', 'return')
+
+
+class SeatUnavailable(Exception):
+    """صندلی فروخته شده یا در اختیار کاربر دیگری است"""
+
+    def __init__(self, seat_ids):
+        super().__init__(seat_ids)
+        self.seat_ids = list(seat_ids)
+
+
+def hold_seconds():
+    return getattr(settings, 'TOUR_SEAT_HOLD_SECONDS', 600)
+
+
+def _holds():
+    # کش holdها باید add اتمیک داشته باشد (توضیح بالای فایل)
+    return caches[getattr(settings, 'TOUR_SEAT_HOLD_CACHE', 'default')]
+
+
+# --- کلیدهای کش ---
+
+def _tour_key(tour_id):
+    return f'seat_inv:tour:{tour_id}'
+
+
+def _seats_key(transportation_id):
+    return f'seat_inv:seats:{transportation_id}'
+
+
+def _booked_key(tour_id, leg, transportation_id):
+    return f'seat_inv:booked:{tour_id}:{leg}:{transportation_id}'
+
+
+def _hold_key(tour_id, leg, seat_id):
+    return f'seat_inv:hold:{tour_id}:{leg}:{seat_id}'
+
+
+# --- ساخت داده‌ها از دیتابیس (فقط در صورت نبودن در کش) ---
+
+def get_transportation_id(tour_id, leg='departure'):
+    """وسیله نقلیه‌ی رفت/برگشت تور از کش - در صورت نبودن تور Tour.DoesNotExist"""
+    legs = cache.get(_tour_key(tour_id))
+    if legs is None:
+        row = Tour.objects.filter(pk=tour_id)\
+            .values_list('departure_transportation_id', 'return_transportation_id').first()
+        if row is None:
+            raise Tour.DoesNotExist(tour_id)
+        legs = dict(zip(LEGS, row))
+        cache.set(_tour_key(tour_id), legs, None)
+    return legs[leg]
+
+
+def _load_seats(transportation_id):
+    """صندلی‌های فعال وسیله نقلیه به ترتیب ثابت (اندیس هر صندلی = بیت آن در bitmap)"""
+    seats = list(
+        Seat.objects.filter(transportation_id=transportation_id, is_active=True)
+        .order_by('pk')
+        .values('id', 'seat_number', 'seat_class', 'row', 'column', 'features', 'price_modifier')
+    )
+    for seat in seats:
+        seat['price_modifier'] = float(seat['price_modifier'])
+    cache.set(_seats_key(transportation_id), seats, None)
+    return seats
+
+
+def _load_booked(tour_id, leg, seats):
+    seat_index = {seat['id']: i for i, seat in enumerate(seats)}
+    bitmap = 0
+    for seat_id in SelectedSeat.objects.filter(tour_id=tour_id, is_departure=(leg == 'departure'))\
+            .values_list('seat_id', flat=True):
+        if seat_id in seat_index:
+            bitmap |= 1 << seat_index[seat_id]
+    return bitmap
+
+
+def _state(tour_id, leg):
+    """صندلی‌ها، bitmap فروخته‌ها و holdهای فعال - بدون کوئری وقتی کش گرم است"""
+    transportation_id = get_transportation_id(tour_id, leg)
+    if not transportation_id:
+        return [], 0, {}
+
+    seats_key = _seats_key(transportation_id)
+    booked_key = _booked_key(tour_id, leg, transportation_id)
+    values = cache.get_many([seats_key, booked_key])
+
+    seats = values.get(seats_key)
+    if seats is None:
+        seats = _load_seats(transportation_id)
+    booked = values.get(booked_key)
+    if booked is None:
+        booked = _load_booked(tour_id, leg, seats)
+        cache.set(booked_key, booked, None)
+
+    # holdهای منقضی شده با TTL خود کلید از کش حذف شده‌اند
+    hold_keys = {_hold_key(tour_id, leg, seat['id']): seat['id'] for seat in seats}
+    holds = {hold_keys[key]: owner for key, owner in _holds().get_many(list(hold_keys)).items()}
+    return seats, booked, holds
+
+
+# --- API عمومی ---
+
+def seat_map(tour_id, leg='departure', owner=None):
+    """نقشه‌ی صندلی‌ها با وضعیت available / held / mine / booked برای هر صندلی"""
+    seats, booked, holds = _state(tour_id, leg)
+    result = []
+    for i, seat in enumerate(seats):
+        if booked >> i & 1:
+            status = 'booked'
+        elif seat['id'] in holds:
+            status = 'mine' if owner and holds[seat['id']] == owner else 'held'
+        else:
+            status = 'available'
+        result.append(dict(seat, status=status))
+    return result
+
+
+def availability(tour_id, leg='departure', owner=None):
+    """وضعیت فشرده: فقط شناسه‌ی صندلی‌های غیرآزاد (برای نقشه‌ی ثابت seat_maps)"""
+    seats, booked, holds = _state(tour_id, leg)
+    result = {'booked': [], 'held': [], 'mine': []}
+    for i, seat in enumerate(seats):
+        if booked >> i & 1:
+            result['booked'].append(seat['id'])
+        elif seat['id'] in holds:
+            result['mine' if owner and holds[seat['id']] == owner else 'held'].append(seat['id'])
+    return result
+
+
+def hold_seats(tour_id, seat_ids, owner, leg='departure'):
+    """
+    نگه‌داشتن موقت صندلی‌ها برای owner - همه یا هیچ
+
+    در صورت در دسترس نبودن هر صندلی، holdهای گرفته شده آزاد و SeatUnavailable
+    صادر می‌شود. تمدید hold قبلی همان owner مجاز است.
+    """
+    seats, booked, holds = _state(tour_id, leg)
+    seat_index = {seat['id']: i for i, seat in enumerate(seats)}
+    ttl = hold_seconds()
+    expires_at = time.time() + ttl
+
+    unavailable = [
+        seat_id for seat_id in seat_ids
+        if seat_id not in seat_index or booked >> seat_index[seat_id] & 1
+    ]
+    if unavailable:
+        raise SeatUnavailable(unavailable)
+
+    holds_cache = _holds()
+    acquired = []
+    for seat_id in seat_ids:
+        key = _hold_key(tour_id, leg, seat_id)
+        if holds_cache.add(key, owner, ttl):
+            acquired.append(seat_id)
+        elif holds_cache.get(key) == owner and holds_cache.touch(key, ttl):
+            # تمدید hold قبلی همان owner (بدون بازنویسی مقدار)
+            acquired.append(seat_id)
+        else:
+            unavailable.append(seat_id)
+
+    if unavailable:
+        _release(tour_id, leg, acquired, owner)
+        raise SeatUnavailable(unavailable)
+
+    return expires_at
+
+
+def _release(tour_id, leg, seat_ids, owner):
+    released = []
+    if owner is None:
+        return released
+    holds_cache = _holds()
+    for seat_id in seat_ids:
+        key = _hold_key(tour_id, leg, seat_id)
+        if holds_cache.get(key) == owner:
+            holds_cache.delete(key)
+            released.append(seat_id)
+    return released
+
+
+def release_seats(tour_id, seat_ids, owner, leg='departure'):
+    """آزاد کردن holdهای owner"""
+    return _release(tour_id, leg, seat_ids, owner)
+
+
+def confirm_seats(booking, assignments, owner, leg='departure'):
+    """
+    تبدیل holdها به SelectedSeat - assignments: [(seat_id, passenger), ...]
+
+    باید داخل تراکنش رزرو صدا زده شود؛ یکتایی (tour, seat, is_departure) در
+    دیتابیس مانع فروش دوباره‌ی صندلی در شرایط رقابتی می‌شود.
+    """
+    seat_ids = [seat_id for seat_id, _ in assignments]
+    holds = _holds().get_many([_hold_key(booking.tour_id, leg, seat_id) for seat_id in seat_ids])
+    missing = [
+        seat_id for seat_id in seat_ids
+        if holds.get(_hold_key(booking.tour_id, leg, seat_id)) != owner
+    ]
+    if missing:
+        raise SeatUnavailable(missing)
+
+    is_departure = leg == 'departure'
+    try:
+        # savepoint: خطای یکتایی تراکنش رزرو را خراب نمی‌کند و به SeatUnavailable تبدیل می‌شود
+        with transaction.atomic():
+            SelectedSeat.objects.bulk_create([
+                SelectedSeat(
+                    booking=booking, tour_id=booking.tour_id, seat_id=seat_id,
+                    passenger=passenger, is_departure=is_departure,
+                )
+                for seat_id, passenger in assignments
+            ])
+    except IntegrityError:
+        taken = list(
+            SelectedSeat.objects.filter(tour_id=booking.tour_id, is_departure=is_departure, seat_id__in=seat_ids)
+            .values_list('seat_id', flat=True)
+        )
+        raise SeatUnavailable(taken or seat_ids)
+
+    tour_id = booking.tour_id
+
+    def after_commit():
+        # bulk_create سیگنال ندارد؛ bitmap اینجا نامعتبر می‌شود
+        release_seats(tour_id, seat_ids, owner, leg)
+        invalidate_booked(tour_id)
+
+    transaction.on_commit(after_commit)
+
+
+# --- نامعتبر کردن کش (از سیگنال‌ها) ---
+
+def invalidate_booked(tour_id):
+    """حذف bitmap فروخته‌ها؛ در خواندن بعدی از دیتابیس ساخته می‌شود"""
+    try:
+        keys = [_booked_key(tour_id, leg, get_transportation_id(tour_id, leg)) for leg in LEGS]
+    except Tour.DoesNotExist:
+        return
+    cache.delete_many(keys)
+
+
+def invalidate_tour(tour_id):
+    """تغییر وسیله نقلیه‌ی تور: نگاشت و bitmapهای قبلی کنار گذاشته می‌شوند"""
+    invalidate_booked(tour_id)
+    cache.delete(_tour_key(tour_id))
+
+
+def invalidate_seats(transportation_id):
+    """حذف فهرست صندلی‌ها و bitmapهای تورهای وابسته (اندیس بیت‌ها به فهرست وابسته است)"""
+    cache.delete(_seats_key(transportation_id))
+    tours = Tour.objects.filter(
+        Q(departure_transportation_id=transportation_id) | Q(return_transportation_id=transportation_id)
+    ).values_list('pk', flat=True)
+    for tour_id in tours:
+        invalidate_booked(tour_id)
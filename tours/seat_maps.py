@@ -0,0 +1,180 @@
+# tours/seat_maps.py
+"""
+ساخت صندلی‌ها از طرح چیدمان و نقشه‌ی صندلی از پیش سریال شده
+
+generate_seats: صندلی‌های یک وسیله نقلیه را از SeatLayout (ردیف × ستون، با
+راهرو) با یک bulk_create می‌سازد.
+
+get_document: نقشه‌ی ثابت صندلی‌ها (شبکه، کلاس، ویژگی و تغییر قیمت) به صورت
+JSON آماده در کش نگهداری می‌شود. کلید کش نسخه‌ی نقشه‌ی همان وسیله نقلیه را
+دارد و هر تغییر طرح یا صندلی نسخه را بالا می‌برد؛ رابط رزرو نقشه را یک بار
+دریافت می‌کند و فقط وضعیت صندلی‌ها (seat_inventory) را دوره‌ای می‌پرسد.
+"""
+import json
+import string
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+
+from . import seat_inventory
+from .models import Seat, SeatLayout
+
+DOCUMENT_TIMEOUT = 60 * 60 * 24
+
+
+def _version_key(transportation_id):
+    return f'seat_map_ver:{transportation_id}'
+
+
+def _document_key(transportation_id, version):
+    return f'seat_map:{transportation_id}:{version}'
+
+
+def get_version(transportation_id):
+    key = _version_key(transportation_id)
+    version = cache.get(key)
+    if version is None:
+        # مقدار اولیه وابسته به زمان تا پس از حذف کلید نسخه‌ی قدیمی تکرار نشود
+        cache.add(key, time.time_ns() // 1000, None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(transportation_id):
+    """نامعتبر کردن نقشه‌ی صندلی و فهرست صندلی‌های موجودی یک وسیله نقلیه"""
+    try:
+        cache.incr(_version_key(transportation_id))
+    except ValueError:
+        cache.set(_version_key(transportation_id), time.time_ns() // 1000, None)
+    seat_inventory.invalidate_seats(transportation_id)
+
+
+# --- ساخت صندلی‌ها از طرح ---
+
+def column_label(column):
+    """برچسب ستون: A، B، ... (پس از Z عدد)"""
+    if column <= len(string.ascii_uppercase):
+        return string.ascii_uppercase[column - 1]
+    return str(column)
+
+
+def column_index(label):
+    """
+    شماره‌ی ستون از برچسب: «12» -> 12، «A» -> 1، «AA» -> 27 (مبنای ۲۶)
+
+    برچسب‌های دستی نامعتبر (مثل «A1» یا خالی) None برمی‌گردانند.
+    """
+    label = (label or '').strip().upper()
+    if label.isdigit():
+        return int(label) or None
+    if not label or any(char not in string.ascii_uppercase for char in label):
+        return None
+    index = 0
+    for char in label:
+        index = index * 26 + string.ascii_uppercase.index(char) + 1
+    return index
+
+
+def layout_seats(layout, seat_class='economy'):
+    """صندلی‌های طرح (ذخیره نشده) به ترتیب ردیف و ستون"""
+    seats = []
+    for row in range(1, layout.rows + 1):
+        for column in range(1, layout.columns + 1):
+            features = []
+            if column in (1, layout.columns):
+                features.append('window')
+            if layout.aisle_after_column and column in (layout.aisle_after_column, layout.aisle_after_column + 1):
+                features.append('aisle')
+            if row == 1:
+                features.append('front')
+            elif row == layout.rows:
+                features.append('back')
+            label = column_label(column)
+            seats.append(Seat(
+                transportation_id=layout.transportation_id,
+                seat_number=f'{row}{label}',
+                seat_class=seat_class,
+                row=row,
+                column=label,
+                features=features,
+            ))
+    return seats
+
+
+def generate_seats(layout, seat_class='economy', prune=False):
+    """
+    ساخت صندلی‌های طرح با یک bulk_create - صندلی‌های موجود دست نمی‌خورند
+
+    prune: صندلی‌های خارج از طرح غیرفعال می‌شوند.
+    خروجی: (تعداد صندلی‌های جدید، تعداد صندلی‌های غیرفعال شده)
+    """
+    seats = layout_seats(layout, seat_class)
+    numbers = [seat.seat_number for seat in seats]
+    with transaction.atomic():
+        existing = set(
+            Seat.objects.filter(transportation_id=layout.transportation_id, seat_number__in=numbers)
+            .values_list('seat_number', flat=True)
+        )
+        created = Seat.objects.bulk_create(
+            [seat for seat in seats if seat.seat_number not in existing],
+            batch_size=500,
+        )
+        deactivated = 0
+        if prune:
+            deactivated = Seat.objects.filter(transportation_id=layout.transportation_id, is_active=True)\
+                .exclude(seat_number__in=numbers).update(is_active=False)
+        # bulk_create و update سیگنال ندارند
+        transportation_id = layout.transportation_id
+        transaction.on_commit(lambda: bump_version(transportation_id))
+    return len(created), deactivated
+
+
+# --- نقشه‌ی صندلی ---
+
+def build_document(transportation_id, version):
+    layout = SeatLayout.objects.filter(transportation_id=transportation_id)\
+        .values('rows', 'columns', 'aisle_after_column').first()
+    seats = Seat.objects.filter(transportation_id=transportation_id, is_active=True)\
+        .values_list('id', 'seat_number', 'row', 'column', 'seat_class', 'features', 'price_modifier')
+
+    rows = [
+        [pk, number, row, column_index(column), seat_class, features, float(price_modifier)]
+        for pk, number, row, column, seat_class, features, price_modifier in seats
+    ]
+    # ترتیب با شماره‌ی ستون (نه برچسب متنی آن: «27» پیش از «A» و «10» پیش از «9» می‌آید)؛
+    # ستون‌های نامعتبر به ترتیب شناسه در انتهای ردیف خود قرار می‌گیرند
+    rows.sort(key=lambda seat: (seat[2], seat[3] is None, seat[3] or 0, seat[0]))
+    last_column = {}
+    for seat in rows:
+        if seat[3] is None:
+            seat[3] = last_column.get(seat[2], 0) + 1
+        last_column[seat[2]] = seat[3]
+    if layout is None:
+        layout = {
+            'rows': max((seat[2] for seat in rows), default=0),
+            'columns': max((seat[3] for seat in rows), default=0),
+            'aisle_after_column': 0,
+        }
+    return {
+        'transportation': transportation_id,
+        'version': version,
+        **layout,
+        'classes': dict(Seat.SEAT_CLASSES),
+        'features': dict(Seat.SEAT_FEATURES),
+        # [شناسه، شماره، ردیف، ستون، کلاس، ویژگی‌ها، تغییر قیمت]
+        'seats': rows,
+    }
+
+
+def get_document(transportation_id):
+    """نقشه‌ی صندلی به صورت JSON آماده - خروجی: (نسخه، متن JSON)"""
+    version = get_version(transportation_id)
+    key = _document_key(transportation_id, version)
+    content = cache.get(key)
+    if content is None:
+        content = json.dumps(
+            build_document(transportation_id, version), ensure_ascii=False, separators=(',', ':')
+        )
+        cache.set(key, content, DOCUMENT_TIMEOUT)
+    return version, content
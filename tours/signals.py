@@ -0,0 +1,125 @@
+# tours/signals.py
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+
+from website import fragment_cache
+from tours import detail_cache, redemption, route_calendar, seat_inventory, seat_maps
+from tours.models import Tour, TourBooking, TourImage, Seat, SeatLayout, SelectedSeat, Discount, TourDiscount
+
+# نسل تخفیف‌ها برای بازسازی نمایه‌ی tours.discounts در همه‌ی پروسه‌ها
+fragment_cache.track(Discount, TourDiscount)
+# نسل داده‌های مشترک کش صفحه‌ی جزئیات (tours.detail_cache)؛ نسل هر تور جداگانه است
+fragment_cache.track(*detail_cache.DEPENDENCIES)
+
+
+def _invalidate_details(slugs, category_ids=()):
+    detail_cache.invalidate(slugs, category_ids)
+    # پس از commit دوباره، تا خواننده‌ای که در این فاصله داده‌ی قدیمی را کش کرده نادیده گرفته شود
+    transaction.on_commit(lambda: detail_cache.invalidate(slugs, category_ids))
+
+
+@receiver([post_save, post_delete], sender=SelectedSeat)
+def invalidate_booked_seats(sender, instance, raw=False, **kwargs):
+    """تغییر صندلی‌های فروخته شده: bitmap تور بعد از commit دوباره ساخته می‌شود"""
+    if raw or not instance.tour_id:
+        return
+    tour_id = instance.tour_id
+    transaction.on_commit(lambda: seat_inventory.invalidate_booked(tour_id))
+
+
+@receiver([post_save, post_delete], sender=Seat)
+@receiver([post_save, post_delete], sender=SeatLayout)
+def invalidate_seat_map(sender, instance, raw=False, **kwargs):
+    """تغییر صندلی یا طرح وسیله نقلیه: نسخه‌ی نقشه، فهرست صندلی‌ها و bitmapهای وابسته نامعتبر می‌شوند"""
+    if raw:
+        return
+    transportation_id = instance.transportation_id
+    transaction.on_commit(lambda: seat_maps.bump_version(transportation_id))
+
+
+@receiver([post_save, post_delete], sender=Tour)
+def invalidate_tour_transportation(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    tour_id = instance.pk
+    transaction.on_commit(lambda: seat_inventory.invalidate_tour(tour_id))
+
+
+@receiver(pre_save, sender=Tour)
+def remember_route_day(sender, instance, raw=False, **kwargs):
+    """
+    روز مسیر، اسلاگ و دسته‌بندی قبلی تور (در صورت تغییر، روز مسیر قبلی و کش
+    صفحه‌ی اسلاگ و تورهای مشابه دسته‌بندی قبلی هم به‌روز می‌شوند)
+    """
+    if raw or instance.pk is None:
+        return
+    previous = Tour.objects.filter(pk=instance.pk)\
+        .values_list('origin_city_normalized', 'destination_city_normalized', 'departure_datetime',
+                     'slug', 'category_id').first()
+    instance._previous_route_day = route_calendar.route_key(*previous[:3]) if previous else None
+    instance._previous_detail = previous[3:] if previous else None
+
+
+@receiver([post_save, post_delete], sender=Tour)
+def invalidate_tour_detail(sender, instance, raw=False, **kwargs):
+    """ذخیره یا حذف تور: فقط کش صفحه‌ی همین تور و تورهای مشابه دسته‌بندی آن"""
+    if raw:
+        return
+    slugs, category_ids = {instance.slug}, {instance.category_id}
+    previous = getattr(instance, '_previous_detail', None)
+    if previous:
+        slugs.add(previous[0])
+        category_ids.add(previous[1])
+    _invalidate_details(slugs, category_ids)
+
+
+def _gallery_slugs(image):
+    return set(
+        Tour.objects.filter(Q(pk=image.tour_id) | Q(gallery_images=image)).values_list('slug', flat=True)
+    )
+
+
+@receiver(post_save, sender=TourImage)
+@receiver(pre_delete, sender=TourImage)
+def invalidate_gallery(sender, instance, raw=False, **kwargs):
+    """تغییر تصویر گالری: کش صفحه‌ی تورهایی که آن را نمایش می‌دهند"""
+    # pre_delete: پس از حذف، ردیف‌های M2M گالری دیگر وجود ندارند
+    if raw or instance.pk is None:
+        return
+    _invalidate_details(_gallery_slugs(instance))
+
+
+@receiver(m2m_changed, sender=Tour.gallery_images.through)
+def invalidate_gallery_links(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        _invalidate_details({instance.slug})
+    elif action == 'pre_clear':
+        _invalidate_details(_gallery_slugs(instance))
+    else:
+        _invalidate_details(set(Tour.objects.filter(pk__in=pk_set).values_list('slug', flat=True)))
+
+
+@receiver(post_save, sender=Tour)
+@receiver(post_delete, sender=Tour)
+def refresh_route_days(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    keys = {route_calendar.route_key(
+        instance.origin_city_normalized, instance.destination_city_normalized, instance.departure_datetime
+    )}
+    previous = getattr(instance, '_previous_route_day', None)
+    if previous:
+        keys.add(previous)
+    transaction.on_commit(lambda: route_calendar.refresh(keys))
+
+
+@receiver(post_save, sender=TourBooking)
+def release_discounts_on_cancel(sender, instance, raw=False, **kwargs):
+    """لغو یا عودت رزرو: استفاده‌های تخفیف آن برگردانده می‌شوند (فقط یک بار)"""
+    if raw or instance.status not in ('cancelled', 'refunded'):
+        return
+    redemption.release_bookings([instance.pk])
@@ -0,0 +1,14 @@
+from django.contrib.sitemaps import Sitemap
+from tours.models import Tour
+
+
+class TourSitemap(Sitemap):
+    changefreq = "daily"
+    priority = 0.8
+    lastmod_field = 'updated_at'
+
+    def items(self):
+        return Tour.objects.filter(is_active=True).order_by('pk')
+
+    def lastmod(self, obj):
+        return obj.updated_at
@@ -1,3 +1,211 @@
-from django.test import TestCase
+import datetime
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from . import expiry, seat_inventory, seat_maps
+from .models import (
+    BookingDiscount, Discount, Passenger, Seat, SelectedSeat, Tour, TourBooking, Transportation,
+)
+
+LOCMEM_CACHE = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ExpireBookingsTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='traveler')
+        self.transportation = Transportation.objects.create(name='bus', transport_type='bus', capacity=4)
+        self.seats = [
+            Seat.objects.create(transportation=self.transportation, seat_number=f'A{i}', row=1, column=i)
+            for i in range(1, 3)
+        ]
+        self.tour = Tour.objects.create(
+            title='tour', slug='tour', description='-', short_description='-', tour_type='one_way',
+            origin_city='a', destination_city='b', duration_days=1, duration_nights=0,
+            departure_datetime=timezone.now() + datetime.timedelta(days=3),
+            base_price=100, total_capacity=10, available_capacity=8,
+            featured_image='x.jpg', includes='-', excludes='-', itinerary='-', is_active=True,
+            departure_transportation=self.transportation,
+        )
+        self.discount = Discount.objects.create(
+            name='d', code='D1', discount_type='percentage', value=10, used_count=2,
+            valid_from=datetime.date.today(), valid_to=datetime.date.today() + datetime.timedelta(days=30),
+        )
+        expired = timezone.now() - datetime.timedelta(minutes=1)
+        self.bookings = []
+        for seat in self.seats:
+            booking = TourBooking.objects.create(
+                user=self.user, tour=self.tour, adult_count=1, base_amount=100, total_amount=100,
+                status='pending', expires_at=expired,
+            )
+            passenger = Passenger.objects.create(
+                booking=booking, first_name='a', last_name='b',
+                date_of_birth=datetime.date(1990, 1, 1), gender='male',
+            )
+            SelectedSeat.objects.create(booking=booking, tour=self.tour, seat=seat,
+                                        passenger=passenger, is_departure=True)
+            BookingDiscount.objects.create(booking=booking, discount=self.discount, discount_amount=10)
+            self.bookings.append(booking)
+
+    def test_expires_pending_bookings(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(expiry.expire_bookings(), (2, 2))
+
+        self.tour.refresh_from_db()
+        self.discount.refresh_from_db()
+        self.assertEqual(self.tour.available_capacity, 10)
+        self.assertEqual(self.discount.used_count, 0)
+        self.assertFalse(SelectedSeat.objects.exists())
+
+    def test_booking_confirmed_before_update_keeps_its_resources(self):
+        confirmed = self.bookings[0]
+
+        def confirm_first(execute, sql, params, many, context):
+            # پرداخت هم‌زمان: درست پیش از UPDATE لغو، رزرو اول تایید می‌شود
+            if sql.startswith('UPDATE "tours_tourbooking"') and 'cancelled' in params:
+                TourBooking.objects.filter(pk=confirmed.pk).update(status='confirmed')
+            return execute(sql, params, many, context)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with connection.execute_wrapper(confirm_first):
+                self.assertEqual(expiry.expire_bookings(), (1, 1))
+
+        confirmed.refresh_from_db()
+        self.tour.refresh_from_db()
+        self.discount.refresh_from_db()
+        self.assertEqual(confirmed.status, 'confirmed')
+        self.assertEqual(self.tour.available_capacity, 9)
+        self.assertEqual(self.discount.used_count, 1)
+        self.assertEqual(list(SelectedSeat.objects.values_list('booking_id', flat=True)), [confirmed.pk])
+        self.assertFalse(BookingDiscount.objects.get(booking=confirmed).released_at)
+
+    def test_short_chunk_does_not_stop_expiry(self):
+        confirmed = self.bookings[0]
+
+        def confirm_first(execute, sql, params, many, context):
+            if sql.startswith('UPDATE "tours_tourbooking"') and 'cancelled' in params:
+                TourBooking.objects.filter(pk=confirmed.pk).update(status='confirmed')
+            return execute(sql, params, many, context)
+
+        # دسته‌ی اول یک رزرو دارد که پیش از UPDATE تایید می‌شود (صفر لغو)
+        with self.captureOnCommitCallbacks(execute=True):
+            with connection.execute_wrapper(confirm_first):
+                self.assertEqual(expiry.expire_bookings(chunk_size=1), (1, 1))
+
+        self.assertEqual(TourBooking.objects.get(pk=self.bookings[1].pk).status, 'cancelled')
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class SeatInventoryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(username='traveler')
+        self.transportation = Transportation.objects.create(name='bus', transport_type='bus', capacity=4)
+        self.seats = [
+            Seat.objects.create(transportation=self.transportation, seat_number=f'A{i}', row=1, column=i)
+            for i in range(1, 4)
+        ]
+        self.tour = Tour.objects.create(
+            title='tour', slug='tour', description='-', short_description='-', tour_type='one_way',
+            origin_city='a', destination_city='b', duration_days=1, duration_nights=0,
+            departure_datetime=timezone.now() + datetime.timedelta(days=3),
+            base_price=100, total_capacity=10, available_capacity=10,
+            featured_image='x.jpg', includes='-', excludes='-', itinerary='-', is_active=True,
+            departure_transportation=self.transportation,
+        )
+
+    def statuses(self, owner=None):
+        return [seat['status'] for seat in seat_inventory.seat_map(self.tour.pk, owner=owner)]
+
+    def booking_with_passenger(self):
+        booking = TourBooking.objects.create(
+            user=self.user, tour=self.tour, adult_count=1, base_amount=100, total_amount=100,
+        )
+        passenger = Passenger.objects.create(
+            booking=booking, first_name='a', last_name='b',
+            date_of_birth=datetime.date(1990, 1, 1), gender='male',
+        )
+        return booking, passenger
+
+    def test_hold_is_exclusive_and_all_or_nothing(self):
+        first, second, third = [seat.pk for seat in self.seats]
+        seat_inventory.hold_seats(self.tour.pk, [first, second], 'u1')
+
+        with self.assertRaises(seat_inventory.SeatUnavailable) as raised:
+            seat_inventory.hold_seats(self.tour.pk, [third, second], 'u2')
+        self.assertEqual(raised.exception.seat_ids, [second])
+        # صندلی سوم که در همان درخواست گرفته شده بود آزاد شده است
+        self.assertEqual(self.statuses('u1'), ['mine', 'mine', 'available'])
+        self.assertEqual(self.statuses('u2'), ['held', 'held', 'available'])
+
+        # تمدید hold همان owner
+        seat_inventory.hold_seats(self.tour.pk, [first], 'u1')
+        self.assertEqual(seat_inventory.release_seats(self.tour.pk, [first, second], 'u2'), [])
+        self.assertEqual(seat_inventory.release_seats(self.tour.pk, [first], 'u1'), [first])
+        self.assertEqual(self.statuses(), ['available', 'held', 'available'])
+
+    def test_confirm_marks_seats_booked(self):
+        seat_id = self.seats[0].pk
+        seat_inventory.hold_seats(self.tour.pk, [seat_id], 'u1')
+        booking, passenger = self.booking_with_passenger()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            seat_inventory.confirm_seats(booking, [(seat_id, passenger)], 'u1')
+
+        self.assertEqual(self.statuses('u1'), ['booked', 'available', 'available'])
+        with self.assertRaises(seat_inventory.SeatUnavailable):
+            seat_inventory.hold_seats(self.tour.pk, [seat_id], 'u2')
+
+    def test_confirm_without_hold_is_rejected(self):
+        booking, passenger = self.booking_with_passenger()
+        with self.assertRaises(seat_inventory.SeatUnavailable):
+            seat_inventory.confirm_seats(booking, [(self.seats[0].pk, passenger)], 'u1')
+
+    def test_double_sold_seat_raises_seat_unavailable(self):
+        seat_id = self.seats[0].pk
+        sold, passenger = self.booking_with_passenger()
+        SelectedSeat.objects.create(booking=sold, tour=self.tour, seat_id=seat_id,
+                                    passenger=passenger, is_departure=True)
+        # دو hold هم‌زمان روی کش غیر اتمیک: owner دوم هم صندلی را در اختیار دارد
+        booking, other = self.booking_with_passenger()
+        seat_inventory._holds().set(seat_inventory._hold_key(self.tour.pk, 'departure', seat_id), 'u2')
+
+        with self.assertRaises(seat_inventory.SeatUnavailable) as raised:
+            seat_inventory.confirm_seats(booking, [(seat_id, other)], 'u2')
+        self.assertEqual(raised.exception.seat_ids, [seat_id])
+        # تراکنش رزرو همچنان قابل استفاده است
+        self.assertEqual(SelectedSeat.objects.filter(seat_id=seat_id).count(), 1)
+
+    def test_booked_bitmap_follows_selected_seats(self):
+        booking, passenger = self.booking_with_passenger()
+        with self.captureOnCommitCallbacks(execute=True):
+            selected = SelectedSeat.objects.create(booking=booking, tour=self.tour, seat=self.seats[1],
+                                                   passenger=passenger, is_departure=True)
+        self.assertEqual(self.statuses(), ['available', 'booked', 'available'])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            selected.delete()
+        self.assertEqual(self.statuses(), ['available', 'available', 'available'])
+
+
+class SeatMapDocumentTests(TestCase):
+    def test_column_index_parses_manual_labels(self):
+        self.assertEqual(
+            [seat_maps.column_index(label) for label in ['A', 'z', 'AA', 'AB', '12', 'A1', '', '0']],
+            [1, 26, 27, 28, 12, None, None, None],
+        )
+
+    def test_seats_ordered_by_numeric_column(self):
+        transportation = Transportation.objects.create(name='bus', transport_type='bus', capacity=8)
+        for column in ['A1', '10', 'B', 'A', 'AA', '9']:
+            Seat.objects.create(transportation=transportation, seat_number=f'1{column}', row=1, column=column)
+
+        document = seat_maps.build_document(transportation.pk, 1)
+        self.assertEqual(
+            [(seat[1], seat[3]) for seat in document['seats']],
+            [('1A', 1), ('1B', 2), ('19', 9), ('110', 10), ('1AA', 27), ('1A1', 28)],
+        )
@@ -10,6 +10,12 @@ urlpatterns = [
     path('<slug:slug>/booking/', views.tour_booking, name='tour_booking'),
     path('<slug:slug>/quick-booking/', views.quick_booking, name='quick_booking'),    
     path('booking/<str:booking_reference>/', views.booking_detail, name='booking_detail'),
+    path('api/search/', views.tour_search_api, name='tour_search_api'),
+    path('api/calendar/', views.route_calendar_api, name='route_calendar'),
     path('api/seats/<int:tour_id>/', views.get_available_seats, name='get_available_seats'),
+    path('api/seats/<int:tour_id>/status/', views.seat_status, name='seat_status'),
+    path('api/seats/<int:tour_id>/hold/', views.hold_seats, name='hold_seats'),
+    path('api/seat-map/<int:transportation_id>/', views.seat_map, name='seat_map'),
+    path('api/seats/<int:tour_id>/release/', views.release_seats, name='release_seats'),
     path('api/apply-discount/', views.apply_discount, name='apply_discount'),
 ]
\ No newline at end of file
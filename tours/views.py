@@ -1,112 +1,85 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.db.models import Q
-from django.http import JsonResponse
+from django.http import HttpResponse, JsonResponse, Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views.decorators.http import require_POST
 from django.core.paginator import Paginator
 from django.utils import timezone
-from .models import Tour, TourCategory, TourBooking, Seat, Passenger, Discount
+from .models import Tour, TourCategory, TourBooking, Seat
 from .forms import TourSearchForm, TourBookingForm
+from . import booking as booking_pipeline
+from . import detail_cache, discounts, inventory, redemption, route_calendar, search, seat_inventory, seat_maps
 from decimal import Decimal
+import datetime
 
 
-def tour_list(request):
-    """لیست تورها با فیلترهای پیشرفته - نسخه اصلاح شده"""
-    try:
-        # ابتدا بررسی می‌کنیم فیلد departure_datetime وجود دارد یا نه
-        tours = Tour.objects.filter(is_active=True)
-        
-        # اگر فیلد departure_datetime وجود دارد، فیلتر زمانی اعمال کن
-        if hasattr(Tour.objects.first(), 'departure_datetime'):
-            tours = tours.filter(departure_datetime__gte=timezone.now())
-        else:
-            # اگر فیلد وجود ندارد، فقط تورهای فعال را نشان بده
-            tours = tours.filter(is_active=True)
-            messages.warning(request, 'سیستم در حال به‌روزرسانی است. برخی امکانات موقتاً غیرفعال هستند.')
-        
-        # اعمال فیلترها
-        form = TourSearchForm(request.GET)
-        if form.is_valid():
-            destination = form.cleaned_data.get('destination')
-            category = form.cleaned_data.get('category')
-            min_price = form.cleaned_data.get('min_price')
-            max_price = form.cleaned_data.get('max_price')
-            
-            if destination:
-                tours = tours.filter(
-                    Q(destination_city__icontains=destination) | 
-                    Q(origin_city__icontains=destination)
-                )
-            if category:
-                tours = tours.filter(category=category)
-            if min_price:
-                tours = tours.filter(base_price__gte=min_price)
-            if max_price:
-                tours = tours.filter(base_price__lte=max_price)
-        
-        # مرتب‌سازی ایمن
-        sort_by = request.GET.get('sort', '-created_at')  # تغییر به created_at به عنوان پیش‌فرض
-        
-        # فقط اگر فیلد وجود دارد، مرتب‌سازی کن
-        if hasattr(Tour.objects.first(), 'departure_datetime') and sort_by in ['-departure_datetime', 'departure_datetime']:
-            tours = tours.order_by(sort_by)
-        elif sort_by in ['base_price', '-base_price'] and hasattr(Tour.objects.first(), 'base_price'):
-            tours = tours.order_by(sort_by)
-        else:
-            tours = tours.order_by('-created_at')
-        
-        # صفحه‌بندی
-        paginator = Paginator(tours, 12)
-        page_number = request.GET.get('page')
-        tours_page = paginator.get_page(page_number)
-        
-        categories = TourCategory.objects.filter(is_active=True)
-        
-        context = {
-            'tours': tours_page,
-            'categories': categories,
-            'form': form,
-            'sort_by': sort_by,
-        }
-        return render(request, 'tours/tour_list.html', context)
-        
-    except Exception as e:
-        # اگر خطایی رخ داد، صفحه خطا نمایش داده شود
-        return render(request, 'tours/error.html', {
-            'message': 'سیستم در حال به‌روزرسانی است. لطفاً چند دقیقه دیگر تلاش کنید.'
-        })
-
-def tour_detail(request, slug):
-    """صفحه جزئیات تور - نسخه اصلاح شده"""
-    """صفحه جزئیات تور با قابلیت خرید"""
-    tour = get_object_or_404(Tour, slug=slug, is_active=True)
+def tour_list(request, category_slug=None):
+    """لیست تورها با فیلترهای چندگانه و تعداد نتایج هر گزینه"""
+    form = TourSearchForm(request.GET)
+    params = dict(form.cleaned_data) if form.is_valid() else {}
+    if category_slug:
+        params['category'] = [get_object_or_404(TourCategory, slug=category_slug, is_active=True)]
+    result = search.search(params)
+    
+    # صفحه‌بندی - تعداد کل از کوئری فیلترها به دست آمده است
+    paginator = Paginator(result.tours, 12)
+    paginator.count = result.total
+    tours_page = paginator.get_page(request.GET.get('page'))
+    discounts.annotate_prices(tours_page.object_list)
     
-    # محاسبه قیمت نهایی با تخفیف
-    final_price = tour.get_current_price()
-    has_discount = tour.discount_price is not None and tour.discount_price < tour.base_price
+    context = {
+        'tours': tours_page,
+        'facets': result.facets,
+        'total': result.total,
+        'form': form,
+        'sort_by': request.GET.get('sort', '-created_at'),
+    }
+    return render(request, 'tours/tour_list.html', context)
+
+def tour_search_api(request):
+    """جستجوی فوری تورها - نتایج صفحه و تعداد گزینه‌های هر فیلتر به صورت JSON"""
+    form = TourSearchForm(request.GET)
+    if not form.is_valid():
+        return JsonResponse({'success': False, 'errors': form.errors}, status=400)
     
-    # تورهای مرتبط
-    related_tours = Tour.objects.filter(
-        category=tour.category, 
-        is_active=True,
-        departure_datetime__gte=timezone.now()
-    ).exclude(id=tour.id)[:4]
+    result = search.search(form.cleaned_data)
+    paginator = Paginator(result.tours, 12)
+    paginator.count = result.total
+    page = paginator.get_page(request.GET.get('page'))
+    discounts.annotate_prices(page.object_list)
     
-    # بررسی امکان رزرو
-    can_book = (
-        tour.available_capacity > 0 and 
-        tour.departure_datetime > timezone.now()
-    )
+    return JsonResponse({
+        'success': True,
+        'total': result.total,
+        'page': page.number,
+        'num_pages': paginator.num_pages,
+        'facets': result.facets,
+        'tours': [{
+            'id': tour.pk,
+            'title': tour.title,
+            'url': tour.get_absolute_url(),
+            'origin_city': tour.origin_city,
+            'destination_city': tour.destination_city,
+            'departure_datetime': tour.departure_datetime.isoformat(),
+            'duration': tour.get_duration_display(),
+            'category': tour.category.name if tour.category else None,
+            'price': float(tour.get_current_price()),
+            'effective_price': float(tour.effective_price),
+            'image': tour.featured_image.url if tour.featured_image else None,
+        } for tour in page],
+    })
+
+def tour_detail(request, slug):
+    """صفحه جزئیات تور با قابلیت خرید - بخش ثابت از کش، ظرفیت و قیمت زنده"""
+    try:
+        context = detail_cache.get_context(slug)
+    except Tour.DoesNotExist:
+        raise Http404
     
     context = {
-        'tour': tour,
-        'related_tours': related_tours,
-        'can_book': can_book,
-        'final_price': final_price,
-        'has_discount': has_discount,
-        'discount_amount': tour.base_price - final_price if has_discount else Decimal('0'),
-        'includes_list': tour.get_includes_list(),
-        'excludes_list': tour.get_excludes_list(),
+        **context,
+        **detail_cache.live_values(context['tour']),
         'user_authenticated': request.user.is_authenticated,
     }
     return render(request, 'tours/tour_detail.html', context)
@@ -117,33 +90,27 @@ def quick_booking(request, slug):
     tour = get_object_or_404(Tour, slug=slug, is_active=True)
     
     if request.method == 'POST':
-        adult_count = int(request.POST.get('adult_count', 1))
-        
-        # بررسی ظرفیت
-        if tour.available_capacity < adult_count:
-            messages.error(request, 'ظرفیت کافی موجود نیست.')
+        try:
+            adult_count = int(request.POST.get('adult_count', 1))
+        except (TypeError, ValueError):
+            adult_count = 0
+        if adult_count < 1:
+            messages.error(request, 'تعداد مسافران نامعتبر است.')
             return redirect('tours:tour_detail', slug=slug)
         
         try:
-            # ایجاد رزرو
-            booking = TourBooking.objects.create(
-                user=request.user,
-                tour=tour,
-                adult_count=adult_count,
-                child_count=0,
-                infant_count=0,
-                base_amount=tour.get_current_price() * adult_count,
-                total_amount=tour.get_current_price() * adult_count,
-                status='pending'
-            )
-            
-            # کاهش ظرفیت
-            tour.available_capacity -= adult_count
-            tour.save()
+            # کاهش اتمیک ظرفیت و ایجاد رزرو در یک تراکنش (با تخفیف‌های خودکار تور)
+            booking = booking_pipeline.book(tour, request.user, adult_count=adult_count)
             
             messages.success(request, f'رزرو شما با کد {booking.booking_reference} ثبت شد!')
             return redirect('tours:booking_detail', booking_reference=booking.booking_reference)
             
+        except booking_pipeline.BookingError as e:
+            messages.error(request, str(e))
+        except inventory.InsufficientCapacity:
+            messages.error(request, 'ظرفیت کافی موجود نیست.')
+        except redemption.DiscountExhausted:
+            messages.error(request, 'ظرفیت استفاده از تخفیف این تور به پایان رسیده است. لطفاً دوباره تلاش کنید.')
         except Exception as e:
             messages.error(request, f'خطا در ثبت رزرو: {str(e)}')
     
@@ -172,45 +139,30 @@ def tour_booking(request, slug):
         form = TourBookingForm(request.POST, tour=tour)
         if form.is_valid():
             try:
-                # ایجاد رزرو
-                booking = form.save(commit=False)
-                booking.user = request.user
-                booking.tour = tour
-                
-                # محاسبه قیمت
-                adult_count = form.cleaned_data['adult_count']
-                child_count = form.cleaned_data['child_count']
-                infant_count = form.cleaned_data['infant_count']
-                
-                base_amount = (
-                    adult_count * tour.base_price +
-                    (child_count * tour.child_price if tour.child_price else 0) +
-                    (infant_count * tour.infant_price if tour.infant_price else 0)
+                # اعتبارسنجی، ظرفیت، مسافرین، صندلی‌ها و تخفیف در یک تراکنش
+                booking = booking_pipeline.book(
+                    tour, request.user,
+                    adult_count=form.cleaned_data['adult_count'],
+                    child_count=form.cleaned_data['child_count'],
+                    infant_count=form.cleaned_data['infant_count'],
+                    passengers=form.get_passengers(),
+                    seat_ids=_parse_seat_ids(request.POST.get('selected_seats', '')),
+                    seat_owner=_seat_owner(request, create=True),
+                    discount_code=form.cleaned_data['discount_code'],
+                    special_requests=form.cleaned_data['special_requests'],
                 )
                 
-                booking.base_amount = base_amount
-                booking.total_amount = base_amount - booking.discount_amount
-                booking.save()
-                
-                # افزودن مسافرین
-                for i in range(adult_count + child_count + infant_count):
-                    passenger_type = 'adult' if i < adult_count else 'child' if i < adult_count + child_count else 'infant'
-                    Passenger.objects.create(
-                        booking=booking,
-                        first_name=form.cleaned_data[f'passenger_{i}_first_name'],
-                        last_name=form.cleaned_data[f'passenger_{i}_last_name'],
-                        date_of_birth=form.cleaned_data[f'passenger_{i}_birth_date'],
-                        gender=form.cleaned_data[f'passenger_{i}_gender'],
-                        passenger_type=passenger_type
-                    )
-                
-                # به‌روزرسانی ظرفیت تور
-                tour.available_capacity -= (adult_count + child_count + infant_count)
-                tour.save()
-                
                 messages.success(request, f'رزرو شما با کد {booking.booking_reference} ثبت شد!')
                 return redirect('tours:booking_detail', booking_reference=booking.booking_reference)
                 
+            except booking_pipeline.BookingError as e:
+                messages.error(request, str(e))
+            except inventory.InsufficientCapacity:
+                messages.error(request, 'ظرفیت کافی موجود نیست.')
+            except redemption.DiscountExhausted:
+                messages.error(request, 'کد تخفیف دیگر قابل استفاده نیست.')
+            except seat_inventory.SeatUnavailable:
+                messages.error(request, 'زمان نگه‌داری صندلی‌های انتخابی به پایان رسیده یا توسط دیگری رزرو شده‌اند.')
             except Exception as e:
                 messages.error(request, f'خطا در ثبت رزرو: {str(e)}')
     else:
@@ -237,52 +189,166 @@ def booking_detail(request, booking_reference):
     }
     return render(request, 'tours/booking_detail.html', context)
 
+def _seat_owner(request, create=False):
+    """
+    شناسه‌ی نگه‌دارنده‌ی صندلی: کاربر یا نشست مهمان
+
+    نشست فقط در درخواست‌های تغییر (create=True) ساخته می‌شود؛ پرس‌وجوهای دوره‌ای
+    مهمانِ بدون نشست None می‌گیرند و ردیفی در جدول نشست‌ها نمی‌سازند.
+    """
+    if request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    if not request.session.session_key:
+        if not create:
+            return None
+        request.session.save()
+    return f'session:{request.session.session_key}'
+
+
+def _parse_seat_ids(value):
+    return [int(seat_id) for seat_id in str(value).split(',') if seat_id.strip().isdigit()]
+
+
+def _seat_leg(request):
+    leg = request.GET.get('leg') or request.POST.get('leg') or 'departure'
+    if leg not in seat_inventory.LEGS:
+        raise Http404
+    return leg
+
+
 def get_available_seats(request, tour_id):
-    """دریافت صندلی‌های خالی برای تور"""
-    tour = get_object_or_404(Tour, id=tour_id)
+    """وضعیت صندلی‌های تور (رفت یا برگشت) از موجودی همان تور - بدون کوئری در کش گرم"""
+    leg = _seat_leg(request)
+    try:
+        seats = seat_inventory.seat_map(tour_id, leg, owner=_seat_owner(request))
+    except Tour.DoesNotExist:
+        raise Http404
+    
+    return JsonResponse({
+        'seats': seats,
+        'hold_seconds': seat_inventory.hold_seconds(),
+    })
+
+
+def route_calendar_api(request):
+    """تقویم یک ماه از مسیر: کمترین قیمت، ظرفیت باقیمانده و تعداد تورهای هر روز"""
+    origin = request.GET.get('origin', '').strip()
+    destination = request.GET.get('destination', '').strip()
+    if not origin or not destination:
+        return JsonResponse({'success': False, 'error': 'مبدأ و مقصد الزامی است'}, status=400)
+    try:
+        month = datetime.datetime.strptime(request.GET['month'], '%Y-%m').date() \
+            if request.GET.get('month') else timezone.localdate()
+    except ValueError:
+        return JsonResponse({'success': False, 'error': 'ماه نامعتبر است (YYYY-MM)'}, status=400)
+    
+    days = route_calendar.month_calendar(origin, destination, month.year, month.month)
+    return JsonResponse({
+        'success': True,
+        'origin': origin,
+        'destination': destination,
+        'month': f'{month.year:04d}-{month.month:02d}',
+        'days': [{
+            'date': day['date'].isoformat(),
+            'min_price': float(day['min_price']) if day['min_price'] is not None else None,
+            'seats_left': day['seats_left'],
+            'tour_count': day['tour_count'],
+        } for day in days],
+    })
+
+
+def seat_map(request, transportation_id):
+    """نقشه‌ی ثابت صندلی‌های وسیله نقلیه (JSON از پیش ساخته شده، نسخه‌دار)"""
+    version, content = seat_maps.get_document(transportation_id)
+    etag = f'"{version}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        response = HttpResponse(content, content_type='application/json')
+    response['ETag'] = etag
+    # با تغییر طرح، آدرس همراه ?v= تغییر می‌کند
+    patch_cache_control(response, public=True, max_age=60 * 60 if request.GET.get('v') else 60)
+    return response
+
+
+def seat_status(request, tour_id):
+    """وضعیت فشرده‌ی صندلی‌های تور برای پرسش دوره‌ای همراه با نسخه‌ی نقشه"""
+    leg = _seat_leg(request)
+    try:
+        transportation_id = seat_inventory.get_transportation_id(tour_id, leg)
+        status = seat_inventory.availability(tour_id, leg, owner=_seat_owner(request))
+    except Tour.DoesNotExist:
+        raise Http404
     
-    if not tour.departure_transportation:
-        return JsonResponse({'seats': []})
+    return JsonResponse({
+        'transportation': transportation_id,
+        'map_version': seat_maps.get_version(transportation_id) if transportation_id else None,
+        **status,
+    })
+
+
+@require_POST
+def hold_seats(request, tour_id):
+    """نگه‌داشتن موقت صندلی‌ها تا تکمیل فرم مسافرین"""
+    leg = _seat_leg(request)
+    seat_ids = _parse_seat_ids(request.POST.get('seat_ids', ''))
+    if not seat_ids:
+        return JsonResponse({'success': False, 'message': 'صندلی انتخاب نشده است'}, status=400)
     
-    seats = tour.departure_transportation.seats.filter(
-        is_available=True,
-        is_active=True
-    ).values('id', 'seat_number', 'seat_class', 'row', 'column', 'features', 'price_modifier')
+    try:
+        expires_at = seat_inventory.hold_seats(tour_id, seat_ids, _seat_owner(request, create=True), leg)
+    except Tour.DoesNotExist:
+        raise Http404
+    except seat_inventory.SeatUnavailable as e:
+        return JsonResponse({
+            'success': False,
+            'unavailable': e.seat_ids,
+            'message': 'برخی صندلی‌ها در دسترس نیستند'
+        }, status=409)
     
-    return JsonResponse({'seats': list(seats)})
+    return JsonResponse({'success': True, 'seat_ids': seat_ids, 'expires_at': int(expires_at)})
+
+
+@require_POST
+def release_seats(request, tour_id):
+    """آزاد کردن صندلی‌های نگه‌داشته شده"""
+    leg = _seat_leg(request)
+    seat_ids = _parse_seat_ids(request.POST.get('seat_ids', ''))
+    released = seat_inventory.release_seats(tour_id, seat_ids, _seat_owner(request), leg)
+    return JsonResponse({'success': True, 'released': released})
 
 def apply_discount(request):
-    """اعمال کد تخفیف"""
+    """اعمال کد تخفیف - بررسی کد از نمایه‌ی حافظه بدون کوئری"""
     if request.method == 'POST':
         discount_code = request.POST.get('discount_code')
-        tour_id = request.POST.get('tour_id')
+        index = discounts.get_index()
         
-        try:
-            discount = Discount.objects.get(
-                code=discount_code,
-                is_active=True,
-                valid_from__lte=timezone.now().date(),
-                valid_to__gte=timezone.now().date()
-            )
-            
-            tour = Tour.objects.get(id=tour_id)
-            
-            if discount.can_apply_to_tour(tour):
-                return JsonResponse({
-                    'success': True,
-                    'discount_amount': float(discount.value),
-                    'message': 'کد تخفیف اعمال شد'
-                })
-            else:
-                return JsonResponse({
-                    'success': False,
-                    'message': 'این کد تخفیف برای این تور قابل استفاده نیست'
-                })
-                
-        except Discount.DoesNotExist:
+        if not index.find_code(discount_code):
             return JsonResponse({
                 'success': False,
                 'message': 'کد تخفیف نامعتبر است'
             })
+        
+        tour = Tour.objects.filter(id=request.POST.get('tour_id'))\
+            .only('id', 'category_id', 'base_price', 'discount_price').first()
+        if tour is None:
+            return JsonResponse({'success': False, 'message': 'درخواست نامعتبر'})
+        
+        # مبلغ فقط از قیمت فعلی تور (نه مقدار ارسالی کاربر)
+        total, applied = discounts.best_discount(tour, tour.get_current_price(), code=discount_code)
+        code_amount = next(
+            (amount for rule, amount in applied if rule.code == discount_code.strip()), None
+        )
+        if code_amount is not None:
+            # discount_amount: فقط سهم همین کد؛ total_discount_amount: همراه تخفیف‌های خودکار تور
+            return JsonResponse({
+                'success': True,
+                'discount_amount': float(code_amount),
+                'total_discount_amount': float(total),
+                'message': f'کد تخفیف اعمال شد - مجموع تخفیف با احتساب تخفیف‌های خودکار تور: {total:,.0f} تومان'
+            })
+        return JsonResponse({
+            'success': False,
+            'message': 'این کد تخفیف برای این تور قابل استفاده نیست'
+        })
     
-    return JsonResponse({'success': False, 'message': 'درخواست نامعتبر'})
\ No newline at end of file
+    return JsonResponse({'success': False, 'message': 'درخواست نامعتبر'})
@@ -0,0 +1,127 @@
+# website/fragment_cache.py
+"""
+کش نسخه‌دار قطعه‌های قالب (template fragment)
+
+هر تگ کش‌شده مدل‌هایی را که به آنها وابسته است اعلام می‌کند. خروجی تگ زیر
+کلیدی ذخیره می‌شود که «نسل» (generation) هر مدل وابسته در آن آمده است.
+ذخیره یا حذف هر رکورد از این مدل‌ها نسل آن مدل را یک واحد بالا می‌برد و در
+نتیجه همه‌ی قطعه‌های وابسته بدون نیاز به حذف صریح، کهنه و نادیده گرفته می‌شوند.
+"""
+import functools
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.template.loader import render_to_string
+from django.utils.safestring import mark_safe
+
+FRAGMENT_TIMEOUT = 60 * 60 * 24
+
+_tracked = set()
+
+
+def _generation_key(label):
+    return f'fragment_gen:{label}'
+
+
+def _initial_generation():
+    # مقدار اولیه وابسته به زمان است تا پس از حذف کلید از کش، نسل قدیمی تکرار نشود
+    return time.time_ns() // 1000
+
+
+def get_generations(labels):
+    """نسل فعلی مدل‌ها (بدون کوئری دیتابیس)"""
+    keys = [_generation_key(label) for label in labels]
+    values = cache.get_many(keys)
+    for key in keys:
+        if key not in values:
+            cache.add(key, _initial_generation(), None)
+            values[key] = cache.get(key)
+    return [values[key] for key in keys]
+
+
+def bump(model):
+    """افزایش نسل یک مدل؛ همه‌ی قطعه‌های وابسته نامعتبر می‌شوند"""
+    bump_label(model._meta.label_lower)
+
+
+def bump_label(label):
+    """افزایش نسل یک برچسب دلخواه (برای کش‌هایی که به زیرمجموعه‌ای از رکوردها وابسته‌اند)"""
+    key = _generation_key(label)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _initial_generation(), None)
+
+
+def _bump_sender(sender, **kwargs):
+    bump(sender)
+    # پس از commit دوباره، تا خواننده‌ای که در این فاصله داده‌ی قدیمی را کش کرده نادیده گرفته شود
+    transaction.on_commit(lambda: bump(sender))
+
+
+def track(*models):
+    """اتصال سیگنال‌های ذخیره/حذف مدل‌ها به افزایش نسل"""
+    for model in models:
+        label = model._meta.label_lower
+        if label in _tracked:
+            continue
+        _tracked.add(label)
+        uid = f'fragment_cache:{label}'
+        post_save.connect(_bump_sender, sender=model, dispatch_uid=uid, weak=False)
+        post_delete.connect(_bump_sender, sender=model, dispatch_uid=uid, weak=False)
+        for field in model._meta.many_to_many:
+            through = getattr(field.remote_field, 'through', None)
+            if through is None:
+                continue
+
+            # m2m_changed خودش آرگومان model را می‌فرستد؛ نام دیگری لازم است
+            def _bump_on_m2m(sender, action, tracked_model=model, **kwargs):
+                if action in ('post_add', 'post_remove', 'post_clear'):
+                    _bump_sender(tracked_model)
+
+            m2m_changed.connect(_bump_on_m2m, sender=through, dispatch_uid=f'{uid}:{field.name}', weak=False)
+
+
+def _fragment_key(name, labels, args, kwargs):
+    generations = '.'.join(str(g) for g in get_generations(labels))
+    arguments = hashlib.md5(repr((args, sorted(kwargs.items()))).encode()).hexdigest()
+    return f'fragment:{name}:{arguments}:{generations}'
+
+
+def _cached_tag(register, depends_on, name, timeout, render, safe=False):
+    labels = [model._meta.label_lower for model in depends_on]
+    track(*depends_on)
+
+    def decorator(func):
+        tag_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _fragment_key(tag_name, labels, args, kwargs)
+            value = cache.get(key)
+            if value is None:
+                value = render(func(*args, **kwargs))
+                cache.set(key, value, timeout)
+            # HTML رندر شده امن است و نباید دوباره escape شود
+            return mark_safe(value) if safe else value
+
+        register.simple_tag(wrapper, name=tag_name)
+        return func
+
+    return decorator
+
+
+def cached_inclusion_tag(register, template_name, depends_on, name=None, timeout=FRAGMENT_TIMEOUT):
+    """مشابه inclusion_tag، با ذخیره‌ی HTML نهایی در کش نسخه‌دار"""
+    def render(context):
+        return str(render_to_string(template_name, context))
+
+    return _cached_tag(register, depends_on, name, timeout, render, safe=True)
+
+
+def cached_simple_tag(register, depends_on, name=None, timeout=FRAGMENT_TIMEOUT):
+    """مشابه simple_tag، با ذخیره‌ی مقدار بازگشتی در کش نسخه‌دار"""
+    return _cached_tag(register, depends_on, name, timeout, lambda value: value)
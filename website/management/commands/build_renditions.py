@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from website import renditions
+
+
+class Command(BaseCommand):
+    help = 'ساخت نسخه‌های thumb/card/hero برای تصاویر موجود'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true',
+                            help='ساخت دوباره‌ی نسخه‌های موجود')
+
+    def handle(self, *args, **options):
+        images = files = failed = 0
+        for model, field_name in renditions.image_fields():
+            names = model._default_manager.exclude(**{field_name: ''})\
+                .exclude(**{f'{field_name}__isnull': True})\
+                .values_list(field_name, flat=True).distinct().iterator()
+            storage = model._meta.get_field(field_name).storage
+            for name in names:
+                try:
+                    files += renditions.generate(storage, name, force=options['force'])
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'{name}: {e}')
+                    continue
+                images += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'{images} تصویر بررسی شد، {files} فایل ساخته شد، {failed} خطا'
+        ))
@@ -0,0 +1,27 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from website import sitemap_builder
+
+
+class Command(BaseCommand):
+    help = 'ساخت تدریجی قطعه‌های فشرده‌ی نقشه‌ی سایت و فایل sitemap.xml'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--full', action='store_true',
+                            help='ساخت دوباره‌ی همه‌ی قطعه‌ها')
+        parser.add_argument('--loop', type=int, default=0,
+                            help='اجرای دوره‌ای با فاصله‌ی مشخص (ثانیه)')
+
+    def handle(self, *args, **options):
+        full = options['full']
+        while True:
+            written, unchanged, removed = sitemap_builder.build(full=full, stdout=self.stdout)
+            self.stdout.write(self.style.SUCCESS(
+                f'{written} قطعه ساخته شد، {unchanged} قطعه بدون تغییر، {removed} قطعه حذف شد'
+            ))
+            if not options['loop']:
+                break
+            full = False
+            time.sleep(options['loop'])
@@ -0,0 +1,38 @@
+# website/normalization.py
+"""
+یکسان‌سازی متن فارسی (ی/ك عربی، نیم‌فاصله، اعراب، ارقام فارسی و عربی)
+
+مشترک بین نمایه‌ی جستجوی بلاگ و ستون‌های یکسان‌سازی شده‌ی شهرهای تور.
+"""
+import re
+
+_CHAR_MAP = str.maketrans({
+    'ي': 'ی', 'ى': 'ی', 'ئ': 'ی',
+    'ك': 'ک',
+    'ة': 'ه', 'ۀ': 'ه',
+    'أ': 'ا', 'إ': 'ا', 'آ': 'ا', 'ٱ': 'ا',
+    'ؤ': 'و',
+    '۰': '0', '۱': '1', '۲': '2', '۳': '3', '۴': '4',
+    '۵': '5', '۶': '6', '۷': '7', '۸': '8', '۹': '9',
+    '٠': '0', '١': '1', '٢': '2', '٣': '3', '٤': '4',
+    '٥': '5', '٦': '6', '٧': '7', '٨': '8', '٩': '9',
+    '\u200c': None,  # نیم‌فاصله
+    '\u200d': None,
+    '\u0640': None,  # کشیده
+})
+
+# اعراب و علائم تجوید
+_DIACRITICS_RE = re.compile('[\u064b-\u065f\u0670\u06d6-\u06ed]')
+
+
+def normalize(text):
+    """یکسان‌سازی متن فارسی برای نمایه و جستجو"""
+    if not text:
+        return ''
+    text = _DIACRITICS_RE.sub('', text.translate(_CHAR_MAP))
+    return text.lower()
+
+
+def normalize_city(name):
+    """یکسان‌سازی نام شهر: متن یکسان‌سازی شده با فاصله‌های اضافه‌ی حذف شده"""
+    return ' '.join(normalize(name).split())
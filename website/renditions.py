@@ -0,0 +1,262 @@
+# website/renditions.py
+"""
+نسخه‌های کوچک‌شده‌ی تصاویر آپلودی (thumb / card / hero)
+
+برای هر تصویر فیلدهای ثبت شده در FIELDS، هر نسخه در دو قالب WebP و JPEG و در
+صورت نیاز با چگالی ۲x ساخته می‌شود. نام فایل‌ها قطعی است و از نام فایل اصلی
+به دست می‌آید:
+    renditions/<نسخه>/<دو حرف اول hash>/<hash>[@2x].<webp|jpg>
+بنابراین آدرس‌ها بدون کوئری ساخته می‌شوند و با هدر کش بلندمدت (immutable)
+سرو می‌شوند (website.views.serve_rendition).
+
+ساخت نسخه‌ها پس از ذخیره‌ی مدل (بعد از commit) در یک مجموعه‌ی ثابت از
+رشته‌های پس‌زمینه انجام می‌شود. تصویر اصلی فقط یک بار باز می‌شود و برای JPEG
+با draft در همان مرحله‌ی decode کوچک می‌شود. تا آماده شدن نسخه‌ها، تگ picture
+آدرس تصویر اصلی را نمایش می‌دهد.
+
+با حذف رکورد یا جایگزینی تصویر، نسخه‌های تصویر قبلی (بعد از commit) حذف
+می‌شوند، مگر آن‌که رکورد دیگری هنوز به همان فایل اشاره کند.
+"""
+import hashlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models.signals import post_delete, post_init, post_save
+from pilkit.processors import ResizeToFill, ResizeToFit, Transpose
+from pilkit.utils import open_image, process_image
+
+logger = logging.getLogger(__name__)
+
+# تغییر تنظیمات نسخه‌ها = نسخه‌ی جدید (آدرس‌های جدید، بدون کش کهنه)
+VERSION = 1
+ROOT = 'renditions'
+
+# نام: (عرض، ارتفاع، برش برای پر کردن کادر، چگالی‌ها)
+RENDITIONS = {
+    'thumb': (160, 160, True, (1, 2)),
+    'card': (480, 320, True, (1, 2)),
+    'hero': (1600, 900, False, (1,)),
+}
+
+FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+# فیلدهای تصویری که نسخه‌های آن‌ها ساخته می‌شود
+FIELDS = [
+    ('accounts.UserProfile', 'profile_image'),
+    ('blog.Post', 'image'),
+    ('destinations.Destination', 'featured_image'),
+    ('pages.Page', 'featured_image'),
+    ('tours.Tour', 'featured_image'),
+    ('tours.TourImage', 'image'),
+]
+
+READY_TIMEOUT = 60 * 60 * 24 * 30
+MAX_AGE = 60 * 60 * 24 * 365
+FAILED_TIMEOUT = 60 * 60
+
+_executor = None
+_executor_lock = threading.Lock()
+_inflight = set()
+
+
+def _workers():
+    return getattr(settings, 'RENDITION_WORKERS', 2)
+
+
+def _digest(source_name):
+    return hashlib.md5(f'{VERSION}:{source_name}'.encode()).hexdigest()
+
+
+def rendition_name(source_name, rendition, fmt, scale=1):
+    digest = _digest(source_name)
+    suffix = f'@{scale}x' if scale > 1 else ''
+    return f'{ROOT}/{rendition}/{digest[:2]}/{digest}{suffix}.{fmt}'
+
+
+def rendition_names(source_name):
+    """نام همه‌ی فایل‌های نسخه‌های یک تصویر"""
+    return [
+        rendition_name(source_name, rendition, fmt, scale)
+        for rendition, (_w, _h, _crop, scales) in RENDITIONS.items()
+        for scale in scales
+        for fmt in FORMATS
+    ]
+
+
+def _processors(rendition, scale):
+    width, height, crop, _scales = RENDITIONS[rendition]
+    size = (width * scale, height * scale)
+    return [ResizeToFill(*size) if crop else ResizeToFit(*size, upscale=False)]
+
+
+def _ready_key(source_name):
+    return f'rendition_ready:{_digest(source_name)}'
+
+
+def generate(storage, source_name, force=False):
+    """ساخت همه‌ی نسخه‌های یک تصویر - خروجی: تعداد فایل‌های ساخته شده"""
+    targets = [
+        (rendition, scale, fmt)
+        for rendition, (_w, _h, _crop, scales) in RENDITIONS.items()
+        for scale in scales
+        for fmt in FORMATS
+    ]
+    if not force:
+        targets = [
+            target for target in targets
+            if not storage.exists(rendition_name(source_name, target[0], target[2], target[1]))
+        ]
+
+    if targets:
+        with storage.open(source_name, 'rb') as source:
+            image = open_image(source)
+            # decode کوچک‌تر برای JPEG (بزرگ‌ترین نسخه‌ی لازم)
+            largest = max(
+                (RENDITIONS[rendition][0] * scale, RENDITIONS[rendition][1] * scale)
+                for rendition, scale, _fmt in targets
+            )
+            image.draft('RGB', largest)
+            image = Transpose().process(image)
+            image.load()
+
+        for rendition, scale, fmt in targets:
+            name = rendition_name(source_name, rendition, fmt, scale)
+            pil_format, options = FORMATS[fmt]
+            output = process_image(image.copy(), processors=_processors(rendition, scale),
+                                   format=pil_format, options=options)
+            if storage.exists(name):
+                storage.delete(name)
+            storage.save(name, ContentFile(output.read()))
+
+    cache.set(_ready_key(source_name), True, READY_TIMEOUT)
+    return len(targets)
+
+
+def is_ready(storage, source_name):
+    """آیا نسخه‌ها ساخته شده‌اند (کش، سپس وجود آخرین فایل)"""
+    key = _ready_key(source_name)
+    if cache.get(key):
+        return True
+    last = list(RENDITIONS)[-1]
+    if storage.exists(rendition_name(source_name, last, list(FORMATS)[-1], RENDITIONS[last][3][-1])):
+        cache.set(key, True, READY_TIMEOUT)
+        return True
+    return False
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=_workers(), thread_name_prefix='renditions')
+        return _executor
+
+
+def _run(storage, source_name):
+    try:
+        generate(storage, source_name)
+    except Exception as e:
+        # تصویر خراب یا ناموجود: تا مدتی دوباره تلاش نشود
+        cache.set(f'rendition_failed:{_digest(source_name)}', True, FAILED_TIMEOUT)
+        logger.error(f"Error generating renditions for {source_name}: {str(e)}")
+    finally:
+        with _executor_lock:
+            _inflight.discard(source_name)
+
+
+def schedule(storage, source_name):
+    """ساخت نسخه‌ها در پس‌زمینه (تکراری‌ها و تصاویر ناموفق اخیر نادیده گرفته می‌شوند)"""
+    if not source_name or cache.get(f'rendition_failed:{_digest(source_name)}'):
+        return
+    with _executor_lock:
+        if source_name in _inflight:
+            return
+        _inflight.add(source_name)
+    _get_executor().submit(_run, storage, source_name)
+
+
+def delete(storage, source_name):
+    """حذف نسخه‌های یک تصویر - خروجی: تعداد فایل‌های حذف شده"""
+    deleted = 0
+    for name in rendition_names(source_name):
+        if storage.exists(name):
+            storage.delete(name)
+            deleted += 1
+    cache.delete_many([_ready_key(source_name), f'rendition_failed:{_digest(source_name)}'])
+    return deleted
+
+
+def _discard(model, field_name, storage, source_name):
+    # فایل مشترک بین چند رکورد: نسخه‌ها تا حذف آخرین ارجاع باقی می‌مانند
+    if model._default_manager.filter(**{field_name: source_name}).exists():
+        return
+    try:
+        delete(storage, source_name)
+    except Exception as e:
+        logger.error(f"Error deleting renditions for {source_name}: {str(e)}")
+
+
+def _source_attr(field_name):
+    return f'_rendition_source_{field_name}'
+
+
+def _loaded_name(instance, field_name):
+    # مقدار خام، بدون بارگذاری فیلد deferred
+    value = instance.__dict__.get(field_name)
+    return getattr(value, 'name', value) or None
+
+
+def _on_init(field_name):
+    def receiver(sender, instance, **kwargs):
+        # نام تصویر بارگذاری شده برای تشخیص جایگزینی در post_save
+        instance.__dict__[_source_attr(field_name)] = _loaded_name(instance, field_name)
+    return receiver
+
+
+def _on_save(field_name):
+    def receiver(sender, instance, created=False, raw=False, **kwargs):
+        if raw or field_name not in instance.__dict__:
+            # فیلد deferred بارگذاری نشده و تغییر نکرده است
+            return
+        previous = instance.__dict__.get(_source_attr(field_name))
+        image = getattr(instance, field_name)
+        storage, name = image.storage, image.name or None
+        instance.__dict__[_source_attr(field_name)] = name
+        if previous and previous != name and not created:
+            transaction.on_commit(lambda: _discard(sender, field_name, storage, previous))
+        if name and not cache.get(_ready_key(name)):
+            transaction.on_commit(lambda: schedule(storage, name))
+    return receiver
+
+
+def _on_delete(field_name):
+    def receiver(sender, instance, **kwargs):
+        name = _loaded_name(instance, field_name)
+        if name:
+            storage = sender._meta.get_field(field_name).storage
+            transaction.on_commit(lambda: _discard(sender, field_name, storage, name))
+    return receiver
+
+
+def connect():
+    """اتصال سیگنال‌های ساخت و حذف نسخه‌های فیلدهای تصویری (در WebsiteConfig.ready)"""
+    for label, field_name in FIELDS:
+        model = apps.get_model(label)
+        uid = f'renditions:{label}.{field_name}'
+        post_init.connect(_on_init(field_name), sender=model, weak=False, dispatch_uid=uid)
+        post_save.connect(_on_save(field_name), sender=model, weak=False, dispatch_uid=uid)
+        post_delete.connect(_on_delete(field_name), sender=model, weak=False, dispatch_uid=uid)
+
+
+def image_fields():
+    """(مدل، نام فیلد) همه‌ی فیلدهای ثبت شده"""
+    return [(apps.get_model(label), field_name) for label, field_name in FIELDS]
@@ -0,0 +1,179 @@
+# website/sitemap_builder.py
+"""
+تولید نقشه‌ی سایت از پیش ساخته شده
+
+هر بخش (بلاگ، تورها، صفحات، مقاصد) بر اساس بازه‌ی شناسه به قطعه‌هایی با
+حداکثر SHARD_SIZE آدرس تقسیم می‌شود و هر قطعه به صورت gzip در فضای فایل‌های
+رسانه (یا SITEMAP_STORAGE) ذخیره می‌شود. فایل sitemap.xml فهرست همه‌ی قطعه‌هاست.
+
+برای هر قطعه یک اثر انگشت (تعداد، بیشترین تاریخ تغییر و بازه‌ی شناسه) با یک
+کوئری تجمیعی محاسبه می‌شود و فقط قطعه‌هایی که اثر انگشتشان عوض شده دوباره
+ساخته می‌شوند. درخواست‌های خزنده‌ها فقط فایل‌های ذخیره شده را می‌خوانند.
+"""
+import gzip
+import hashlib
+import json
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+from django.contrib.sites.models import Site
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db.models import Count, F, Max, Min
+from django.urls import reverse
+
+from website.sitemaps import get_sitemaps
+
+SHARD_SIZE = 50000
+SITEMAP_DIR = 'sitemaps'
+INDEX_NAME = f'{SITEMAP_DIR}/sitemap.xml'
+MANIFEST_NAME = f'{SITEMAP_DIR}/manifest.json'
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8"?>\n'
+URLSET_OPEN = '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+INDEX_OPEN = '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+
+
+def get_storage():
+    # نه در فضای استاتیک: collectstatic --clear قطعه‌ها را پاک می‌کند
+    return storages[getattr(settings, 'SITEMAP_STORAGE', 'default')]
+
+
+def shard_name(section, shard):
+    return f'{section}-{shard}.xml.gz'
+
+
+def get_base_url():
+    base_url = getattr(settings, 'SITEMAP_BASE_URL', None)
+    if base_url:
+        return base_url.rstrip('/')
+    protocol = getattr(settings, 'SITEMAP_PROTOCOL', 'https')
+    return f'{protocol}://{Site.objects.get_current().domain}'
+
+
+def _value(sitemap, name, item):
+    attr = getattr(sitemap, name, None)
+    return attr(item) if callable(attr) else attr
+
+
+def _is_queryset_section(sitemap):
+    return getattr(sitemap, 'lastmod_field', None) is not None
+
+
+def _fingerprints(sitemap):
+    """اثر انگشت هر قطعه با یک کوئری: {shard: (fingerprint, lastmod)}"""
+    if not _is_queryset_section(sitemap):
+        locations = [sitemap.location(item) for item in sitemap.items()]
+        digest = hashlib.md5('\n'.join(locations).encode()).hexdigest()
+        return {0: (digest, None)}
+
+    rows = sitemap.items().order_by()\
+        .annotate(shard=F('pk') / SHARD_SIZE)\
+        .values('shard')\
+        .annotate(
+            count=Count('pk'),
+            last=Max(sitemap.lastmod_field),
+            first_pk=Min('pk'),
+            last_pk=Max('pk'),
+        )
+    result = {}
+    for row in rows:
+        last = row['last'].isoformat() if row['last'] else ''
+        result[row['shard']] = (f"{row['count']}:{last}:{row['first_pk']}:{row['last_pk']}", last or None)
+    return result
+
+
+def _url_entry(sitemap, item, base_url):
+    parts = [f'<url><loc>{escape(base_url + sitemap.location(item))}</loc>']
+    lastmod = _value(sitemap, 'lastmod', item)
+    if lastmod:
+        parts.append(f'<lastmod>{lastmod.date().isoformat()}</lastmod>')
+    changefreq = _value(sitemap, 'changefreq', item)
+    if changefreq:
+        parts.append(f'<changefreq>{changefreq}</changefreq>')
+    priority = _value(sitemap, 'priority', item)
+    if priority is not None:
+        parts.append(f'<priority>{priority}</priority>')
+    parts.append('</url>\n')
+    return ''.join(parts)
+
+
+def render_shard(sitemap, shard, base_url):
+    """ساخت محتوای فشرده‌ی یک قطعه"""
+    if _is_queryset_section(sitemap):
+        items = sitemap.items().filter(
+            pk__gte=shard * SHARD_SIZE, pk__lt=(shard + 1) * SHARD_SIZE
+        ).iterator(chunk_size=2000)
+    else:
+        items = sitemap.items()
+
+    body = [XML_HEADER, URLSET_OPEN]
+    body.extend(_url_entry(sitemap, item, base_url) for item in items)
+    body.append('</urlset>\n')
+    return gzip.compress(''.join(body).encode('utf-8'), mtime=0)
+
+
+def render_index(manifest, base_url):
+    body = [XML_HEADER, INDEX_OPEN]
+    for section in sorted(manifest):
+        for shard in sorted(manifest[section], key=int):
+            entry = manifest[section][shard]
+            loc = base_url + reverse('sitemap_shard', args=[entry['file']])
+            body.append(f'<sitemap><loc>{escape(loc)}</loc>')
+            if entry['lastmod']:
+                body.append(f"<lastmod>{entry['lastmod'][:10]}</lastmod>")
+            body.append('</sitemap>\n')
+    body.append('</sitemapindex>\n')
+    return ''.join(body).encode('utf-8')
+
+
+def _write(storage, name, content):
+    if storage.exists(name):
+        storage.delete(name)
+    storage.save(name, ContentFile(content))
+
+
+def load_manifest(storage=None):
+    storage = storage or get_storage()
+    if not storage.exists(MANIFEST_NAME):
+        return {}
+    with storage.open(MANIFEST_NAME) as f:
+        return json.loads(f.read().decode('utf-8'))
+
+
+def build(full=False, stdout=None):
+    """ساخت (تدریجی) قطعه‌ها و فهرست - خروجی: (ساخته شده، بدون تغییر، حذف شده)"""
+    storage = get_storage()
+    base_url = get_base_url()
+    old_manifest = {} if full else load_manifest(storage)
+    manifest = {}
+    written = unchanged = removed = 0
+
+    for section, sitemap_class in get_sitemaps().items():
+        sitemap = sitemap_class()
+        old_shards = old_manifest.get(section, {})
+        manifest[section] = {}
+
+        for shard, (fingerprint, lastmod) in sorted(_fingerprints(sitemap).items()):
+            entry = {'file': shard_name(section, shard), 'fingerprint': fingerprint, 'lastmod': lastmod}
+            old = old_shards.get(str(shard))
+            name = f"{SITEMAP_DIR}/{entry['file']}"
+            if old and old['fingerprint'] == fingerprint and storage.exists(name):
+                unchanged += 1
+            else:
+                _write(storage, name, render_shard(sitemap, shard, base_url))
+                written += 1
+                if stdout:
+                    stdout.write(f'{entry["file"]} ساخته شد')
+            manifest[section][str(shard)] = entry
+
+        # قطعه‌هایی که دیگر آیتمی ندارند
+        for shard, old in old_shards.items():
+            if shard not in manifest[section]:
+                storage.delete(f"{SITEMAP_DIR}/{old['file']}")
+                removed += 1
+
+    if written or removed or full or not storage.exists(INDEX_NAME):
+        _write(storage, INDEX_NAME, render_index(manifest, base_url))
+    _write(storage, MANIFEST_NAME, json.dumps(manifest, ensure_ascii=False).encode('utf-8'))
+    return written, unchanged, removed
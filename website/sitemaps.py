@@ -12,4 +12,19 @@ class StaticViewSitemap(sitemaps.Sitemap):
         return ["website:index", "website:about", "website:contact"]
 
     def location(self, item):
-        return reverse(item)
\ No newline at end of file
+        return reverse(item)
+
+def get_sitemaps():
+    """همه‌ی بخش‌های نقشه‌ی سایت"""
+    from blog.sitemaps import BlogSitemap
+    from tours.sitemaps import TourSitemap
+    from pages.sitemaps import PageSitemap
+    from destinations.sitemaps import DestinationSitemap
+
+    return {
+        'static': StaticViewSitemap,
+        'blog': BlogSitemap,
+        'tours': TourSitemap,
+        'pages': PageSitemap,
+        'destinations': DestinationSitemap,
+    }
@@ -0,0 +1,43 @@
+from django import template
+from django.utils.html import format_html
+
+from website import renditions
+
+register = template.Library()
+
+
+def _srcset(storage, name, rendition, fmt):
+    scales = renditions.RENDITIONS[rendition][3]
+    return ', '.join(
+        f'{storage.url(renditions.rendition_name(name, rendition, fmt, scale))} {scale}x'
+        for scale in scales
+    )
+
+
+@register.simple_tag
+def picture(image, rendition, alt='', css_class='', loading='lazy', style=''):
+    """
+    تگ picture با نسخه‌های WebP/JPEG و srcset - {% picture post.image 'card' alt=post.title %}
+
+    تا ساخته شدن نسخه‌ها تصویر اصلی نمایش داده می‌شود و ساخت آن‌ها زمان‌بندی می‌شود.
+    """
+    if not image:
+        return ''
+    storage, name = image.storage, image.name
+    if not renditions.is_ready(storage, name):
+        renditions.schedule(storage, name)
+        return format_html(
+            '<img src="{}" alt="{}" class="{}" style="{}" loading="{}">',
+            image.url, alt, css_class, style, loading,
+        )
+
+    width, height, crop, _scales = renditions.RENDITIONS[rendition]
+    size = format_html(' width="{}" height="{}"', width, height) if crop else ''
+    return format_html(
+        '<picture><source type="image/webp" srcset="{}">'
+        '<img src="{}" srcset="{}"{} alt="{}" class="{}" style="{}" loading="{}" decoding="async"></picture>',
+        _srcset(storage, name, rendition, 'webp'),
+        storage.url(renditions.rendition_name(name, rendition, 'jpg')),
+        _srcset(storage, name, rendition, 'jpg'),
+        size, alt, css_class, style, loading,
+    )
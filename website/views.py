@@ -7,6 +7,11 @@ from .models import NewsletterSubscriber
 from django.contrib import sitemaps
 from django.urls import reverse
 from django.views.decorators.cache import never_cache
+from django.contrib.sitemaps.views import sitemap
+from django.http import Http404, HttpResponse
+from django.utils.cache import patch_cache_control
+from website import sitemap_builder
+from website.sitemaps import get_sitemaps
 from django.db.models import Prefetch
 from blog.models import Post
 from destinations.models import Destination
@@ -26,7 +31,8 @@ def index_view(request):
     # واکشی پست‌های ویژه برای نمایش در صفحه اصلی
     try:
         # ✅ فقط 6 پست آخر
-        featured_posts = Post.objects.filter(status='published').order_by('-published_date')[:6]
+        featured_posts = Post.objects.filter(status='published')\
+            .defer(*Post.LISTING_DEFERRED_FIELDS).order_by('-published_date')[:6]
         print(f"✅ پست‌های ویژه (6 پست آخر): {featured_posts.count()}")
     except Exception as e:
         print(f"❌ خطا در واکشی پست‌های ویژه: {e}")
@@ -112,4 +118,54 @@ def newsletter_view(request):
         else:
             messages.error(request, 'لطفاً یک ایمیل معتبر وارد کنید!')
     
-    return redirect('website:index')
\ No newline at end of file
+    return redirect('website:index')
+
+
+SITEMAP_MAX_AGE = 3600
+
+
+def _sitemap_file_response(name, content_type):
+    storage = sitemap_builder.get_storage()
+    if not storage.exists(name):
+        return None
+    with storage.open(name) as f:
+        response = HttpResponse(f.read(), content_type=content_type)
+    patch_cache_control(response, public=True, max_age=SITEMAP_MAX_AGE)
+    return response
+
+
+def sitemap_index_view(request):
+    """فهرست نقشه‌ی سایت از فایل از پیش ساخته شده (بدون کوئری دیتابیس)"""
+    response = _sitemap_file_response(sitemap_builder.INDEX_NAME, 'application/xml')
+    if response is None:
+        # تا قبل از اولین اجرای build_sitemaps، نقشه به صورت زنده ساخته می‌شود
+        return sitemap(request, sitemaps=get_sitemaps())
+    return response
+
+
+def sitemap_shard_view(request, name):
+    """یک قطعه‌ی فشرده از نقشه‌ی سایت"""
+    if not name.endswith('.xml.gz'):
+        raise Http404
+    response = _sitemap_file_response(f'{sitemap_builder.SITEMAP_DIR}/{name}', 'application/gzip')
+    if response is None:
+        raise Http404
+    return response
+
+
+RENDITION_CONTENT_TYPES = {'webp': 'image/webp', 'jpg': 'image/jpeg'}
+
+
+def serve_rendition(request, path):
+    """نسخه‌های تصاویر با کش بلندمدت (نام فایل‌ها قطعی و تغییرناپذیر است)"""
+    from django.core.files.storage import default_storage
+    from django.http import FileResponse
+    from website import renditions
+
+    content_type = RENDITION_CONTENT_TYPES.get(path.rsplit('.', 1)[-1])
+    name = f'{renditions.ROOT}/{path}'
+    if content_type is None or '..' in path.split('/') or not default_storage.exists(name):
+        raise Http404
+    response = FileResponse(default_storage.open(name), content_type=content_type)
+    patch_cache_control(response, public=True, max_age=renditions.MAX_AGE, immutable=True)
+    return response